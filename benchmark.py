@@ -0,0 +1,371 @@
+"""
+Benchmarks and equivalence checks for the encoding and rendering pipeline.
+
+    python benchmark.py [--cols N ...] [--repeat N] [--json PATH] [--compare OLD.json]
+
+Runs headless under Agg. For every col_num x col_num grid, filled with a
+Vietnamese-heavy text, each stage is timed on its own, for the reference path
+(what plot_sentence and generate_alphabet_square do) and for the fast path that
+replaces it:
+
+    decompose  decompose_sentence + GlyphTable.glyph_ids vs encoder.encode_sentence
+    layout     layout_glyphs
+    artists    one patch per polygon (legacy_alphabet_square) vs one PolyCollection
+    draw       canvas.draw() of those artists
+    savefig    savefig to svg/pdf/png vs the native svg_writer/tile_atlas/cairo backends
+
+Results are written as JSON; --compare prints the speed change against an
+earlier result file. The checks confirm that the fast paths produce the same
+glyphs, geometry and pixels as the reference path, and that importing the GUI
+(python -X importtime -c "import multi_code") stays under STARTUP_TARGET without
+loading matplotlib, building the symbol tables under TABLES_TARGET; the exit status
+is 1 if one fails.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+import numpy as np  # noqa: E402
+
+from encoder import encode_sentence  # noqa: E402
+from glyphs import case_polygons  # noqa: E402
+from layout import GLYPH_TABLE, decompose_sentence, layout_glyphs  # noqa: E402
+import mpl_render  # noqa: E402
+from symbols import resolve_palette  # noqa: E402
+import svg_writer  # noqa: E402
+import tile_atlas  # noqa: E402
+
+sentence4 = "Tâm hồn là nội thất căn nhà - con người"
+# Mostly stacked diacritics, which decompose into up to three glyphs per character
+sentence5 = "Ấm áp, dịu dàng; người ở lại lặng lẽ nhớ những điều đã qua."
+
+# Output formats timed through savefig
+SAVEFIG_FORMATS = ('svg', 'pdf', 'png')
+
+# Pixels whose largest channel difference exceeds this count as different
+PIXEL_TOLERANCE = 64
+# Share of pixels allowed to differ, polygon edges are antialiased differently by patches and collections
+PIXEL_DIFF_SHARE = 0.01
+
+# Cumulative import time of multi_code in seconds, matplotlib waits for the first Generate.
+# Measured at 0.15 to 0.24 s, most of it numpy.
+STARTUP_TARGET = 0.3
+# Own import time of the modules that build the symbol, decomposition and glyph tables.
+# Measured at 3 to 5 ms, far too little for a precompiled cache of the tables to pay off.
+TABLE_MODULES = ('glyphs', 'symbols', 'layout', 'encoder')
+TABLES_TARGET = 0.02
+
+
+def best_of(func, repeat):
+    """
+    Run func repeat times.
+    :return: (best wall time in seconds, result of the last run)
+    """
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def grid_text(col_num):
+    """
+    Text that fills at least a col_num x col_num grid.
+    :return: (text, its glyph IDs cut to the grid size)
+    """
+    text = sentence4 + sentence5
+    repeats = math.ceil(col_num * col_num / len(encode_sentence(text)))
+    return text * repeats, encode_sentence(text * repeats)[:col_num * col_num]
+
+
+def grid_figure(col_num, dpi=100, cell_inches=0.1):
+    fig = Figure(figsize=(col_num * cell_inches, col_num * cell_inches), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.set_xlim(0, col_num * 3)
+    ax.set_ylim((1 - col_num) * 3, 3)
+    ax.axis('off')
+    return fig, canvas, ax
+
+
+def legacy_alphabet_square(ax, square_symbol_obj, offset_x=0, offset_y=0, line_width=1):
+    """
+    Frozen copy of multi_code.generate_alphabet_square without its stats hook, kept as the
+    reference the fast paths are checked against: one matplotlib patch per polygon, colours
+    applied cyclically. Importing it from multi_code would pull PyQt5 into the benchmark.
+    :param square_symbol_obj: SquareSymbol to draw.
+    :param offset_x: Left edge of the square.
+    :param offset_y: Downward offset of the square, so the cell sits at y = -offset_y.
+    """
+    import matplotlib.patches as Patches
+
+    color_lst = square_symbol_obj.get_rgba()
+    offset = np.array([offset_x, -offset_y])
+    for i, polygon in enumerate(case_polygons(square_symbol_obj.get_case())):
+        ax.add_patch(Patches.Polygon(polygon + offset, fill=True, edgecolor='black',
+                                     facecolor=color_lst[i % len(color_lst)], linewidth=line_width))
+
+
+def add_patches(ax, layout, line_width=1):
+    # The reference path: legacy_alphabet_square for every cell, like plot_sentence used to
+    symbols = layout.table.symbols
+    for glyph_id, (offset_x, offset_y) in zip(layout.glyph_ids.tolist(), layout.cell_offsets.tolist()):
+        legacy_alphabet_square(ax, symbols[glyph_id], offset_x, -offset_y, line_width=line_width)
+
+
+def add_collection(ax, layout, line_width=1):
+    mpl_render.draw_layout(ax, layout, resolve_palette(), line_width=line_width)
+
+
+def unit_steps(segments):
+    """
+    Set of the unit lattice steps a set of segments covers, in either direction.
+    """
+    steps = set()
+    for (x_0, y_0), (x_1, y_1) in np.rint(segments).astype(int).tolist():
+        n = math.gcd(x_1 - x_0, y_1 - y_0)
+        dx, dy = (x_1 - x_0) // n, (y_1 - y_0) // n
+        for k in range(n):
+            a, b = (x_0 + k * dx, y_0 + k * dy), (x_0 + (k + 1) * dx, y_0 + (k + 1) * dy)
+            steps.add((min(a, b), max(a, b)))
+    return steps
+
+
+def native_backends():
+    backends = [('svg_writer', svg_writer, 'svg'), ('tile_atlas', tile_atlas, 'png')]
+    try:
+        import cairo_test
+    except ImportError:
+        return backends
+    return backends + [('cairo', cairo_test, fmt) for fmt in cairo_test.FORMATS]
+
+
+def run_grid(col_num, repeat):
+    """
+    Time every stage on a col_num x col_num grid.
+    :return: List of result dicts.
+    """
+    results = []
+
+    def record(stage, path, seconds, size=None):
+        results.append({'grid': col_num, 'glyphs': len(glyph_ids), 'stage': stage, 'path': path,
+                        'seconds': seconds, 'bytes': size})
+        size_text = '' if size is None else f"{size:>10}"
+        print(f"{col_num:>4}x{col_num:<4} {stage:>9} {path:>16} {seconds:>9.4f} {size_text}")
+
+    text, glyph_ids = grid_text(col_num)
+    palette = resolve_palette()
+
+    seconds, _ = best_of(lambda: GLYPH_TABLE.glyph_ids(decompose_sentence(text)), repeat)
+    record('decompose', 'reference', seconds)
+    seconds, _ = best_of(lambda: encode_sentence(text), repeat)
+    record('decompose', 'encoder', seconds)
+
+    seconds, layout = best_of(lambda: layout_glyphs(glyph_ids, col_num, col_num), repeat)
+    record('layout', 'layout_glyphs', seconds)
+
+    for path, add in (('patches', add_patches), ('collection', add_collection)):
+        def build():
+            fig, canvas, ax = grid_figure(col_num)
+            add(ax, layout)
+            return fig, canvas
+        seconds, (fig, canvas) = best_of(build, repeat)
+        record('artists', path, seconds)
+        seconds, _ = best_of(canvas.draw, repeat)
+        record('draw', path, seconds)
+        for fmt in SAVEFIG_FORMATS:
+            def save():
+                buf = io.BytesIO()
+                fig.savefig(buf, format=fmt)
+                return buf.getvalue()
+            seconds, data = best_of(save, repeat)
+            record('savefig', f"{path}-{fmt}", seconds, len(data))
+
+    for name, backend, fmt in native_backends():
+        def write():
+            buf = io.BytesIO()
+            backend.write_layout(layout, buf, fmt, palette)
+            return buf.getvalue()
+        seconds, data = best_of(write, repeat)
+        record('savefig', f"{name}-{fmt}", seconds, len(data))
+    return results
+
+
+def same_drawing(glyph_ids, reference_ids, table=GLYPH_TABLE):
+    """
+    Whether two glyph sequences draw the same, glyphs with equal shapes and colours
+    (like P and 2) cannot be told apart in the output.
+    """
+    if len(glyph_ids) != len(reference_ids):
+        return False
+    drawn = np.column_stack((table.cases, table.polygon_slots))
+    return np.array_equal(drawn[glyph_ids], drawn[reference_ids])
+
+
+def check_grid(col_num):
+    """
+    Compare the fast paths with the reference path on a col_num x col_num grid.
+    :return: List of check dicts with 'passed'.
+    """
+    checks = []
+
+    def record(check, passed, detail):
+        checks.append({'grid': col_num, 'check': check, 'passed': bool(passed), 'detail': detail})
+        print(f"{col_num:>4}x{col_num:<4} {check:>20} {'ok' if passed else 'FAILED':>7}  {detail}")
+
+    text, _ = grid_text(col_num)
+    reference_ids = GLYPH_TABLE.glyph_ids(decompose_sentence(text))
+    glyph_ids = encode_sentence(text)
+    record('glyph ids', np.array_equal(reference_ids, glyph_ids), f"{len(glyph_ids)} glyphs")
+    glyph_ids = glyph_ids[:col_num * col_num]
+    layout = layout_glyphs(glyph_ids, col_num, col_num)
+
+    # Geometry and colours of every polygon against the patches legacy_alphabet_square makes
+    fig, canvas, ax = grid_figure(col_num)
+    add_patches(ax, layout)
+    reference_polygons = [patch.get_xy()[:-1] for patch in ax.patches]
+    reference_colors = np.array([patch.get_facecolor() for patch in ax.patches])
+    polygons = layout.polygons()
+    same_shapes = len(polygons) == len(reference_polygons) and all(
+        np.allclose(a, b) for a, b in zip(polygons, reference_polygons))
+    same_colors = np.allclose(layout.face_colors(matplotlib.colors.to_rgba_array(resolve_palette())),
+                              reference_colors)
+    record('geometry', same_shapes and same_colors, f"{len(polygons)} polygons")
+
+    # The outline strokes every polygon edge, each exactly once
+    edges = [np.stack((polygon, np.roll(polygon, -1, axis=0)), axis=1) for polygon in polygons]
+    reference_steps = unit_steps(np.concatenate(edges))
+    outline = layout.outline_segments()
+    steps = unit_steps(outline)
+    covered = sum(len(unit_steps(segment[None])) for segment in outline)
+    record('outline', steps == reference_steps and covered == len(steps),
+           f"{len(outline)} segments for {sum(len(polygon) for polygon in polygons)} edges")
+
+    # Pixels of the reference patches against the collection. Shared edges are stroked twice
+    # by the patches, which makes them heavier, so only the fills are compared
+    pixels = []
+    for add in (add_patches, add_collection):
+        fig, canvas, ax = grid_figure(col_num)
+        add(ax, layout, line_width=0)
+        canvas.draw()
+        pixels.append(np.asarray(canvas.buffer_rgba()).astype(int))
+    differing = (np.abs(pixels[1] - pixels[0]).max(axis=2) > PIXEL_TOLERANCE).mean()
+    record('fill pixels', differing <= PIXEL_DIFF_SHARE, f"{differing:.2%} of pixels differ")
+
+    # The native backends carry the same glyphs, read back with the decoder
+    from decoder import GlyphDecoder
+    decoder = GlyphDecoder()
+    for name, backend, fmt in (('svg_writer', svg_writer, 'svg'), ('tile_atlas', tile_atlas, 'png')):
+        buf = io.BytesIO()
+        backend.write_layout(layout, buf, fmt, resolve_palette())
+        buf.seek(0)
+        decoded = decoder.read_svg(buf) if fmt == 'svg' else decoder.read_image(buf, col_num, col_num)
+        record(f"{name} geometry", same_drawing(decoded, glyph_ids), f"{len(decoded)} cells decoded")
+    return checks
+
+
+def check_startup():
+    """
+    Import multi_code in a fresh interpreter under -X importtime.
+    :return: List of check dicts with 'passed'.
+    """
+    checks = []
+
+    def record(check, passed, detail):
+        checks.append({'grid': None, 'check': check, 'passed': bool(passed), 'detail': detail})
+        print(f"{'':>9} {check:>20} {'ok' if passed else 'FAILED':>7}  {detail}")
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import multi_code'],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    # Lines look like 'import time:  self [us] | cumulative | imported package'
+    modules, own = {}, {}
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if line.startswith('import time:') and len(fields) == 3 and fields[1].strip().isdigit():
+            modules[fields[2].strip()] = int(fields[1]) / 1e6
+            own[fields[2].strip()] = int(fields[0].split(':')[1]) / 1e6
+    seconds = modules.get('multi_code')
+    if result.returncode or seconds is None:
+        record('startup import', False, (result.stderr.strip().splitlines() or ["multi_code not imported"])[-1])
+        return checks
+    record('startup import', seconds <= STARTUP_TARGET, f"{seconds:.3f} s, target {STARTUP_TARGET} s")
+    tables = sum(own.get(name, 0) for name in TABLE_MODULES)
+    record('startup tables', tables <= TABLES_TARGET, f"{tables * 1000:.1f} ms, target {TABLES_TARGET * 1000:.0f} ms")
+    heavy = sorted(name for name in modules if name.split('.')[0] == 'matplotlib')
+    record('startup modules', not heavy, f"{len(heavy)} matplotlib modules imported")
+    return checks
+
+
+def git_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, old_path):
+    """
+    Print the speed change of every timing against an earlier result file.
+    """
+    with open(old_path, encoding='utf-8') as f:
+        old = {(r['grid'], r['stage'], r['path']): r['seconds'] for r in json.load(f)['results']}
+    print(f"\nchange against {old_path} (>1 is slower)")
+    for r in results:
+        before = old.get((r['grid'], r['stage'], r['path']))
+        if before:
+            print(f"{r['grid']:>4}x{r['grid']:<4} {r['stage']:>9} {r['path']:>16} {r['seconds'] / before:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cols', type=int, nargs='+', default=[6, 25, 50, 100],
+                        help="grid sizes, col_num x col_num (default: 6 25 50 100)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per timing, the best one counts")
+    parser.add_argument('--json', default='benchmark.json', help="result file (default: benchmark.json)")
+    parser.add_argument('--compare', default=None, metavar='OLD.json', help="earlier result file to compare with")
+    parser.add_argument('--no-checks', action='store_true', help="only time, skip the equivalence checks")
+    args = parser.parse_args()
+
+    results = []
+    checks = []
+    print(f"{'grid':>9} {'stage':>9} {'path':>16} {'seconds':>9} {'bytes':>10}")
+    for col_num in args.cols:
+        results.extend(run_grid(col_num, args.repeat))
+    if not args.no_checks:
+        print(f"\n{'grid':>9} {'check':>20} {'result':>7}")
+        for col_num in args.cols:
+            checks.extend(check_grid(col_num))
+        checks.extend(check_startup())
+
+    report = {
+        'version': git_version(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results,
+        'checks': checks,
+    }
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    if args.compare:
+        compare(results, args.compare)
+    if not all(check['passed'] for check in checks):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
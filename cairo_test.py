@@ -1,76 +1,170 @@
 import cairo
-import numpy as np
-
-
-def draw_polygon(ctx, vertices, fill_color):
-    vertices = np.array(vertices)  # Ensure vertices are a NumPy array
-    ctx.move_to(*vertices[-1])
-    for x, y in vertices:
-        ctx.line_to(x, y)
-    ctx.close_path()
-    r, g, b = fill_color
-    ctx.set_source_rgb(r, g, b)  # Set the fill color
-    ctx.fill_preserve()
+
+from glyphs import CELL_SIZE
+from layout import layout_sentence
+
+# Output formats write_layout can produce
+FORMATS = ('png', 'pdf', 'svg')
+# Formats write_pages can put several pages into
+PAGED_FORMATS = ('pdf',)
+
+
+def hex_to_rgb(color):
+    """
+    Convert '#RRGGBB' to an (r, g, b) tuple of floats in 0..1.
+    """
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def add_polygons(ctx, polygons):
+    """
+    Append polygons to the current path without drawing them.
+    :param ctx: Cairo context.
+    :param polygons: (n_polygons, n_vertices, 2) array, see SentenceLayout.polygon_array.
+    """
+    for polygon in polygons.tolist():
+        ctx.move_to(*polygon[0])
+        for x, y in polygon[1:]:
+            ctx.line_to(x, y)
+        ctx.close_path()
+
+
+def draw_layout(ctx, layout, palette, line_width=1):
+    """
+    Draw a laid-out sentence with one fill per colour and a single stroke for all outlines,
+    every edge stroked once even where polygons or cells share it.
+    The context must already map plot units to the surface, see write_layout.
+    :param ctx: Cairo context.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param palette: '#RRGGBB' colours indexed like symbols.COLOR_SLOTS.
+    :param line_width: Width of the black outlines in surface units.
+    """
+    polygons = layout.polygon_array()
+
+    # Batch every polygon of the same colour into one path
+    for slot, color in enumerate(palette):
+        ctx.set_source_rgb(*hex_to_rgb(color))
+        add_polygons(ctx, polygons[layout.color_slots == slot])
+        ctx.fill()
+
+    # Then stroke every outline segment once, shared edges included, in device space so the
+    # width is in surface units
+    for (x_0, y_0), (x_1, y_1) in layout.outline_segments().tolist():
+        ctx.move_to(x_0, y_0)
+        ctx.line_to(x_1, y_1)
+    ctx.save()
+    ctx.identity_matrix()
     ctx.set_source_rgb(0, 0, 0)  # Black for the border
-    ctx.set_line_width(0.05)
+    ctx.set_line_width(line_width)
+    # Square caps close the corners where segments meet
+    ctx.set_line_cap(cairo.LINE_CAP_SQUARE)
     ctx.stroke()
+    ctx.restore()
 
 
-def main():
-    width, height = 600, 400
-    surface = cairo.SVGSurface("polygons.svg", width, height)
+def draw_symbol_text(ctx, layout, font_size=12):
+    """
+    Label the center of every square with its symbol.
+    :param ctx: Cairo context set up like in draw_layout.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param font_size: Font size in surface units.
+    """
+    center = CELL_SIZE / 2
+    # Work in device space so the text is not mirrored by the flipped y axis
+    positions = [ctx.user_to_device(x + center, y + center) for x, y in layout.cell_offsets.tolist()]
+    ctx.save()
+    ctx.identity_matrix()
+    ctx.set_source_rgb(0, 0, 1)
+    ctx.select_font_face("sans-serif", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_BOLD)
+    ctx.set_font_size(font_size)
+    for (x, y), text in zip(positions, layout.symbol_texts()):
+        extents = ctx.text_extents(text)
+        ctx.move_to(x - extents.x_bearing - extents.width / 2, y - extents.y_bearing - extents.height / 2)
+        ctx.show_text(text)
+    ctx.restore()
+
+
+def _page_size(layout, cell_size):
+    x_min, x_max, y_min, y_max = layout.bounds()
+    scale = cell_size / CELL_SIZE
+    return (x_max - x_min) * scale, (y_max - y_min) * scale
+
+
+def _draw_page(surface, layout, palette, symbol_text, line_width, cell_size, background=False):
+    x_min, x_max, y_min, y_max = layout.bounds()
+    scale = cell_size / CELL_SIZE
     ctx = cairo.Context(surface)
+    if background:
+        ctx.set_source_rgb(1, 1, 1)
+        ctx.paint()
+    # Plot units to surface units, y axis pointing up like in the layout
+    ctx.scale(scale, -scale)
+    ctx.translate(-x_min, -y_max)
+
+    draw_layout(ctx, layout, palette, line_width)
+    if symbol_text:
+        draw_symbol_text(ctx, layout)
+
 
-    # Define the scaling factor to fit the grid into our canvas size
-    scale = 40  # Scale the grid size up to 40 pixels per unit
-    # Apply scaling to simplify coordinate calculations
-    ctx.scale(scale, scale)
-
-    # Define colors for each case (simple RGB tuples)
-    colors = [(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0), (0, 1, 1)]
-
-    case_1 = [
-        # Coordinates for each vertex
-        np.array([[0, 0], [0, 3], [1, 3], [1, 1]]),
-        np.array([[1, 1], [1, 3], [3, 3]]),
-        np.array([[0, 0], [1, 0], [1, 1]]),
-        np.array([[1, 0], [1, 1], [2, 2], [2, 0]]),
-        np.array([[2, 0], [2, 2], [3, 3], [3, 0]])
-    ]
-    case_2 = [
-        np.array([[0, 0], [0, 3], [1, 3], [1, 1]]),
-        np.array([[1, 1], [1, 3], [2, 3], [2, 2]]),
-        np.array([[2, 2], [2, 3], [3, 3]]),
-        np.array([[0, 0], [2, 2], [2, 0]]),
-        np.array([[2, 0], [2, 2], [3, 3], [3, 0]]),
-    ]
-    case_3 = [
-        np.array([[0, 3], [1, 3], [1, 2]]),
-        np.array([[1, 2], [1, 3], [2, 3], [2, 1]]),
-        np.array([[2, 1], [2, 3], [3, 3], [3, 0]]),
-        np.array([[0, 0], [0, 3], [1, 2], [1, 0]]),
-        np.array([[1, 0], [1, 2], [3, 0]]),
-    ]
-    case_4 = [
-        np.array([[0, 3], [2, 3], [2, 1]]),
-        np.array([[2, 1], [2, 3], [3, 3], [3, 0]]),
-        np.array([[0, 0], [0, 3], [1, 2], [1, 0]]),
-        np.array([[1, 0], [1, 2], [2, 1], [2, 0]]),
-        np.array([[2, 0], [2, 1], [3, 0]]),
-    ]
-    cases = [case_1, case_2, case_3, case_4]
-
-    # Draw each case at different positions
-    for i, case in enumerate(cases):
-        x_offset = 3 * (i % 2)  # Shift right every second case
-        y_offset = 3 * (i // 2)  # Shift down every two cases
-        for j, polygon in enumerate(case):
-            # Adjust each vertex by the offset using NumPy for array addition
-            adjusted_polygon = polygon + np.array([x_offset, y_offset])
-            draw_polygon(ctx, adjusted_polygon, colors[j % len(colors)])
+def write_layout(layout, file, fmt, palette, symbol_text=False, line_width=1, cell_size=36):
+    """
+    Render a laid-out sentence with Cairo.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param file: Path or binary file-like object.
+    :param fmt: One of FORMATS.
+    :param palette: '#RRGGBB' colours indexed like symbols.COLOR_SLOTS.
+    :param symbol_text: Label every square with its symbol.
+    :param line_width: Width of the outlines in surface units (points, or pixels for png).
+    :param cell_size: Size of one glyph square in surface units.
+    """
+    width, height = _page_size(layout, cell_size)
+    if fmt == 'png':
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, int(round(width)), int(round(height)))
+    elif fmt == 'pdf':
+        surface = cairo.PDFSurface(file, width, height)
+    elif fmt == 'svg':
+        surface = cairo.SVGSurface(file, width, height)
+    else:
+        raise ValueError(f"cairo backend cannot write {fmt}")
 
+    # Vector surfaces start transparent too, but only raster output would show it
+    _draw_page(surface, layout, palette, symbol_text, line_width, cell_size, background=fmt == 'png')
+    if fmt == 'png':
+        surface.write_to_png(file)
     surface.finish()
 
 
+def write_pages(layouts, file, fmt, palette, symbol_text=False, line_width=1, cell_size=36):
+    """
+    Write page layouts into one multi-page PDF, each page is emitted before the next is drawn.
+    :param layouts: Iterable of SentenceLayout with the same grid size, one per page.
+    :param file: Path or binary file-like object.
+    :param fmt: One of PAGED_FORMATS.
+    :return: Number of pages written.
+    """
+    if fmt not in PAGED_FORMATS:
+        raise ValueError(f"cairo backend cannot write multi-page {fmt}")
+    surface = None
+    num_pages = 0
+    for layout in layouts:
+        if surface is None:
+            surface = cairo.PDFSurface(file, *_page_size(layout, cell_size))
+        _draw_page(surface, layout, palette, symbol_text, line_width, cell_size)
+        surface.show_page()
+        num_pages += 1
+    if surface is not None:
+        surface.finish()
+    return num_pages
+
+
+def main():
+    # Draw one symbol of each case, two per row
+    layout = layout_sentence(['A', 'O', '.', ';'], row_num=2, col_num=2)
+    # Debugging colours so the colour slots are easy to tell apart
+    palette = ['#FF0000', '#00FF00', '#0000FF']
+    write_layout(layout, "polygons.svg", 'svg', palette, line_width=2, cell_size=120)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,2 @@
+# cairo_test.py is the Cairo rendering backend, not a test module
+collect_ignore = ['cairo_test.py']
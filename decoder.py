@@ -0,0 +1,476 @@
+"""
+Decoder: recover text from rendered output.
+
+A glyph is identified by its case and the colour slot of each of its polygons.
+SVG input is flattened to filled polygons which are bucketed into grid cells;
+the vertex pattern of each polygon names its shape and the set of shapes in a
+cell names the case. Raster input is sampled at the polygon centroids and edge
+midpoints of every case on a regular grid, for all cells at once. Either way
+every cell ends up as a (case, slots) signature that is looked up in an array
+indexed by signature, and glyph sequences are recomposed by inverting
+decomposition_dict.
+"""
+import re
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+
+from encoder import COMBINING_MARKS
+from glyphs import CASE_RANGES, CELL_SIZE, NUM_CASES, case_polygons
+from layout import GLYPH_TABLE
+from symbols import COLOR_SLOTS, SYMBOLS, resolve_palette
+
+# Drawn for cells that do not match any glyph
+UNKNOWN_CHAR = '�'
+
+# Raster pixels darker than this (sum of RGB) count as outline
+_OUTLINE_DARKNESS = 120
+
+_MAX_POLYGONS = int((CASE_RANGES[:, 1] - CASE_RANGES[:, 0]).max())
+_NUM_SIGNATURES = NUM_CASES * len(COLOR_SLOTS) ** _MAX_POLYGONS
+
+
+def _vertex_mask(points):
+    """
+    Bit mask of the cell lattice points (x * 4 + y) a polygon uses, which identifies its shape.
+    """
+    mask = 0
+    for x, y in points:
+        mask |= 1 << (int(x) * (CELL_SIZE + 1) + int(y))
+    return mask
+
+
+def _case_tables():
+    # Shape IDs by vertex mask, the position of every shape in every case and the shape set of every case
+    shape_ids = {}
+    positions = np.full((NUM_CASES, 0), -1, dtype=np.intp)
+    case_masks = np.zeros(NUM_CASES, dtype=np.int64)
+    for case in range(NUM_CASES):
+        for position, polygon in enumerate(case_polygons(case + 1)):
+            shape = shape_ids.setdefault(_vertex_mask(polygon.tolist()), len(shape_ids))
+            if shape >= positions.shape[1]:
+                positions = np.pad(positions, ((0, 0), (0, 1)), constant_values=-1)
+            positions[case, shape] = position
+            case_masks[case] |= 1 << shape
+    mask_shapes = np.full(1 << (CELL_SIZE + 1) ** 2, -1, dtype=np.intp)
+    mask_shapes[list(shape_ids)] = list(shape_ids.values())
+    return mask_shapes, positions, case_masks
+
+
+# Shape ID by vertex mask, position of a shape in a case (-1 if not used) and shape set per case
+MASK_SHAPES, SHAPE_POSITIONS, CASE_SHAPE_MASKS = _case_tables()
+
+
+def _case_probes():
+    # Per case: polygon centroids, and midpoints of the edges inside the cell, in cell units
+    centroids = np.zeros((NUM_CASES, _MAX_POLYGONS, 2))
+    edges = []
+    for case in range(NUM_CASES):
+        polygons = case_polygons(case + 1)
+        for position, polygon in enumerate(polygons):
+            centroids[case, position] = polygon.mean(axis=0)
+        midpoints = set()
+        for polygon in polygons:
+            for start, stop in zip(polygon.tolist(), np.roll(polygon, -1, axis=0).tolist()):
+                on_border = any(start[k] == stop[k] in (0, CELL_SIZE) for k in (0, 1))
+                if not on_border:
+                    midpoints.add(((start[0] + stop[0]) / 2, (start[1] + stop[1]) / 2))
+        edges.append(sorted(midpoints))
+    return centroids, edges
+
+
+CASE_CENTROIDS, CASE_EDGE_MIDPOINTS = _case_probes()
+
+
+def _parse_color(color):
+    """
+    Normalize an SVG colour to '#RRGGBB', or None for none or anything unsupported.
+    """
+    color = color.strip().lower()
+    if re.fullmatch(r'#[0-9a-f]{6}', color):
+        return color.upper()
+    if re.fullmatch(r'#[0-9a-f]{3}', color):
+        return '#' + ''.join(c * 2 for c in color[1:]).upper()
+    match = re.fullmatch(r'rgb\(([^)]*)\)', color)
+    if match:
+        channels = []
+        for channel in match.group(1).split(','):
+            channel = channel.strip()
+            value = float(channel[:-1]) * 2.55 if channel.endswith('%') else float(channel)
+            channels.append(int(round(value)))
+        return '#' + ''.join(f"{channel:02X}" for channel in channels)
+    return None
+
+
+def _parse_style(style):
+    return dict(item.split(':', 1) for item in (s.strip() for s in style.split(';')) if ':' in item)
+
+
+def _parse_transform(transform):
+    """
+    Parse an SVG transform attribute into a 3x3 matrix.
+    """
+    matrix = np.eye(3)
+    for name, args in re.findall(r'(\w+)\s*\(([^)]*)\)', transform):
+        values = [float(v) for v in re.split(r'[\s,]+', args.strip()) if v]
+        step = np.eye(3)
+        if name == 'matrix':
+            step[:2] = np.reshape(values, (3, 2)).T
+        elif name == 'translate':
+            step[:2, 2] = values[0], values[1] if len(values) > 1 else 0
+        elif name == 'scale':
+            step[0, 0], step[1, 1] = values[0], values[1] if len(values) > 1 else values[0]
+        else:
+            raise ValueError(f"unsupported SVG transform {name}")
+        matrix = matrix @ step
+    return matrix
+
+
+_PATH_TOKEN = re.compile(r'[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+def _parse_path(d):
+    """
+    Split path data of straight lines into polygons.
+    :return: List of (n, 2) arrays, or None if the path has curves.
+    """
+    polygons = []
+    points = []
+    x = y = 0.0
+    command = None
+    tokens = _PATH_TOKEN.findall(d)
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.isalpha():
+            command = token
+            i += 1
+            if command in 'Zz':
+                if points:
+                    polygons.append(points)
+                    x, y = points[0]
+                points = []
+                continue
+            if command not in 'MmLlHhVv':
+                return None
+        if command in 'Hh':
+            x = float(tokens[i]) + (x if command == 'h' else 0)
+            i += 1
+        elif command in 'Vv':
+            y = float(tokens[i]) + (y if command == 'v' else 0)
+            i += 1
+        else:
+            dx, dy = float(tokens[i]), float(tokens[i + 1])
+            x, y = (x + dx, y + dy) if command.islower() else (dx, dy)
+            i += 2
+            if command in 'Mm':
+                if len(points) > 2:
+                    polygons.append(points)
+                points = []
+                # Coordinates after a moveto are linetos
+                command = 'l' if command == 'm' else 'L'
+        points.append((x, y))
+    if len(points) > 2:
+        polygons.append(points)
+    return [np.array(polygon) for polygon in polygons if len(polygon) > 2]
+
+
+def _svg_tag(element):
+    return element.tag.rsplit('}', 1)[-1]
+
+
+class _SVGFlattener:
+    """
+    Collect the filled straight-edged polygons of an SVG document in document coordinates.
+    Handles the subset of SVG the rendering backends write: g, use, path, polygon,
+    transforms, fill from attributes, inline styles and simple class rules.
+    """
+
+    def __init__(self, root):
+        self.ids = {element.get('id'): element for element in root.iter() if element.get('id')}
+        self.class_fills = {}
+        for element in root.iter():
+            if _svg_tag(element) == 'style' and element.text:
+                for selector, body in re.findall(r'\.([\w-]+)\s*\{([^}]*)\}', element.text):
+                    fill = _parse_style(body).get('fill')
+                    if fill is not None:
+                        self.class_fills[selector] = fill
+        self.polygons = []
+        self.colors = []
+        # (href, inherited fill) -> (vertices, split indices, colours) of a use target
+        self.use_cache = {}
+        self.visit(root, np.eye(3), None)
+
+    def fill_of(self, element, inherited):
+        fill = inherited
+        for name in (element.get('class') or '').split():
+            fill = self.class_fills.get(name, fill)
+        fill = element.get('fill', fill)
+        return _parse_style(element.get('style', '')).get('fill', fill)
+
+    def visit(self, element, matrix, fill, depth=0):
+        tag = _svg_tag(element)
+        # defs content is only drawn through use; depth guards against use cycles
+        if tag in ('defs', 'style', 'metadata', 'clipPath', 'text') or depth > 32:
+            return
+        if element.get('transform'):
+            matrix = matrix @ _parse_transform(element.get('transform'))
+        fill = self.fill_of(element, fill)
+
+        if tag == 'use':
+            href = element.get('{http://www.w3.org/1999/xlink}href') or element.get('href') or ''
+            target = self.ids.get(href.lstrip('#'))
+            if target is None:
+                return
+            offset = np.eye(3)
+            offset[:2, 2] = float(element.get('x', 0)), float(element.get('y', 0))
+            matrix = matrix @ offset
+            # Flatten every referenced element once, then only transform its polygons
+            key = (href, fill)
+            if key not in self.use_cache:
+                polygons, colors = self.polygons, self.colors
+                self.polygons, self.colors = [], []
+                self.visit(target, np.eye(3), fill, depth + 1)
+                if self.polygons:
+                    counts = np.cumsum([len(polygon) for polygon in self.polygons])[:-1]
+                    self.use_cache[key] = np.concatenate(self.polygons), counts, self.colors
+                else:
+                    self.use_cache[key] = None
+                self.polygons, self.colors = polygons, colors
+            if self.use_cache[key] is not None:
+                vertices, counts, colors = self.use_cache[key]
+                self.polygons.extend(np.split(vertices @ matrix[:2, :2].T + matrix[:2, 2], counts))
+                self.colors.extend(colors)
+        elif tag in ('svg', 'g', 'symbol', 'a'):
+            for child in element:
+                self.visit(child, matrix, fill, depth + 1)
+        elif tag in ('path', 'polygon'):
+            color = _parse_color(fill) if fill is not None else None
+            if color is None:
+                return
+            if tag == 'path':
+                polygons = _parse_path(element.get('d', '')) or ()
+            else:
+                values = [float(v) for v in re.split(r'[\s,]+', element.get('points', '').strip()) if v]
+                polygons = [np.reshape(values, (-1, 2))]
+            for polygon in polygons:
+                self.polygons.append(polygon @ matrix[:2, :2].T + matrix[:2, 2])
+                self.colors.append(color)
+
+
+class GlyphDecoder:
+    """
+    Map rendered glyph cells back to glyph IDs of a GlyphTable.
+    Glyphs with the same case and colour slots (e.g. 'P' and '2') look identical;
+    such cells decode to the first of them in table order.
+    """
+
+    def __init__(self, table=GLYPH_TABLE, palette=None, decompositions=SYMBOLS.decompositions):
+        """
+        :param table: GlyphTable the IDs refer to.
+        :param palette: Colours the output was rendered with, indexed like COLOR_SLOTS;
+            defaults to the current symbols.resolve_palette().
+        :param decompositions: Character to component symbols, inverted to recompose text.
+        """
+        self.table = table
+        self.palette = [color.upper() for color in (palette or resolve_palette())]
+        self._palette_rgb = np.array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in self.palette])
+
+        # Glyph ID per signature, see _signature
+        self.signature_glyphs = np.full(_NUM_SIGNATURES, -1, dtype=np.intp)
+        for glyph_id in reversed(range(len(table.keys))):
+            case = int(table.cases[glyph_id])
+            num_polygons = CASE_RANGES[case, 1] - CASE_RANGES[case, 0]
+            slots = table.polygon_slots[glyph_id, :num_polygons][None, :]
+            self.signature_glyphs[self._signature(np.array([case]), slots)] = glyph_id
+
+        # Component tuple -> character; upper case comes first in decomposition_dict and wins
+        self.compositions = {}
+        for char, components in decompositions.items():
+            self.compositions.setdefault(tuple(components), char)
+        self._max_components = max(map(len, self.compositions), default=1)
+        # Symbol keys that are names of combining marks rather than the character itself
+        self._marks = {key: mark for mark, key in COMBINING_MARKS.items() if len(key) != 1}
+
+    @staticmethod
+    def _signature(cases, slots):
+        """
+        Signature index of (case, colour slots) rows; slots past a case's polygons must be 0.
+        """
+        weights = len(COLOR_SLOTS) ** np.arange(slots.shape[1])
+        return cases * len(COLOR_SLOTS) ** _MAX_POLYGONS + slots @ weights
+
+    def decode_polygons(self, polygons, colors):
+        """
+        Decode filled polygons in document coordinates (y pointing down), e.g. from an SVG.
+        Polygons whose colour is not in the palette, or that are larger than a cell, are ignored.
+        :param polygons: Sequence of (n, 2) vertex arrays.
+        :param colors: '#RRGGBB' fill of every polygon.
+        :return: 1-D array of glyph IDs in reading order, -1 for cells that match no glyph.
+        """
+        slot_of = {color: slot for slot, color in reversed(list(enumerate(self.palette)))}
+        keep = [i for i, color in enumerate(colors) if color in slot_of]
+        if not keep:
+            return np.empty(0, dtype=np.intp)
+        slots = np.array([slot_of[colors[i]] for i in keep])
+        counts = np.array([len(polygons[i]) for i in keep])
+        vertices = np.concatenate([polygons[i] for i in keep])
+        starts = np.cumsum(counts) - counts
+        mins = np.minimum.reduceat(vertices, starts)
+        maxs = np.maximum.reduceat(vertices, starts)
+
+        # The thinnest polygons are one lattice unit (a third of a cell) wide
+        extents = maxs - mins
+        unit = extents[extents > 1e-9].min()
+        cell = unit * CELL_SIZE
+        # Background rectangles and the like
+        inside = (extents <= cell * (1 + 1e-3)).all(axis=1)
+        if not inside.any():
+            return np.empty(0, dtype=np.intp)
+        vertices = vertices[np.repeat(inside, counts)]
+        slots, counts, mins, maxs = slots[inside], counts[inside], mins[inside], maxs[inside]
+        starts = np.cumsum(counts) - counts
+        origin = mins.min(axis=0)
+
+        # Bucket by the cell holding the polygon's bounding box center
+        cols, rows = ((((mins + maxs) / 2) - origin) // cell).astype(np.intp).T
+        col_num = cols.max() + 1
+        cells = rows * col_num + cols
+
+        # Lattice points of every vertex relative to its cell, y flipped to point up like the glyphs
+        polygon_of_vertex = np.repeat(np.arange(len(counts)), counts)
+        local = (vertices - origin) / unit - np.column_stack((cols, rows))[polygon_of_vertex] * CELL_SIZE
+        lattice = np.rint(local).astype(np.intp)
+        lattice[:, 1] = CELL_SIZE - lattice[:, 1]
+        on_lattice = (np.abs(local - np.rint(local)) < 0.05).all(axis=1) & \
+            ((lattice >= 0) & (lattice <= CELL_SIZE)).all(axis=1)
+        bits = np.left_shift(1, np.clip(lattice[:, 0] * (CELL_SIZE + 1) + lattice[:, 1], 0, 15))
+        masks = np.bitwise_or.reduceat(bits, starts)
+        shapes = MASK_SHAPES[masks]
+        shapes[~np.logical_and.reduceat(on_lattice, starts)] = -1
+
+        # Case of every cell from the set of shapes in it
+        num_cells = cells.max() + 1
+        cell_masks = np.zeros(num_cells, dtype=np.int64)
+        np.bitwise_or.at(cell_masks, cells, np.where(shapes >= 0, np.left_shift(1, np.maximum(shapes, 0)), 0))
+        matches = cell_masks[:, None] == CASE_SHAPE_MASKS[None, :]
+        cases = matches.argmax(axis=1)
+        valid = matches.any(axis=1)
+        np.logical_and.at(valid, cells, shapes >= 0)
+
+        # Colour slots in case polygon order
+        positions = SHAPE_POSITIONS[cases[cells], np.maximum(shapes, 0)]
+        valid[cells[positions < 0]] = False
+        cell_slots = np.zeros((num_cells, _MAX_POLYGONS), dtype=np.intp)
+        cell_slots[cells, np.maximum(positions, 0)] = slots
+        glyph_ids = self.signature_glyphs[self._signature(cases, cell_slots)]
+        glyph_ids[~valid] = -1
+        return glyph_ids
+
+    def read_svg(self, file):
+        """
+        Decode an SVG written by any of the rendering backends.
+        :param file: Path or file-like object.
+        :return: 1-D array of glyph IDs, see decode_polygons.
+        """
+        flattener = _SVGFlattener(ElementTree.parse(file).getroot())
+        return self.decode_polygons(flattener.polygons, flattener.colors)
+
+    def read_image(self, image, col_num, row_num=None):
+        """
+        Decode a raster image that shows exactly the glyph grid, like the png backends write.
+        :param image: (height, width, 3 or 4) array with 0..255 or 0..1 values, or a PNG path/file.
+        :param col_num: Number of columns in the grid.
+        :param row_num: Number of rows, derived from the image size when None.
+        :return: 1-D array of glyph IDs, -1 for cells that match no glyph; trailing empty cells are dropped.
+        """
+        if not isinstance(image, np.ndarray):
+            from matplotlib.image import imread
+            image = imread(image)
+        if image.dtype.kind == 'f':
+            image = np.rint(image * 255)
+        rgb = image[..., :3].astype(np.intp)
+        height, width = rgb.shape[:2]
+        cell_px = width / col_num
+        row_num = row_num or int(round(height / cell_px))
+
+        rows, cols = np.divmod(np.arange(row_num * col_num), col_num)
+
+        def pixels(points):
+            # Pixel coordinates of cell-unit points in every cell, as (cells, points) index arrays
+            x = (cols[:, None] + points[None, :, 0] / CELL_SIZE) * cell_px
+            y = (rows[:, None] + 1 - points[None, :, 1] / CELL_SIZE) * cell_px
+            return (np.clip(y.astype(np.intp), 0, height - 1), np.clip(x.astype(np.intp), 0, width - 1))
+
+        # The case whose inner edges are drawn as outlines; the darkest pixel around each midpoint
+        # is used so that thin antialiased lines are not missed
+        darkness = rgb.sum(axis=2)
+        scores = np.empty((len(rows), NUM_CASES))
+        for case, midpoints in enumerate(CASE_EDGE_MIDPOINTS):
+            y, x = pixels(np.array(midpoints))
+            darkest = np.full(y.shape, 3 * 255)
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    darkest = np.minimum(darkest, darkness[np.clip(y + dy, 0, height - 1),
+                                                           np.clip(x + dx, 0, width - 1)])
+            outline = darkest < _OUTLINE_DARKNESS
+            scores[:, case] = (outline.sum(axis=1) - (~outline).sum(axis=1)) / len(midpoints)
+        cases = scores.argmax(axis=1)
+        valid = scores.max(axis=1) > 0
+
+        # Colour slot at every polygon centroid of the chosen case
+        y, x = pixels(CASE_CENTROIDS.reshape(-1, 2))
+        colors = rgb[y, x].reshape(len(rows), NUM_CASES, _MAX_POLYGONS, 3)[np.arange(len(rows)), cases]
+        distances = ((colors[:, :, None, :] - self._palette_rgb[None, None]) ** 2).sum(axis=3)
+        cell_slots = distances.argmin(axis=2)
+        num_polygons = (CASE_RANGES[:, 1] - CASE_RANGES[:, 0])[cases]
+        cell_slots[np.arange(_MAX_POLYGONS)[None, :] >= num_polygons[:, None]] = 0
+
+        glyph_ids = self.signature_glyphs[self._signature(cases, cell_slots)]
+        glyph_ids[~valid] = -1
+        last = np.flatnonzero(valid)
+        return glyph_ids[:last[-1] + 1] if len(last) else glyph_ids[:0]
+
+    def text(self, glyph_ids):
+        """
+        Recompose decoded glyph IDs into text.
+        Components are merged greedily into the longest matching decomposition, so 'A', '^',
+        'acute' reads as 'Ấ'. Spaces are not encoded and cannot be recovered.
+        """
+        keys = [self.table.keys[glyph_id] if glyph_id >= 0 else None for glyph_id in glyph_ids.tolist()]
+        chars = []
+        i = 0
+        while i < len(keys):
+            for length in range(min(self._max_components, len(keys) - i), 1, -1):
+                char = self.compositions.get(tuple(keys[i:i + length]))
+                if char is not None:
+                    chars.append(char)
+                    i += length
+                    break
+            else:
+                key = keys[i]
+                chars.append(UNKNOWN_CHAR if key is None else self._marks.get(key, key))
+                i += 1
+        return ''.join(chars)
+
+
+def decode_svg(file, palette=None):
+    """
+    Read the text back from an SVG.
+    :param file: Path or file-like object.
+    :param palette: Colours it was rendered with, defaults to the current colour choices.
+    """
+    decoder = GlyphDecoder(palette=palette)
+    return decoder.text(decoder.read_svg(file))
+
+
+def decode_image(image, col_num, palette=None, row_num=None):
+    """
+    Read the text back from a raster image of the glyph grid.
+    :param image: Array or PNG path/file, see GlyphDecoder.read_image.
+    :param col_num: Number of columns in the grid.
+    :param palette: Colours it was rendered with, defaults to the current colour choices.
+    :param row_num: Number of rows, derived from the image size when None.
+    """
+    decoder = GlyphDecoder(palette=palette)
+    return decoder.text(decoder.read_image(image, col_num, row_num))
@@ -0,0 +1,195 @@
+"""
+Compiled text encoder: Unicode input to a flat array of glyph IDs.
+
+The per-character work of plot_sentence (upper(), isspace(), decomposition_dict,
+symbols_dict lookup) is done once per distinct character and stored in lookup
+arrays indexed by code point. Encoding a text is then a normalization, one
+conversion to a code point array and a vectorized gather, all of which run in C.
+"""
+import threading
+import unicodedata
+
+import numpy as np
+
+from layout import GLYPH_TABLE, glyph_table
+from symbols import SYMBOLS
+
+# Combining marks left over after NFC normalization, mapped to the symbols that draw them
+COMBINING_MARKS = {
+    '\u0300': '`',  # grave
+    '\u0301': 'acute',
+    '\u0302': '^',  # circumflex
+    '\u0303': '~',  # tilde
+    '\u0306': '˅',  # breve (moon)
+    '\u0309': 'ʔ',  # hook above
+    '\u031B': '◌̛',  # horn
+    '\u0323': '•',  # dot below
+}
+
+# Policies for characters that have no symbol
+UNKNOWN_POLICIES = ('skip', 'replace', 'raise')
+
+_NUM_CODE_POINTS = 0x110000
+
+# Code points covered by the lookup arrays of a new encoder; they grow in powers of two on demand
+_INITIAL_CODE_POINTS = 0x100
+
+
+class UnknownSymbolError(KeyError):
+    """
+    Raised when the input contains a character without a symbol.
+    Subclasses KeyError, which is what the symbols_dict lookup used to raise.
+    """
+
+    def __init__(self, char, position):
+        super(UnknownSymbolError, self).__init__(char)
+        self.char = char
+        self.position = position
+
+    def __str__(self):
+        return f"no symbol for {self.char!r} at position {self.position}"
+
+
+class SentenceEncoder:
+    """
+    Encode text into glyph IDs of a GlyphTable.
+    Characters are compiled the first time they show up; after that a character
+    costs a few array lookups no matter how it decomposes.
+    """
+
+    def __init__(self, table=GLYPH_TABLE, decompositions=SYMBOLS.decompositions, unknown='raise',
+                 replacement='?', normalization='NFC'):
+        """
+        :param table: GlyphTable the IDs refer to.
+        :param decompositions: Character to component symbols, see SymbolRegistry.decompositions.
+        :param unknown: What to do with characters without a symbol: 'skip', 'replace' or 'raise'.
+        :param replacement: Symbol drawn instead of unknown characters with unknown='replace'.
+        :param normalization: Unicode normal form applied first, NFC turns combining-mark
+            input into the precomposed characters decompositions knows about.
+        """
+        if unknown not in UNKNOWN_POLICIES:
+            raise ValueError(f"unknown must be one of {UNKNOWN_POLICIES}, not {unknown!r}")
+        if unknown == 'replace' and replacement not in table.index:
+            raise ValueError(f"replacement {replacement!r} is not a symbol of the alphabet")
+        self.table = table
+        self.decompositions = decompositions
+        self.unknown = unknown
+        self.normalization = normalization
+        self.dtype = np.uint8 if len(table.keys) <= 256 else np.uint16
+        self._replacement = table.index[replacement] if unknown == 'replace' else None
+
+        # Per code point: compiled yet, has an unknown component, number of glyphs, the glyphs.
+        # Only Latin-1 at first, most texts never need the full Unicode range
+        self._compiled = np.zeros(_INITIAL_CODE_POINTS, dtype=bool)
+        self._unknown = np.zeros(_INITIAL_CODE_POINTS, dtype=bool)
+        self._counts = np.zeros(_INITIAL_CODE_POINTS, dtype=np.uint8)
+        self._glyphs = np.zeros((_INITIAL_CODE_POINTS, 1), dtype=self.dtype)
+        # Encoders are shared between the GUI thread and render workers; compiling replaces and
+        # writes these arrays, so it happens under this lock. Lookups need none: arrays only ever
+        # grow, and a code point is marked compiled after its row is written.
+        self._lock = threading.Lock()
+
+    def _compile_char(self, char):
+        """
+        Glyph IDs of one input character.
+        :return: (list of glyph IDs, whether a component has no symbol)
+        """
+        index = self.table.index
+        glyph_ids = []
+        unknown = False
+        for symbol in char.upper():
+            if symbol.isspace():  # Skip spaces
+                continue
+            # Default to just the character itself if not decomposed
+            components = self.decompositions.get(symbol, (COMBINING_MARKS.get(symbol, symbol),))
+            for component in components:
+                glyph_id = index.get(component)
+                if glyph_id is None:
+                    unknown = True
+                    glyph_id = self._replacement
+                if glyph_id is not None:
+                    glyph_ids.append(glyph_id)
+        return glyph_ids, unknown
+
+    def _grow(self, size):
+        """
+        Extend the lookup arrays to cover code points below size, rounded up to a power of two.
+        """
+        size = min(1 << (size - 1).bit_length(), _NUM_CODE_POINTS)
+        extra = size - len(self._compiled)
+        self._glyphs = np.pad(self._glyphs, ((0, extra), (0, 0)))
+        self._counts = np.pad(self._counts, (0, extra))
+        self._unknown = np.pad(self._unknown, (0, extra))
+        self._compiled = np.pad(self._compiled, (0, extra))
+
+    def _compile(self, code_points):
+        for code_point in code_points.tolist():
+            glyph_ids, unknown = self._compile_char(chr(code_point))
+            width = self._glyphs.shape[1]
+            if len(glyph_ids) > width:
+                # Rare: a character that expands to more glyphs than any before it
+                self._glyphs = np.pad(self._glyphs, ((0, 0), (0, len(glyph_ids) - width)))
+            self._glyphs[code_point, :len(glyph_ids)] = glyph_ids
+            self._counts[code_point] = len(glyph_ids)
+            self._unknown[code_point] = unknown
+            self._compiled[code_point] = True
+
+    def encode(self, text):
+        """
+        Encode text into glyph IDs.
+        :param text: Any Unicode text.
+        :return: 1-D uint8 (or uint16 for big alphabets) array of glyph IDs.
+        :raises UnknownSymbolError: With unknown='raise', for the first character without a
+            symbol; its position is counted in the normalized text.
+        """
+        if self.normalization:
+            text = unicodedata.normalize(self.normalization, text)
+        code_points = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        top = int(code_points.max()) if len(code_points) else 0
+        if top >= len(self._compiled) or not self._compiled[code_points].all():
+            with self._lock:
+                # Another thread may have compiled some of them in the meantime
+                if top >= len(self._compiled):
+                    self._grow(top + 1)
+                new = code_points[~self._compiled[code_points]]
+                if len(new):
+                    self._compile(np.unique(new))
+
+        if self.unknown == 'raise':
+            unknown = self._unknown[code_points]
+            if unknown.any():
+                position = int(np.argmax(unknown))
+                raise UnknownSymbolError(text[position], position)
+
+        counts = self._counts[code_points]
+        glyphs = self._glyphs
+        if glyphs.shape[1] == 1:
+            return glyphs[code_points[counts == 1], 0]
+        glyphs = glyphs[code_points]
+        return glyphs[np.arange(glyphs.shape[1]) < counts[:, None]]
+
+    def keys(self, glyph_ids):
+        """
+        Symbol keys of encoded glyph IDs, the same list decompose_sentence returns.
+        """
+        keys = self.table.keys
+        return [keys[glyph_id] for glyph_id in glyph_ids.tolist()]
+
+
+# Shared encoders per alphabet and unknown-character policy, compiled lazily as characters show up
+_ENCODERS = {}
+
+
+def encode_sentence(text, unknown='raise', registry=SYMBOLS):
+    """
+    Encode text with an alphabet, the built-in one by default.
+    :param text: Any Unicode text.
+    :param unknown: 'skip', 'replace' or 'raise', see SentenceEncoder.
+    :param registry: SymbolRegistry to encode with.
+    :return: 1-D array of glyph IDs into layout.glyph_table(registry).
+    """
+    encoder = _ENCODERS.get((registry, unknown))
+    if encoder is None:
+        encoder = _ENCODERS[registry, unknown] = SentenceEncoder(glyph_table(registry), registry.decompositions,
+                                                                 unknown=unknown)
+    return encoder.encode(text)
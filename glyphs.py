@@ -0,0 +1,145 @@
+import numpy as np
+
+# Size of one glyph cell in plot units; every case is drawn inside a 3x3 square
+CELL_SIZE = 3
+
+# Define polygons with explicit vertices, one list per case
+CASE_POLYGONS = (
+    # case_1
+    (
+        ((0, 0), (0, 3), (1, 3), (1, 1)),
+        ((1, 1), (1, 3), (3, 3)),
+        ((0, 0), (1, 0), (1, 1)),
+        ((1, 0), (1, 1), (2, 2), (2, 0)),
+        ((2, 0), (2, 2), (3, 3), (3, 0)),
+    ),
+    # case_2
+    (
+        ((0, 0), (0, 3), (1, 3), (1, 1)),
+        ((1, 1), (1, 3), (2, 3), (2, 2)),
+        ((2, 2), (2, 3), (3, 3)),
+        ((0, 0), (2, 2), (2, 0)),
+        ((2, 0), (2, 2), (3, 3), (3, 0)),
+    ),
+    # case_3
+    (
+        ((0, 3), (1, 3), (1, 2)),
+        ((1, 2), (1, 3), (2, 3), (2, 1)),
+        ((2, 1), (2, 3), (3, 3), (3, 0)),
+        ((0, 0), (0, 3), (1, 2), (1, 0)),
+        ((1, 0), (1, 2), (3, 0)),
+    ),
+    # case_4
+    (
+        ((0, 3), (2, 3), (2, 1)),
+        ((2, 1), (2, 3), (3, 3), (3, 0)),
+        ((0, 0), (0, 3), (1, 2), (1, 0)),
+        ((1, 0), (1, 2), (2, 1), (2, 0)),
+        ((2, 0), (2, 1), (3, 0)),
+    ),
+)
+
+NUM_CASES = len(CASE_POLYGONS)
+
+
+def _pack_cases(case_polygons):
+    """
+    Pack the case polygons into one flat vertex buffer.
+    :param case_polygons: Nested sequence case -> polygon -> (x, y) vertices.
+    :return: (vertices, polygon_offsets, case_ranges) where vertices is an (N, 2) array,
+        polygon i spans vertices[polygon_offsets[i]:polygon_offsets[i + 1]] and case c
+        owns polygons case_ranges[c, 0] up to (but excluding) case_ranges[c, 1].
+    """
+    vertices = []
+    polygon_offsets = [0]
+    case_ranges = []
+    for case in case_polygons:
+        first_polygon = len(polygon_offsets) - 1
+        for polygon in case:
+            vertices.extend(polygon)
+            polygon_offsets.append(len(vertices))
+        case_ranges.append((first_polygon, len(polygon_offsets) - 1))
+
+    vertices = np.array(vertices, dtype=np.float64)
+    polygon_offsets = np.array(polygon_offsets, dtype=np.intp)
+    case_ranges = np.array(case_ranges, dtype=np.intp)
+    # The tables are shared by every renderer, make sure nobody edits them in place
+    for array in (vertices, polygon_offsets, case_ranges):
+        array.setflags(write=False)
+    return vertices, polygon_offsets, case_ranges
+
+
+VERTICES, POLYGON_OFFSETS, CASE_RANGES = _pack_cases(CASE_POLYGONS)
+
+# Read-only views of every polygon, indexed by global polygon number
+_POLYGON_VIEWS = tuple(VERTICES[start:stop]
+                       for start, stop in zip(POLYGON_OFFSETS[:-1], POLYGON_OFFSETS[1:]))
+
+
+def case_polygons(case):
+    """
+    Get the polygons of a case as read-only vertex arrays.
+    :param case: Case number, 1-based like SquareSymbol.case.
+    :return: Tuple of (n, 2) arrays, one per polygon.
+    """
+    first, last = CASE_RANGES[case - 1]
+    return _POLYGON_VIEWS[first:last]
+
+
+def unique_segments(vertices, polygon_offsets):
+    """
+    Every polygon edge exactly once, so shared outlines are stroked a single time.
+    Vertices are snapped to the integer lattice the glyphs are drawn on and every edge is cut
+    into unit lattice steps, so edges that are only partly shared (a long diagonal meeting two
+    short ones) match as well. The steps are deduplicated through one packed integer key each,
+    then collinear runs are joined back into single segments.
+    :param vertices: (N, 2) vertex buffer, packed like VERTICES.
+    :param polygon_offsets: Polygon i spans vertices[polygon_offsets[i]:polygon_offsets[i + 1]].
+    :return: (n, 2, 2) array of segment end points.
+    """
+    points = np.rint(vertices).astype(np.int64)
+    # Each vertex connects to the next one of its polygon, the last one back to the first
+    next_index = np.arange(1, len(points) + 1)
+    next_index[polygon_offsets[1:] - 1] = polygon_offsets[:-1]
+    delta = points[next_index] - points
+    steps = np.gcd(delta[:, 0], delta[:, 1])
+    edges = steps > 0
+    starts, steps = points[edges], steps[edges]
+    units = delta[edges] // steps[:, None]
+    if not len(steps):
+        return np.empty((0, 2, 2))
+
+    # Cut every edge into its unit steps
+    edge_index = np.repeat(np.arange(len(steps)), steps)
+    step_index = np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)
+    units = units[edge_index]
+    starts = starts[edge_index] + step_index[:, None] * units
+    # Point every step the same way (rightwards, or up when vertical)
+    flip = ((units[:, 0] < 0) | ((units[:, 0] == 0) & (units[:, 1] < 0)))[:, None]
+    starts += units * flip
+    units *= 1 - 2 * flip
+
+    # One key per step: direction, then the line it lies on, then its position along that line.
+    # Sorting the keys puts equal steps next to each other and collinear ones in order.
+    uy = units[:, 1] - units[:, 1].min()
+    _, direction_ids = np.unique(units[:, 0] * (int(uy.max()) + 1) + uy, return_inverse=True)
+    line = units[:, 0] * starts[:, 1] - units[:, 1] * starts[:, 0]
+    line -= line.min()
+    position = (starts * units).sum(axis=1)
+    position -= position.min()
+    span = int(position.max()) + 1
+    keys = (direction_ids.reshape(-1) * (int(line.max()) + 1) + line) * span + position
+    order = np.argsort(keys)
+    keys = keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    order, keys = order[first], keys[first]
+    starts, units = starts[order], units[order]
+
+    # A step continues the previous run when it is on the same line and starts where that one ends
+    joined = np.zeros(len(keys), dtype=bool)
+    joined[1:] = (keys[1:] // span == keys[:-1] // span) & (keys[1:] - keys[:-1] == (units[:-1] ** 2).sum(axis=1))
+    run_starts = np.flatnonzero(~joined)
+    run_steps = np.diff(np.append(run_starts, len(keys)))
+    ends = starts[run_starts] + run_steps[:, None] * units[run_starts]
+    return np.stack((starts[run_starts], ends), axis=1).astype(np.float64)
@@ -0,0 +1,229 @@
+import weakref
+
+import numpy as np
+
+from glyphs import CASE_RANGES, CELL_SIZE, POLYGON_OFFSETS, VERTICES, unique_segments
+from symbols import COLOR_SLOTS, SYMBOLS
+
+
+def decompose_sentence(sentence, decompositions=SYMBOLS.decompositions):
+    """
+    Turn a sentence into the list of symbol keys that get drawn, one per grid cell.
+    :param sentence: The sentence to render.
+    :param decompositions: Character to component keys, see SymbolRegistry.decompositions.
+    :return: List of keys into the alphabet.
+    """
+    processed_lst = []
+    for symbol in sentence.upper():
+        if symbol.isspace():  # Skip spaces
+            continue
+        # Default to just the character itself if not decomposed
+        processed_lst.extend(decompositions.get(symbol, (symbol,)))
+    return processed_lst
+
+
+class GlyphTable:
+    """
+    Flat, array based view of an alphabet (a SymbolRegistry or any key to SquareSymbol
+    mapping) used by the layout engine.
+    Every symbol gets an integer glyph ID; its case and the colour slot of each
+    of its polygons are stored in parallel arrays indexed by that ID.
+    """
+
+    def __init__(self, symbols):
+        self.keys = list(symbols)
+        self.symbols = [symbols[key] for key in self.keys]
+        self.index = {key: glyph_id for glyph_id, key in enumerate(self.keys)}
+
+        # 0-based case per glyph
+        self.cases = np.array([symbol.get_case() - 1 for symbol in self.symbols], dtype=np.intp)
+
+        # Colour slot per polygon, colours are applied cyclically like generate_alphabet_square
+        polygon_counts = CASE_RANGES[:, 1] - CASE_RANGES[:, 0]
+        self.polygon_slots = np.zeros((len(self.symbols), polygon_counts.max()), dtype=np.uint8)
+        for glyph_id, symbol in enumerate(self.symbols):
+            slots = [COLOR_SLOTS.index(key) for key in symbol.color_keys_lst]
+            for i in range(polygon_counts[self.cases[glyph_id]]):
+                self.polygon_slots[glyph_id, i] = slots[i % len(slots)]
+
+    def glyph_ids(self, processed_lst):
+        """
+        Map symbol keys to glyph IDs.
+        :param processed_lst: Symbol keys as returned by decompose_sentence.
+        :return: 1-D array of glyph IDs.
+        """
+        index = self.index
+        return np.fromiter((index[key] for key in processed_lst), dtype=np.intp, count=len(processed_lst))
+
+
+# Tables of every alphabet used so far, the arrays are built once per registry
+_GLYPH_TABLES = weakref.WeakKeyDictionary()
+
+
+def glyph_table(registry=SYMBOLS):
+    """
+    The GlyphTable of an alphabet, shared by everything that lays out or encodes with it.
+    :param registry: SymbolRegistry, the built-in alphabet by default.
+    :return: GlyphTable.
+    """
+    table = _GLYPH_TABLES.get(registry)
+    if table is None:
+        table = _GLYPH_TABLES[registry] = GlyphTable(registry)
+    return table
+
+
+# Table for the built-in alphabet
+GLYPH_TABLE = glyph_table(SYMBOLS)
+
+
+class SentenceLayout:
+    """
+    Every polygon of a laid-out sentence, packed the same way as glyphs.VERTICES.
+    Polygon i spans vertices[polygon_offsets[i]:polygon_offsets[i + 1]], belongs to
+    glyph polygon_glyphs[i] and is filled with colour slot color_slots[i].
+    """
+
+    def __init__(self, vertices, polygon_offsets, color_slots, polygon_glyphs, glyph_ids,
+                 cell_offsets, row_num, col_num, table):
+        self.vertices = vertices
+        self.polygon_offsets = polygon_offsets
+        self.color_slots = color_slots
+        self.polygon_glyphs = polygon_glyphs
+        self.glyph_ids = glyph_ids
+        self.cell_offsets = cell_offsets
+        self.row_num = row_num
+        self.col_num = col_num
+        self.table = table
+
+    def __len__(self):
+        return len(self.glyph_ids)
+
+    def bounds(self):
+        """
+        Extent of the row_num x col_num grid in plot units.
+        :return: (x_min, x_max, y_min, y_max).
+        """
+        return grid_bounds(self.row_num, self.col_num)
+
+    def polygons(self):
+        """
+        Split the vertex buffer into one (n, 2) view per polygon.
+        """
+        return np.split(self.vertices, self.polygon_offsets[1:-1])
+
+    def polygon_array(self):
+        """
+        Stack every polygon into one (n_polygons, max_vertices, 2) array.
+        Shorter polygons repeat their last vertex, which draws the same shape but lets
+        collection renderers take their vectorized path instead of building each one.
+        """
+        counts = np.diff(self.polygon_offsets)
+        width = counts.max() if len(counts) else 0
+        index = self.polygon_offsets[:-1, None] + np.minimum(np.arange(width), counts[:, None] - 1)
+        return self.vertices[index]
+
+    def outline_segments(self):
+        """
+        Every outline segment of the grid once: edges shared by neighbouring polygons or
+        neighbouring cells are not repeated, and collinear edges are joined.
+        :return: (n, 2, 2) array of segment end points, see glyphs.unique_segments.
+        """
+        return unique_segments(self.vertices, self.polygon_offsets)
+
+    def face_colors(self, palette):
+        """
+        Resolve the colour slot of every polygon.
+        :param palette: Colours indexed like COLOR_SLOTS, e.g. symbols.resolve_palette().
+        :return: Array with one colour per polygon.
+        """
+        return np.asarray(palette)[self.color_slots]
+
+    def symbol_texts(self):
+        """
+        Label text for every glyph cell.
+        """
+        symbols = self.table.symbols
+        return [symbols[glyph_id].symbol_txt for glyph_id in self.glyph_ids]
+
+
+def grid_bounds(row_num, col_num):
+    """
+    Extent of a row_num x col_num grid in plot units, row 0 on top at y = 0..3.
+    :return: (x_min, x_max, y_min, y_max).
+    """
+    return 0, col_num * CELL_SIZE, (1 - row_num) * CELL_SIZE, CELL_SIZE
+
+
+def layout_glyphs(glyph_ids, row_num=6, col_num=6, table=GLYPH_TABLE):
+    """
+    Lay out glyphs on the grid in one vectorized pass.
+    Glyphs are placed left to right, top to bottom, each in a CELL_SIZE square;
+    row 0 sits at y=0 and later rows go down, like plot_sentence has always done.
+    :param glyph_ids: Glyph IDs from table.glyph_ids.
+    :param row_num: Number of rows in the grid, more when the text does not fit.
+    :param col_num: Number of columns in the grid.
+    :param table: GlyphTable the IDs refer to.
+    :return: SentenceLayout.
+    """
+    glyph_ids = np.asarray(glyph_ids, dtype=np.intp)
+    num_glyphs = len(glyph_ids)
+    # Every backend sizes its output from row_num, so overflowing text must not be cut off
+    row_num = max(row_num, -(-num_glyphs // col_num))
+
+    # Grid position of every glyph
+    rows, cols = np.divmod(np.arange(num_glyphs), col_num)
+    cell_offsets = np.column_stack((cols * CELL_SIZE, -rows * CELL_SIZE)).astype(np.float64)
+
+    # Expand glyphs to their polygons
+    cases = table.cases[glyph_ids]
+    first_polygons = CASE_RANGES[cases, 0]
+    polygon_counts = CASE_RANGES[cases, 1] - first_polygons
+    polygon_glyphs = np.repeat(np.arange(num_glyphs), polygon_counts)
+    glyph_starts = np.cumsum(polygon_counts) - polygon_counts
+    local_polygons = np.arange(len(polygon_glyphs)) - glyph_starts[polygon_glyphs]
+    source_polygons = first_polygons[polygon_glyphs] + local_polygons
+
+    # Expand polygons to their vertices
+    vertex_counts = POLYGON_OFFSETS[source_polygons + 1] - POLYGON_OFFSETS[source_polygons]
+    polygon_offsets = np.zeros(len(source_polygons) + 1, dtype=np.intp)
+    np.cumsum(vertex_counts, out=polygon_offsets[1:])
+    vertex_polygons = np.repeat(np.arange(len(source_polygons)), vertex_counts)
+    local_vertices = np.arange(polygon_offsets[-1]) - polygon_offsets[vertex_polygons]
+    source_vertices = POLYGON_OFFSETS[source_polygons][vertex_polygons] + local_vertices
+
+    vertices = VERTICES[source_vertices] + cell_offsets[polygon_glyphs[vertex_polygons]]
+    color_slots = table.polygon_slots[glyph_ids[polygon_glyphs], local_polygons]
+
+    return SentenceLayout(vertices, polygon_offsets, color_slots, polygon_glyphs, glyph_ids,
+                          cell_offsets, row_num, col_num, table)
+
+
+def layout_sentence(processed_lst, row_num=6, col_num=6, table=GLYPH_TABLE):
+    """
+    Lay out a processed symbol list on the grid.
+    :param processed_lst: Symbol keys as returned by decompose_sentence.
+    :param row_num: Number of rows in the grid, more when the text does not fit.
+    :param col_num: Number of columns in the grid.
+    :param table: GlyphTable to look the symbols up in.
+    :return: SentenceLayout.
+    """
+    return layout_glyphs(table.glyph_ids(processed_lst), row_num, col_num, table)
+
+
+def diff_glyphs(old_ids, new_ids):
+    """
+    Find the grid cells that differ between two glyph-ID sequences.
+    Cells past the end of the shorter sequence count as changed, so an insertion or
+    deletion dirties the shifted tail while everything before it stays untouched.
+    :return: (first, stop) range of cells covering every change, or None if they are equal.
+    """
+    old_ids = np.asarray(old_ids)
+    new_ids = np.asarray(new_ids)
+    common = min(len(old_ids), len(new_ids))
+    changed = np.flatnonzero(old_ids[:common] != new_ids[:common])
+    if len(old_ids) != len(new_ids):
+        first = changed[0] if len(changed) else common
+        return int(first), max(len(old_ids), len(new_ids))
+    if not len(changed):
+        return None
+    return int(changed[0]), int(changed[-1]) + 1
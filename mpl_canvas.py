@@ -0,0 +1,100 @@
+"""
+Matplotlib canvas of the GUI preview.
+
+Kept out of multi_code so the window can show before matplotlib and its Qt backend
+are imported; the GUI creates the canvas on the first preview.
+"""
+import time
+
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT
+from matplotlib.figure import Figure
+from PyQt5.QtCore import QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+
+
+class MplCanvas(FigureCanvas):
+    """
+    Figure canvas that keeps rendered bitmaps of its content.
+    Until set_content_key is called with a new key, a draw for a size, DPI and set of view
+    limits drawn before restores that bitmap instead of rendering the figure through Agg,
+    which makes toolbar home/back/forward instant. While the widget is being resized the
+    last bitmap is scaled to the new size and the real redraw waits until resizing stops.
+    """
+    # Bitmaps kept per content, oldest dropped first
+    BITMAP_CACHE_SIZE = 8
+    # Emitted after the figure was rendered through Agg
+    drawn = pyqtSignal()
+
+    def __init__(self, parent=None, width=5, height=4, dpi=100):
+        self.fig = Figure(figsize=(width, height), dpi=dpi)
+        self.axes = self.fig.add_subplot(111)
+        self.content_key = None
+        self.bitmap_cache = {}
+        self.last_image = None
+        self.resizing = False
+        # RenderStats whose 'draw' stage holds the time of the last Agg draw, see profiling
+        self.stats = None
+        super(MplCanvas, self).__init__(self.fig)
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(150)
+        self.resize_timer.timeout.connect(self.resize_done)
+
+    def set_content_key(self, key):
+        """
+        Describe what the figure shows, e.g. (layout version, colours, line width).
+        Cached bitmaps are dropped whenever the key changes; None disables caching.
+        """
+        if key != self.content_key:
+            self.bitmap_cache.clear()
+        self.content_key = key
+
+    def view_key(self):
+        if self.content_key is None:
+            return None
+        width, height = self.get_width_height(physical=True)
+        limits = tuple((ax.get_xlim(), ax.get_ylim()) for ax in self.figure.axes)
+        return self.content_key, width, height, self.figure.dpi, limits
+
+    def draw(self):
+        key = self.view_key()
+        region = self.bitmap_cache.get(key)
+        if region is not None:
+            self.get_renderer()
+            self.restore_region(region)
+            self.update()
+            return
+        start = time.perf_counter()
+        super(MplCanvas, self).draw()
+        if self.stats is not None:
+            self.stats.stages['draw'] = time.perf_counter() - start
+        width, height = self.get_width_height(physical=True)
+        self.last_image = QImage(self.buffer_rgba(), width, height, QImage.Format_RGBA8888).copy()
+        if key is not None:
+            self.bitmap_cache[key] = self.copy_from_bbox(self.figure.bbox)
+            if len(self.bitmap_cache) > self.BITMAP_CACHE_SIZE:
+                del self.bitmap_cache[next(iter(self.bitmap_cache))]
+        self.drawn.emit()
+
+    def draw_idle(self):
+        # resize_done redraws once resizing stops
+        if not self.resizing:
+            super(MplCanvas, self).draw_idle()
+
+    def resizeEvent(self, event):
+        self.resizing = True
+        self.resize_timer.start()
+        super(MplCanvas, self).resizeEvent(event)
+
+    def resize_done(self):
+        self.resizing = False
+        self.draw_idle()
+
+    def paintEvent(self, event):
+        if self.resizing and self.last_image is not None:
+            # Stretch the last frame, its cost does not depend on what the figure shows
+            painter = QPainter(self)
+            painter.drawImage(self.rect(), self.last_image)
+            painter.end()
+            return
+        super(MplCanvas, self).paintEvent(event)
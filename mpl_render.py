@@ -0,0 +1,549 @@
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.collections import PathCollection, PolyCollection
+from matplotlib.colors import to_rgba_array
+from matplotlib.text import Text
+
+from glyphs import CELL_SIZE, unique_segments
+
+
+def collection_data(layout, palette):
+    """
+    Compute everything a PolyCollection needs for a laid-out sentence.
+    Pure NumPy, so it can run off the GUI thread.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :return: (polygons, face_colors) with polygons as (n, max_vertices, 2) and face_colors as (n, 4) RGBA.
+    """
+    # Convert the palette once and gather RGBA rows, so matplotlib never parses a colour per polygon
+    return layout.polygon_array(), layout.face_colors(to_rgba_array(palette))
+
+
+# Below this many screen pixels per cell GridCollection draws one averaged colour per cell
+LOD_CELL_PIXELS = 4
+# Below this many the 12 pt labels no longer fit their cells, and GridLabels draws none
+LABEL_CELL_PIXELS = 16
+
+
+def _cell_pixels(axes):
+    # Width of one cell on screen in pixels
+    (x_0, _), (x_1, _) = axes.transData.transform([(0, 0), (CELL_SIZE, 0)])
+    return abs(x_1 - x_0)
+
+
+def _visible_cells(axes, num_cells, col_num):
+    # (row_0, row_1, col_0, col_1) ranges of the cells touching the view limits
+    x_min, x_max = sorted(axes.get_xlim())
+    y_min, y_max = sorted(axes.get_ylim())
+    # Cells touching the view edge are kept, their outlines reach into it
+    col_0 = int(np.clip(np.floor(x_min / CELL_SIZE), 0, col_num))
+    col_1 = int(np.clip(np.floor(x_max / CELL_SIZE) + 1, 0, col_num))
+    num_rows = -(-num_cells // col_num)
+    row_0 = int(np.clip(np.floor(-y_max / CELL_SIZE), 0, num_rows))
+    row_1 = int(np.clip(np.floor((CELL_SIZE - y_min) / CELL_SIZE) + 1, 0, num_rows))
+    return row_0, row_1, col_0, col_1
+
+
+class GridCollection(PolyCollection):
+    """
+    PolyCollection of a laid-out sentence that only draws the cells inside the view limits.
+    The cells sit on a regular grid, so the grid itself is the spatial index: the visible
+    columns and rows follow from the view limits and every visible row is a contiguous
+    range of polygons. Zoomed out below LOD_CELL_PIXELS pixels per cell, every glyph is
+    drawn as a single block of its area-weighted average colour instead of its polygons.
+    """
+
+    def __init__(self, polygons, polygon_glyphs, col_num, **kwargs):
+        """
+        :param polygons: (n, max_vertices, 2) array, see collection_data.
+        :param polygon_glyphs: Cell of every polygon, SentenceLayout.polygon_glyphs.
+        :param col_num: Number of columns in the grid.
+        :param kwargs: Passed on to PolyCollection.
+        """
+        super(GridCollection, self).__init__(polygons, **kwargs)
+        self.col_num = col_num
+        self.set_grid(polygons, polygon_glyphs)
+
+    def set_grid(self, polygons, polygon_glyphs):
+        """
+        Update the index after the paths changed, see replace_cells.
+        """
+        num_cells = int(polygon_glyphs[-1]) + 1 if len(polygon_glyphs) else 0
+        # Polygons of cell i are cell_starts[i]:cell_starts[i + 1]
+        self.cell_starts = np.searchsorted(polygon_glyphs, np.arange(num_cells + 1))
+        self.polygon_glyphs = polygon_glyphs
+        # Shoelace areas, the repeated padding vertices add nothing
+        x, y = polygons[..., 0], polygons[..., 1]
+        self.areas = np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1)) / 2
+
+    def cell_pixels(self):
+        """
+        Width of one cell on screen in pixels.
+        """
+        return _cell_pixels(self.axes)
+
+    def visible_polygons(self):
+        """
+        Indices of the polygons of every cell that touches the view limits.
+        """
+        num_cells = len(self.cell_starts) - 1
+        col_num = self.col_num
+        row_0, row_1, col_0, col_1 = _visible_cells(self.axes, num_cells, col_num)
+
+        row_cells = np.arange(row_0, row_1) * col_num
+        starts = self.cell_starts[np.minimum(row_cells + col_0, num_cells)]
+        stops = self.cell_starts[np.minimum(row_cells + col_1, num_cells)]
+        counts = stops - starts
+        # Concatenated aranges of every row's polygon range
+        shifts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return np.arange(counts.sum()) + shifts
+
+    def cell_colors(self):
+        """
+        Area-weighted average face colour of every cell.
+        :return: (num_cells, 4) RGBA array.
+        """
+        face_colors = np.broadcast_to(self.get_facecolor(), (len(self.areas), 4))
+        num_cells = len(self.cell_starts) - 1
+        cell_areas = np.bincount(self.polygon_glyphs, self.areas, num_cells)
+        weighted = [np.bincount(self.polygon_glyphs, self.areas * face_colors[:, k], num_cells) for k in range(4)]
+        return np.column_stack(weighted) / np.maximum(cell_areas, 1e-12)[:, None]
+
+    def _draw_blocks(self, renderer):
+        from matplotlib.image import AxesImage
+
+        num_cells = len(self.cell_starts) - 1
+        num_rows = -(-num_cells // self.col_num)
+        # Missing cells of the last row stay transparent
+        image = np.zeros((num_rows * self.col_num, 4))
+        image[:num_cells] = self.cell_colors()
+        blocks = AxesImage(self.axes, interpolation='nearest', origin='upper',
+                           extent=(0, self.col_num * CELL_SIZE, (1 - num_rows) * CELL_SIZE, CELL_SIZE))
+        blocks.set_data(image.reshape(num_rows, self.col_num, 4))
+        blocks.set_figure(self.figure)
+        blocks.set_transform(self.axes.transData)
+        blocks.set_clip_box(self.get_clip_box())
+        blocks.set_clip_path(self.get_clip_path())
+        blocks.draw(renderer)
+
+    def draw(self, renderer):
+        if not self.get_visible() or not len(self.areas):
+            return
+        if self.cell_pixels() < LOD_CELL_PIXELS:
+            self._draw_blocks(renderer)
+            return
+        visible = self.visible_polygons()
+        if len(visible) == len(self.areas):
+            super(GridCollection, self).draw(renderer)
+            return
+        # Draw the visible subset by swapping it in for the duration of the draw
+        paths, face_colors = self._paths, self._facecolors
+        try:
+            self._paths = [paths[i] for i in visible.tolist()]
+            if len(face_colors) > 1:
+                self._facecolors = face_colors[visible]
+            super(GridCollection, self).draw(renderer)
+        finally:
+            self._paths, self._facecolors = paths, face_colors
+
+
+def _segment_path(segments):
+    # One move and one line per segment; vector backends write it as a single path element
+    from matplotlib.path import Path
+
+    codes = np.tile(np.array([Path.MOVETO, Path.LINETO], dtype=Path.code_type), len(segments))
+    return Path(segments.reshape(-1, 2), codes)
+
+
+def _split_rows(segments, y_min, y_max):
+    # (inside, outside) parts of the segments cut at the horizontal lines y_min and y_max;
+    # horizontal segments on either line count as inside
+    start, delta = segments[:, 0], segments[:, 1] - segments[:, 0]
+    y_0, dy = start[:, 1], delta[:, 1]
+    flat = dy == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_min, t_max = (y_min - y_0) / dy, (y_max - y_0) / dy
+    t_0 = np.clip(np.minimum(t_min, t_max), 0, 1)
+    t_1 = np.clip(np.maximum(t_min, t_max), 0, 1)
+    # Horizontal segments lie inside or outside as a whole
+    in_rows = (y_min <= y_0) & (y_0 <= y_max)
+    t_0[flat] = np.where(in_rows[flat], 0, 1)
+    t_1[flat] = 1
+
+    def part(t_start, t_stop):
+        keep = t_stop > t_start
+        return np.stack((start + t_start[:, None] * delta, start + t_stop[:, None] * delta), axis=1)[keep]
+
+    zeros, ones = np.zeros(len(segments)), np.ones(len(segments))
+    return part(t_0, t_1), np.concatenate((part(zeros, t_0), part(t_1, ones)))
+
+
+class GridOutline(PathCollection):
+    """
+    Outline path of a laid-out sentence that, like GridCollection, only strokes the segments
+    of the cells inside the view limits, and nothing at all zoomed out below LOD_CELL_PIXELS
+    pixels per cell, where GridCollection draws plain colour blocks.
+    """
+
+    def __init__(self, segments, layout, **kwargs):
+        """
+        :param segments: (n, 2, 2) outline segments, see SentenceLayout.outline_segments.
+        :param layout: SentenceLayout the segments belong to.
+        :param kwargs: Passed on to PathCollection.
+        """
+        super(GridOutline, self).__init__([_segment_path(segments)], **kwargs)
+        self.col_num = layout.col_num
+        self.set_segments(segments, len(layout))
+
+    def set_segments(self, segments, num_cells):
+        """
+        Replace the outline, see replace_rows.
+        """
+        self.segments = segments
+        self.num_cells = num_cells
+        # Bounding box of every segment for culling
+        self.lower, self.upper = segments.min(axis=1), segments.max(axis=1)
+        self.set_paths([_segment_path(segments)])
+
+    def replace_rows(self, layout, first_row, stop_row):
+        """
+        Recompute the outline of rows first_row..stop_row from a new layout, see replace_cells.
+        The neighbouring rows take part, so the edges along the replaced rows are still stroked once.
+        :param layout: New SentenceLayout.
+        :return: The new segments of the replaced rows.
+        """
+        cells = np.clip(np.array([first_row - 1, stop_row + 1]) * layout.col_num, 0, len(layout))
+        start, stop = np.searchsorted(layout.polygon_glyphs, cells)
+        offsets = layout.polygon_offsets[start:stop + 1]
+        segments = unique_segments(layout.vertices[offsets[0]:offsets[-1]], offsets - offsets[0])
+        y_min, y_max = (1 - stop_row) * CELL_SIZE, (1 - first_row) * CELL_SIZE
+        inside, _ = _split_rows(segments, y_min, y_max)
+        _, outside = _split_rows(self.segments, y_min, y_max)
+        self.set_segments(np.concatenate((outside, inside)), len(layout))
+        return inside
+
+    def draw(self, renderer):
+        if not self.get_visible() or not len(self.segments) or _cell_pixels(self.axes) < LOD_CELL_PIXELS:
+            return
+        row_0, row_1, col_0, col_1 = _visible_cells(self.axes, self.num_cells, self.col_num)
+        lower, upper = self.lower, self.upper
+        visible = ((lower[:, 0] <= col_1 * CELL_SIZE) & (upper[:, 0] >= col_0 * CELL_SIZE) &
+                   (lower[:, 1] <= (1 - row_0) * CELL_SIZE) & (upper[:, 1] >= (1 - row_1) * CELL_SIZE))
+        if visible.all():
+            super(GridOutline, self).draw(renderer)
+            return
+        # Stroke the visible segments by swapping them in for the duration of the draw
+        paths = self._paths
+        try:
+            self._paths = [_segment_path(self.segments[visible])]
+            super(GridOutline, self).draw(renderer)
+        finally:
+            self._paths = paths
+
+
+class GridLabels(Artist):
+    """
+    Symbol labels of a laid-out sentence that, like GridCollection, only draws the cells inside
+    the view limits, and nothing at all zoomed out below LABEL_CELL_PIXELS pixels per cell.
+    The Text of a cell is only created the first time the cell is drawn.
+    """
+    # Above the polygons and outlines, like the Text artists of draw_symbol_text
+    zorder = 3
+
+    def __init__(self, layout):
+        """
+        :param layout: SentenceLayout from layout.layout_sentence.
+        """
+        super(GridLabels, self).__init__()
+        self.col_num = layout.col_num
+        self.texts = layout.symbol_texts()
+        self.labels = [None] * len(self.texts)
+
+    def replace(self, first, stop, texts):
+        """
+        Replace the labels of cells first..stop, see replace_cells.
+        :param texts: New strings of the cells, fewer than stop - first when the text got shorter.
+        """
+        self.texts[first:stop] = texts
+        self.labels[first:stop] = [None] * len(texts)
+
+    def label(self, cell):
+        """
+        The Text of a cell, created on first use.
+        """
+        label = self.labels[cell]
+        if label is None:
+            center = CELL_SIZE / 2
+            label = Text(cell % self.col_num * CELL_SIZE + center, -(cell // self.col_num) * CELL_SIZE + center,
+                         self.texts[cell], horizontalalignment='center', verticalalignment='center',
+                         fontsize=12, color='b', weight='bold')
+            label.set_figure(self.figure)
+            label.set_transform(self.get_transform())
+            label.set_clip_path(self.axes.patch)
+            self.labels[cell] = label
+        return label
+
+    def draw(self, renderer):
+        if not self.get_visible() or not self.texts or _cell_pixels(self.axes) < LABEL_CELL_PIXELS:
+            return
+        num_cells, col_num = len(self.texts), self.col_num
+        row_0, row_1, col_0, col_1 = _visible_cells(self.axes, num_cells, col_num)
+        for row in range(row_0, row_1):
+            for cell in range(row * col_num + col_0, min(row * col_num + col_1, num_cells)):
+                self.label(cell).draw(renderer)
+
+
+def draw_polygons(ax, polygons, face_colors, line_width=1, layout=None):
+    """
+    Add polygons to the axes as a single PolyCollection.
+    :param ax: Matplotlib axes to draw on.
+    :param polygons: (n, max_vertices, 2) array, see collection_data.
+    :param face_colors: (n, 4) RGBA array.
+    :param line_width: Width of the black polygon outlines, 0 to fill only.
+    :param layout: SentenceLayout the polygons come from; when given a GridCollection is used
+        so that zooming and panning only draw what is in view.
+    :return: The PolyCollection.
+    """
+    # Edges share one colour and width, which collections broadcast without per-polygon work
+    edge_colors = to_rgba_array(['black']) if line_width else 'none'
+    kwargs = dict(closed=True, facecolors=face_colors, edgecolors=edge_colors, linewidths=[line_width])
+    if layout is not None:
+        collection = GridCollection(polygons, layout.polygon_glyphs, layout.col_num, **kwargs)
+    else:
+        collection = PolyCollection(polygons, **kwargs)
+    ax.add_collection(collection, autolim=False)
+    return collection
+
+
+def recolor_collection(collection, color_slots, palette):
+    """
+    Apply a new palette to an existing collection without rebuilding it.
+    :param collection: PolyCollection from draw_polygons or draw_layout.
+    :param color_slots: Colour slot per polygon, SentenceLayout.color_slots.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :return: The new (n, 4) RGBA face colours.
+    """
+    face_colors = to_rgba_array(palette)[color_slots]
+    collection.set_facecolor(face_colors)
+    return face_colors
+
+
+def draw_outline(ax, layout, line_width=1, culled=False, segments=None):
+    """
+    Stroke the outlines of a laid-out sentence as a single path.
+    Edges shared by two polygons or two cells are stroked once instead of twice, which
+    halves the stroke work and keeps inner and outer lines the same weight.
+    :param ax: Matplotlib axes to draw on.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param line_width: Width of the black outlines.
+    :param culled: Add a GridOutline that only strokes the segments in view, for interactive canvases.
+    :param segments: Outline segments computed beforehand, layout.outline_segments() when None.
+    :return: The PathCollection holding the outline path.
+    """
+    if segments is None:
+        segments = layout.outline_segments()
+    # Projecting caps close the corners where segments meet, like the mitred polygon outlines
+    kwargs = dict(facecolors='none', edgecolors=to_rgba_array(['black']), linewidths=[line_width],
+                  capstyle='projecting')
+    if culled:
+        outline = GridOutline(segments, layout, **kwargs)
+    else:
+        outline = PathCollection([_segment_path(segments)], **kwargs)
+    ax.add_collection(outline, autolim=False)
+    return outline
+
+
+def draw_layout(ax, layout, palette, symbol_text=False, line_width=1):
+    """
+    Draw a laid-out sentence as a single PolyCollection instead of one patch per polygon,
+    filled only, with the outlines stroked once on top by draw_outline.
+    :param ax: Matplotlib axes to draw on.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param symbol_text: Label every square with its symbol.
+    :param line_width: Width of the black polygon outlines.
+    :return: The PolyCollection holding every polygon.
+    """
+    collection = draw_polygons(ax, *collection_data(layout, palette), line_width=0)
+    if line_width:
+        draw_outline(ax, layout, line_width)
+
+    # Text artists are only created when they are actually shown
+    if symbol_text:
+        draw_symbol_text(ax, layout)
+    return collection
+
+
+def draw_symbol_text(ax, layout, culled=False):
+    """
+    Label the center of every square of a laid-out sentence with its symbol.
+    :param ax: Matplotlib axes to draw on.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param culled: Add a GridLabels that only draws the labels in view, for interactive canvases,
+        instead of one Text per cell.
+    :return: The GridLabels when culled.
+    """
+    if culled:
+        labels = GridLabels(layout)
+        ax.add_artist(labels)
+        return labels
+    center = CELL_SIZE / 2
+    for (offset_x, offset_y), text in zip(layout.cell_offsets, layout.symbol_texts()):
+        ax.text(offset_x + center, offset_y + center, text,
+                horizontalalignment='center', verticalalignment='center',
+                fontsize=12, color='b', weight='bold')
+
+
+# Output formats write_layout can produce
+FORMATS = ('svg', 'pdf', 'png')
+# Formats write_pages can put several pages into
+PAGED_FORMATS = ('pdf',)
+
+
+def layout_figure(layout, palette, symbol_text=False, line_width=1, cell_inches=0.5, dpi=100):
+    """
+    Build a figure showing exactly the grid of a laid-out sentence.
+    A bare Figure is used so no pyplot state or interactive backend gets involved.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param symbol_text: Label every square with its symbol.
+    :param line_width: Width of the black polygon outlines.
+    :param cell_inches: Size of one glyph square in inches.
+    :param dpi: Figure resolution.
+    :return: matplotlib Figure.
+    """
+    from matplotlib.figure import Figure
+
+    x_min, x_max, y_min, y_max = layout.bounds()
+    fig = Figure(figsize=(layout.col_num * cell_inches, layout.row_num * cell_inches), dpi=dpi)
+    ax = fig.add_axes((0, 0, 1, 1))
+    draw_layout(ax, layout, palette, symbol_text, line_width)
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+    ax.set_aspect('equal')
+    ax.axis('off')
+    return fig
+
+
+def write_layout(layout, file, fmt, palette, symbol_text=False, line_width=1, cell_inches=0.5, dpi=100):
+    """
+    Render a laid-out sentence to a file without pyplot or any GUI backend.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param file: Path or binary file-like object to write to.
+    :param fmt: One of FORMATS.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param symbol_text: Label every square with its symbol.
+    :param line_width: Width of the black polygon outlines.
+    :param cell_inches: Size of one glyph square in inches.
+    :param dpi: Resolution for raster output.
+    """
+    fig = layout_figure(layout, palette, symbol_text, line_width, cell_inches, dpi)
+    fig.savefig(file, format=fmt, dpi=dpi)
+
+
+def write_pages(layouts, file, fmt, palette, symbol_text=False, line_width=1, cell_inches=0.5, dpi=100):
+    """
+    Write page layouts into one multi-page document, each page is flushed before the next is drawn.
+    :param layouts: Iterable of SentenceLayout, one per page.
+    :param file: Path or binary file-like object to write to.
+    :param fmt: One of PAGED_FORMATS.
+    :return: Number of pages written.
+    """
+    if fmt not in PAGED_FORMATS:
+        raise ValueError(f"mpl_render cannot write multi-page {fmt}")
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    num_pages = 0
+    with PdfPages(file) as pdf:
+        for layout in layouts:
+            pdf.savefig(layout_figure(layout, palette, symbol_text, line_width, cell_inches, dpi))
+            num_pages += 1
+    return num_pages
+
+
+def replace_cells(ax, collection, old_layout, layout, polygons, face_colors, cells, line_width=1, labels=None,
+                  outline=None):
+    """
+    Swap the polygons of a range of grid cells in an existing collection and paint only
+    those cells into the canvas' current Agg buffer; the caller blits the returned box.
+    The canvas must have been drawn before and the axes may not hold anything but the collection,
+    the outline and the labels.
+    :param ax: Axes holding the collection.
+    :param collection: Fill-only PolyCollection from draw_polygons for old_layout.
+    :param old_layout: SentenceLayout the collection currently shows.
+    :param layout: New SentenceLayout.
+    :param polygons: Polygon array of the new layout, see collection_data.
+    :param face_colors: RGBA face colours of the new layout.
+    :param cells: (first, stop) cell range to replace, e.g. from layout.diff_glyphs.
+    :param line_width: Width of the black polygon outlines.
+    :param labels: GridLabels of the collection to update too, or None without labels.
+    :param outline: GridOutline from draw_outline to update too, or None without outlines.
+    :return: Display-space Bbox of the repainted cells, or None when the whole canvas needs a
+        redraw instead: a GridCollection zoomed out to averaged colour blocks, or a label that
+        sticks out of its cell.
+    """
+    from matplotlib.transforms import Bbox
+
+    first, stop = cells
+    # Labels sit at fixed cell centres, the new ones are painted over the new polygons below
+    new_labels, label_extents = [], []
+    if labels is not None:
+        renderer = ax.figure.canvas.get_renderer()
+        label_extents = [labels.label(cell).get_window_extent(renderer)
+                         for cell in range(first, min(stop, len(labels.texts)))]
+        labels.replace(first, stop, layout.symbol_texts()[first:stop])
+        new_labels = [labels.label(cell) for cell in range(first, min(stop, len(labels.texts)))]
+        label_extents += [label.get_window_extent(renderer) for label in new_labels]
+
+    start_new, stop_new = np.searchsorted(layout.polygon_glyphs, (first, stop))
+    start_old, stop_old = np.searchsorted(old_layout.polygon_glyphs, (first, stop))
+
+    # Collection for the changed cells only, its paths are spliced into the full collection
+    # so the next full draw shows the new text as well
+    dirty = PolyCollection(polygons[start_new:stop_new], closed=True, facecolors=face_colors[start_new:stop_new],
+                           edgecolors='none', linewidths=[0])
+    paths = collection.get_paths()
+    paths[start_old:stop_old] = dirty.get_paths()
+    collection.set_facecolor(face_colors)
+    col_num = layout.col_num
+    first_row, last_row = first // col_num, (stop - 1) // col_num
+    if outline is not None:
+        # Outline of the touched rows, stroked over the new polygons below
+        dirty_outline = PathCollection([_segment_path(outline.replace_rows(layout, first_row, last_row + 1))],
+                                       facecolors='none', edgecolors=outline.get_edgecolor(),
+                                       linewidths=outline.get_linewidth(), capstyle='projecting')
+    if isinstance(collection, GridCollection):
+        collection.set_grid(polygons, layout.polygon_glyphs)
+        if collection.cell_pixels() < LOD_CELL_PIXELS:
+            return None
+
+    # Rows first_row..last_row, padded for the outlines that stick out of the cells
+    x_min, x_max = (first % col_num * CELL_SIZE, ((stop - 1) % col_num + 1) * CELL_SIZE) \
+        if first_row == last_row else (0, col_num * CELL_SIZE)
+    corners = ax.transData.transform([(x_min, -last_row * CELL_SIZE), (x_max, (1 - first_row) * CELL_SIZE)])
+    pad = line_width * ax.figure.dpi / 72
+    box = Bbox.from_extents(*(corners.min(axis=0) - pad), *(corners.max(axis=0) + pad))
+
+    # Blank every touched cell (deleted ones included), then draw the new polygons on top
+    cell_index = np.arange(first, stop)
+    x = (cell_index % col_num) * CELL_SIZE
+    y = -(cell_index // col_num) * CELL_SIZE
+    squares = np.stack([np.column_stack((x, y)), np.column_stack((x + CELL_SIZE, y)),
+                        np.column_stack((x + CELL_SIZE, y + CELL_SIZE)), np.column_stack((x, y + CELL_SIZE))], axis=1)
+    blank = PolyCollection(squares, closed=True, facecolors=to_rgba_array([ax.get_facecolor()]), linewidths=[0])
+    artists = [blank, dirty] if outline is None else [blank, dirty, dirty_outline]
+    for artist in artists:
+        artist.set_transform(ax.transData)
+        artist.set_clip_box(ax.bbox)
+        artist.set_figure(ax.figure)
+    if outline is not None:
+        # Only the blitted box is repainted, the rest of the rows keeps its strokes
+        dirty_outline.set_clip_box(Bbox.intersection(box, ax.bbox) or Bbox.null())
+    for artist in artists + new_labels:
+        ax.draw_artist(artist)
+
+    if any(not (box.x0 <= extent.x0 and extent.x1 <= box.x1 and box.y0 <= extent.y0 and extent.y1 <= box.y1)
+           for extent in label_extents):
+        # Old or new text outside the blanked cells, only a full redraw gets it right
+        return None
+    return Bbox.intersection(box, ax.bbox) or Bbox.null()
@@ -1,10 +1,9 @@
+import logging
+import os
 import sys
-import matplotlib.pyplot as plt
-import matplotlib.patches as Patches
 import numpy as np
-import math
 
-from PyQt5.QtCore import Qt, QThread, QTimer, QEventLoop, pyqtSignal, QRegExp
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QRegExp
 from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -19,18 +18,124 @@ from PyQt5.QtWidgets import (
     QFileDialog,
     QComboBox
 )
-from PyQt5.QtGui import QKeyEvent, QPainter, QPen, QColor, QRegExpValidator
+from PyQt5.QtGui import QRegExpValidator
 
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT
-from matplotlib.figure import Figure
+# matplotlib is imported on first use (see SquareCodeGUI.ensure_canvas), so the window shows without it
 
+from encoder import UnknownSymbolError, encode_sentence
+from glyphs import case_polygons
+from layout import diff_glyphs, glyph_table, grid_bounds, layout_glyphs
+from profiling import RenderStats, profiled, timed
+from qt_preview import GlyphView
+from symbols import SYMBOLS, SymbolRegistry, color_choice_dict, color_dict, resolve_palette
 
-class MplCanvas(FigureCanvas):
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        super(MplCanvas, self).__init__(self.fig)
+logger = logging.getLogger(__name__)
+
+
+class PreviewData:
+    """
+    Everything the preview needs to show a sentence, computed off the GUI thread.
+    """
+
+    def __init__(self, layout, polygons, face_colors, row_num, col_num, symbol_text, line_width, stats=None,
+                 outline=None):
+        self.layout = layout
+        self.polygons = polygons
+        self.face_colors = face_colors
+        self.row_num = row_num
+        self.col_num = col_num
+        self.symbol_text = symbol_text
+        self.line_width = line_width
+        self.stats = stats
+        # Outline segments, None when there are no outlines or they are still to be computed
+        self.outline = outline
+
+
+class RenderWorker(QThread):
+    """
+    Encode and lay out a sentence in a background thread.
+    Every job carries a generation number; the GUI ignores results of stale generations
+    and asks stale workers to stop between stages.
+    """
+    rendered = pyqtSignal(int, object)  # generation, PreviewData
+    failed = pyqtSignal(int, str)  # generation, error message
+
+    def __init__(self, generation, sentence, row_num, col_num, palette, symbol_text, line_width, registry=SYMBOLS,
+                 parent=None):
+        super(RenderWorker, self).__init__(parent)
+        self.generation = generation
+        self.sentence = sentence
+        self.registry = registry
+        self.row_num = row_num
+        self.col_num = col_num
+        self.palette = palette
+        self.symbol_text = symbol_text
+        self.line_width = line_width
+
+    def run(self):
+        stats = RenderStats()
+        try:
+            with stats.stage('encode'):
+                glyph_ids = encode_sentence(self.sentence, registry=self.registry)
+            if self.isInterruptionRequested():
+                return
+            with stats.stage('layout'):
+                layout = layout_glyphs(glyph_ids, self.row_num, self.col_num, glyph_table(self.registry))
+            stats.count_layout(layout)
+            if self.isInterruptionRequested():
+                return
+            with stats.stage('colors'):
+                polygons, face_colors = layout.polygon_array(), layout.face_colors(self.palette)
+            outline = None
+            if self.line_width and not self.isInterruptionRequested():
+                with stats.stage('outline'):
+                    outline = layout.outline_segments()
+        except UnknownSymbolError as e:
+            self.failed.emit(self.generation, str(e))
+            return
+        if not self.isInterruptionRequested():
+            self.rendered.emit(self.generation, PreviewData(layout, polygons, face_colors, self.row_num, self.col_num,
+                                                            self.symbol_text, self.line_width, stats, outline))
+
+
+class ExportWorker(QThread):
+    """
+    Write the deep-zoom tile pyramid of a layout in a background thread.
+    Reports every tile written and stops early once interruption is requested.
+    """
+    progress = pyqtSignal(int, int)  # tiles written, tile total
+    exported = pyqtSignal(str, object)  # file name, RenderStats
+    failed = pyqtSignal(str)  # error message
+
+    def __init__(self, preview, file_name, palette, stats, parent=None):
+        super(ExportWorker, self).__init__(parent)
+        self.preview = preview
+        self.file_name = file_name
+        self.palette = palette
+        self.stats = stats
+        # Kept apart from the interruption flag, which Qt clears once the thread has finished
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self.requestInterruption()
+
+    def run(self):
+        from tile_pyramid import TilePyramid, write_pyramid
+
+        layout = self.preview.layout
+        pyramid = TilePyramid(layout.glyph_ids, layout.col_num, self.palette, layout.row_num, layout.table,
+                              line_width=self.preview.line_width, symbol_text=self.preview.symbol_text)
+        try:
+            with self.stats.stage('export'):
+                # Forking from this thread could copy a lock another thread holds, the workers are spawned
+                written = write_pyramid(pyramid, self.file_name, 'dzi', workers=0, progress=self.progress.emit,
+                                        cancelled=self.isInterruptionRequested, start_method='spawn')
+        except OSError as e:
+            self.failed.emit(f"Export failed: {e}")
+            return
+        if written is not None:
+            self.exported.emit(self.file_name, self.stats)
 
 
 class SquareCodeGUI(QWidget):
@@ -46,6 +151,18 @@ class SquareCodeGUI(QWidget):
             "row": None,
             "col": None
         }
+        # Background rendering state, see generate_code
+        self.render_generation = 0
+        self.render_workers = set()
+        # Running deep-zoom export, see export_graphic
+        self.export_worker = None
+        # What the canvas currently shows, kept so colour changes can skip re-layout
+        self.preview = None
+        self.preview_collection = None
+        self.preview_outline = None
+        self.preview_labels = None
+        # Alphabet everything is encoded with, see alphabet_changed
+        self.registry = SYMBOLS
         # Initialize the parent class
         super(SquareCodeGUI, self).__init__()
         # super().__init__()
@@ -73,6 +190,7 @@ class SquareCodeGUI(QWidget):
             slider.setValue(6)
             slider.valueChanged.connect(
                 lambda value, k=key: self.update_label(k, value))
+            slider.valueChanged.connect(self.cancel_render)
 
             self.sliders_dict[key] = slider
 
@@ -99,31 +217,44 @@ class SquareCodeGUI(QWidget):
 
         main_layout.addLayout(vbox)
 
-        # Setup the Matplotlib canvas
-        self.canvas = MplCanvas(self, width=5, height=4, dpi=100)
-        main_layout.addWidget(self.canvas)
+        # The Matplotlib canvas and its toolbar are created by ensure_canvas on the first preview,
+        # this empty widget holds their place until then
+        self.canvas = None
+        self.toolbar = None
+        self.canvas_placeholder = QWidget(self)
+        self.canvas_placeholder.setMinimumSize(500, 400)
+        self.main_layout = main_layout
+        main_layout.addWidget(self.canvas_placeholder)
 
-        # Set the x-axis limits to accommodate all columns
-        self.canvas.axes.set_xlim(0, self.sliders_dict["col"].value() * 3)
-        # Set the y-axis limits to accommodate all rows
-        self.canvas.axes.set_ylim(
-            -self.sliders_dict["row"].value() * 3, self.sliders_dict["row"].value() * 3)
-        # Maintain aspect ratio
-        self.canvas.axes.set_aspect('equal')
-        # Hide axis
-        self.canvas.axes.axis('off')
+        # QPainter preview, shown instead of the canvas when Native Preview is checked
+        self.glyph_view = GlyphView(self)
+        self.glyph_view.hide()
+        main_layout.addWidget(self.glyph_view)
 
         # HELPERS
         vbox = QVBoxLayout()
-
-        # Add Matplotlib navigation toolbar for zoom and pan functionality
-        self.toolbar = NavigationToolbar2QT(self.canvas, self)
-        vbox.addWidget(self.toolbar)
+        # Room for the Matplotlib navigation toolbar
+        self.toolbar_box = QVBoxLayout()
+        vbox.addLayout(self.toolbar_box)
 
         # text box for sentence
         self.sentence_text = QTextEdit()
+        self.sentence_text.textChanged.connect(self.text_changed)
         vbox.addWidget(self.sentence_text)
 
+        # Paint the preview with QPainter instead of matplotlib
+        self.native_checkbox = QCheckBox("Native Preview")
+        self.native_checkbox.toggled.connect(self.set_native_preview)
+        vbox.addWidget(self.native_checkbox)
+
+        # Live preview redraws only the changed cells shortly after typing stops
+        self.live_checkbox = QCheckBox("Live Preview")
+        vbox.addWidget(self.live_checkbox)
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(150)
+        self.live_timer.timeout.connect(self.update_preview)
+
         # button for generating code
         self.generate_btn = QPushButton("Generate code")
         self.generate_btn.clicked.connect(self.generate_code)
@@ -139,10 +270,23 @@ class SquareCodeGUI(QWidget):
         self.text_checkbox.setChecked(True)  # Default to showing text
         vbox.addWidget(self.text_checkbox)
 
+        # Status of the last generation
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        vbox.addWidget(self.status_label)
+
         main_layout.addLayout(vbox)
 
         vbox = QVBoxLayout()
 
+        # Alphabet the text is encoded with, more can be loaded from JSON or TOML files
+        self.alphabet_combo = QComboBox()
+        self.alphabet_combo.addItem("Built-in", SYMBOLS)
+        self.alphabet_combo.addItem("Load alphabet...", None)
+        self.alphabet_combo.activated.connect(self.alphabet_changed)
+        vbox.addWidget(QLabel("Alphabet:"))
+        vbox.addWidget(self.alphabet_combo)
+
         # Dropdowns for color selection
         self.default_color_set = False
         self.color_combos = {}
@@ -185,21 +329,223 @@ class SquareCodeGUI(QWidget):
         for key, combo in self.color_combos.items():
             color_name = combo.currentData()  # Get the selected color name
             color_choice_dict[key] = color_name
-        print("Updated colors:", color_choice_dict)
+        logger.debug("Updated colors: %s", color_choice_dict)
+        # Recolour what is already shown in place, the layout does not depend on colours
+        if self.native_checkbox.isChecked():
+            self.glyph_view.set_palette(resolve_palette())
+            # Keep the stored colours right for when the canvas takes over again
+            if self.preview is not None:
+                self.preview.face_colors = self.preview.layout.face_colors(color_choice_dict.rgba())
+        elif self.preview_collection is not None:
+            from mpl_render import recolor_collection
+            self.preview.face_colors = recolor_collection(
+                self.preview_collection, self.preview.layout.color_slots, resolve_palette())
+            self.update_content_key()
+            self.canvas.draw_idle()
+
+    def alphabet_changed(self, index):
+        registry = self.alphabet_combo.itemData(index)
+        if registry is None:
+            registry = self.load_alphabet()
+        if registry is None:
+            # Nothing loaded, show the alphabet in use again
+            shown = [self.alphabet_combo.itemData(i) is self.registry for i in range(self.alphabet_combo.count())]
+            self.alphabet_combo.setCurrentIndex(shown.index(True))
+            return
+        if registry is not self.registry:
+            self.registry = registry
+            # Glyph IDs of different alphabets cannot be diffed, lay everything out again
+            if self.preview is not None:
+                self.generate_code()
+
+    def load_alphabet(self):
+        """
+        Ask for an alphabet file and add it to the alphabet dropdown.
+        :return: The loaded SymbolRegistry, or None.
+        """
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        fileName, _ = QFileDialog.getOpenFileName(self, "Load alphabet", "", "Alphabets (*.json *.toml);;All Files (*)",
+                                                  options=options)
+        if not fileName:
+            return None
+        try:
+            registry = SymbolRegistry.load(fileName)
+        except (OSError, ValueError, KeyError) as e:
+            self.status_label.setText(f"Cannot load {os.path.basename(fileName)}: {e}")
+            return None
+        index = self.alphabet_combo.count() - 1
+        self.alphabet_combo.insertItem(index, os.path.basename(fileName), registry)
+        self.alphabet_combo.setCurrentIndex(index)
+        return registry
 
     def update_label(self, key, value):
         self.labels_dict[key].setText(f"{key}: {value}")
         # self.update_plot_limits()
 
     def generate_code(self):
-        self.canvas.axes.clear()
+        # Heavy work runs in a RenderWorker, the result comes back through show_preview
+        self.cancel_render()
         row_num = self.sliders_dict["row"].value()
         col_num = self.sliders_dict["col"].value()
         sentence = self.sentence_text.toPlainText()
-        plot_sentence(self.canvas.axes, sentence, row_num, col_num,
-                      symbol_text=self.text_checkbox.isChecked(), line_width=float(self.line_width_edit.text()))
-        print(float(self.line_width_edit.text()))
-        self.canvas.draw()
+        line_width = float(self.line_width_edit.text())
+        logger.debug("Generating %d x %d grid, line width %g", row_num, col_num, line_width)
+        worker = RenderWorker(self.render_generation, sentence, row_num, col_num, color_choice_dict.rgba(),
+                              self.text_checkbox.isChecked(), line_width, self.registry, self)
+        worker.rendered.connect(self.show_preview)
+        worker.failed.connect(self.show_render_error)
+        worker.finished.connect(lambda w=worker: self.render_workers.discard(w))
+        self.render_workers.add(worker)
+        self.status_label.setText("Generating...")
+        worker.start()
+
+    def text_changed(self):
+        if self.live_checkbox.isChecked():
+            self.live_timer.start()
+
+    def update_preview(self):
+        """
+        Update the preview for the current text, touching only the grid cells that changed.
+        Falls back to a full generate_code when anything but the text differs from what is shown.
+        """
+        preview = self.preview
+        row_num = self.sliders_dict["row"].value()
+        col_num = self.sliders_dict["col"].value()
+        line_width = float(self.line_width_edit.text())
+        symbol_text = self.text_checkbox.isChecked()
+        table = glyph_table(self.registry)
+        if (preview is None or (preview.row_num, preview.col_num, preview.line_width, preview.symbol_text)
+                != (row_num, col_num, line_width, symbol_text) or preview.layout.table is not table):
+            self.generate_code()
+            return
+
+        stats = RenderStats()
+        try:
+            with stats.stage('encode'):
+                glyph_ids = encode_sentence(self.sentence_text.toPlainText(), registry=self.registry)
+        except UnknownSymbolError as e:
+            self.status_label.setText(str(e))
+            return
+        cells = diff_glyphs(preview.layout.glyph_ids, glyph_ids)
+        if cells is None:
+            return
+        # A full render still running would overwrite this with older text
+        self.cancel_render()
+
+        with stats.stage('layout'):
+            layout = layout_glyphs(glyph_ids, row_num, col_num, table)
+        stats.count_layout(layout)
+        with stats.stage('colors'):
+            polygons, face_colors = layout.polygon_array(), layout.face_colors(color_choice_dict.rgba())
+        self.preview = PreviewData(layout, polygons, face_colors, row_num, col_num, symbol_text, line_width, stats)
+        if self.native_checkbox.isChecked():
+            # Painting the whole view natively is cheap enough without diffing
+            self.glyph_view.set_layout(layout, resolve_palette(), line_width, symbol_text)
+            self.show_stats()
+            return
+        if layout.row_num != preview.layout.row_num:
+            # Text spilling into another row moves the axes limits, splicing cannot do that
+            self.draw_preview()
+            return
+        from mpl_render import replace_cells
+
+        with stats.stage('splice'):
+            dirty_box = replace_cells(self.canvas.axes, self.preview_collection, preview.layout, layout,
+                                      polygons, face_colors, cells, line_width, self.preview_labels,
+                                      self.preview_outline)
+        if self.preview_outline is not None:
+            self.preview.outline = self.preview_outline.segments
+        self.canvas.stats = stats
+        self.update_content_key()
+        if dirty_box is None:
+            self.canvas.draw_idle()
+        else:
+            self.canvas.blit(dirty_box)
+        self.show_stats()
+
+    def cancel_render(self):
+        # Results of any running job become stale
+        self.render_generation += 1
+        for worker in self.render_workers:
+            worker.requestInterruption()
+
+    def show_preview(self, generation, preview):
+        if generation != self.render_generation:
+            return
+        self.preview = preview
+        self.draw_preview()
+        self.show_stats()
+
+    def show_stats(self):
+        # Counters and stage times of what is shown, the canvas adds its draw time once it has drawn
+        if self.preview is not None and self.preview.stats is not None:
+            self.status_label.setText(self.preview.stats.summary())
+
+    def set_native_preview(self, native):
+        if self.canvas is None:
+            self.canvas_placeholder.setVisible(not native)
+        else:
+            self.canvas.setVisible(not native)
+            self.toolbar.setVisible(not native)
+        self.glyph_view.setVisible(native)
+        # Only the visible widget is kept up to date
+        if self.preview is not None:
+            self.draw_preview()
+
+    def draw_preview(self):
+        preview = self.preview
+        if self.native_checkbox.isChecked():
+            self.glyph_view.set_layout(preview.layout, resolve_palette(), preview.line_width, preview.symbol_text)
+            self.preview_collection = None
+            self.preview_outline = None
+            self.preview_labels = None
+            return
+        from mpl_render import draw_outline, draw_polygons, draw_symbol_text
+
+        ax = self.ensure_canvas().axes
+        ax.clear()
+        self.canvas.stats = preview.stats
+        # Filled only, the shared edges are stroked once by the outline
+        self.preview_collection = draw_polygons(ax, preview.polygons, preview.face_colors, 0, preview.layout)
+        self.preview_outline = draw_outline(ax, preview.layout, preview.line_width, culled=True,
+                                            segments=preview.outline) if preview.line_width else None
+        # Only the labels in view are drawn, a Text per cell makes a large grid crawl
+        self.preview_labels = draw_symbol_text(ax, preview.layout, culled=True) if preview.symbol_text else None
+        format_grid_axes(ax, preview.layout.bounds())
+        self.update_content_key()
+        self.canvas.draw_idle()
+
+    def ensure_canvas(self):
+        """
+        Create the Matplotlib canvas and toolbar in place of the placeholder on first use.
+        :return: The MplCanvas.
+        """
+        if self.canvas is None:
+            from mpl_canvas import MplCanvas, NavigationToolbar2QT
+
+            self.canvas = MplCanvas(self, width=5, height=4, dpi=100)
+            self.canvas.drawn.connect(self.show_stats)
+            format_grid_axes(self.canvas.axes, grid_bounds(self.sliders_dict["row"].value(),
+                                                           self.sliders_dict["col"].value()))
+            self.main_layout.replaceWidget(self.canvas_placeholder, self.canvas)
+            self.canvas_placeholder.deleteLater()
+            self.canvas_placeholder = None
+            # Add Matplotlib navigation toolbar for zoom and pan functionality
+            self.toolbar = NavigationToolbar2QT(self.canvas, self)
+            self.toolbar_box.addWidget(self.toolbar)
+            native = self.native_checkbox.isChecked()
+            self.canvas.setVisible(not native)
+            self.toolbar.setVisible(not native)
+        return self.canvas
+
+    def update_content_key(self):
+        # The generation changes with every new layout, so old canvas bitmaps are never reused
+        self.canvas.set_content_key((self.render_generation, tuple(resolve_palette()), self.preview.line_width))
+
+    def show_render_error(self, generation, message):
+        if generation == self.render_generation:
+            self.status_label.setText(message)
 
     def adjust_slider(self, value, slider_name):
         current_value = self.sliders_dict[slider_name].value()
@@ -212,77 +558,113 @@ class SquareCodeGUI(QWidget):
         # Optionally, update plot limits when slider values change
         max_dim = max(self.sliders_dict["row"].value(
         ), self.sliders_dict["col"].value()) * 3
+        self.ensure_canvas()
         self.canvas.axes.set_xlim(0, max_dim)
         self.canvas.axes.set_ylim(0, max_dim)
         self.canvas.axes.set_aspect('equal')
         self.canvas.draw()
 
     def export_graphic(self):
+        # While a tile pyramid is written the button cancels it
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            self.status_label.setText("Cancelling export...")
+            return
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
         fileName, _ = QFileDialog.getSaveFileName(
-            self, "QFileDialog.getSaveFileName()", "", "All Files (*);;Vector Files (*.svg);;PDF Files (*.pdf)", options=options)
-        if fileName:
-            if '.pdf' in fileName:
-                self.canvas.fig.savefig(fileName, format='pdf')
-            elif '.svg' in fileName:
-                self.canvas.fig.savefig(fileName, format='svg')
-            else:
+            self, "QFileDialog.getSaveFileName()", "", "All Files (*);;Vector Files (*.svg);;PDF Files (*.pdf);;Deep Zoom (*.dzi)",
+            options=options)
+        if not fileName:
+            return
+        stats = RenderStats()
+        if self.preview is not None:
+            stats.count_layout(self.preview.layout)
+        if fileName.endswith('.dzi'):
+            # Tile pyramid of the shown layout, for mosaics too big for one image
+            if self.preview is None:
+                self.status_label.setText("Nothing to export yet, generate the code first")
+                return
+            # Thousands of tiles take a while, write them in an ExportWorker like generate_code renders
+            worker = ExportWorker(self.preview, fileName, resolve_palette(), stats, self)
+            worker.progress.connect(self.show_export_progress)
+            worker.exported.connect(self.show_exported)
+            worker.failed.connect(self.status_label.setText)
+            worker.finished.connect(self.export_finished)
+            self.export_worker = worker
+            self.export_btn.setText("Cancel Export")
+            self.status_label.setText(f"Exporting {os.path.basename(fileName)}...")
+            worker.start()
+            return
+        elif self.native_checkbox.isChecked():
+            # The canvas is not kept up to date, export the shown layout with matplotlib directly
+            if self.preview is None:
+                return
+            fmt = 'pdf' if '.pdf' in fileName else 'svg'
+            if '.pdf' not in fileName and '.svg' not in fileName:
                 fileName += '.svg'  # Default to SVG if no format specified
-                self.canvas.fig.savefig(fileName, format='svg')
-
-
-def generate_alphabet_square(ax, square_symbol_obj, offset_x=0, offset_y=0, symbol_text=False, line_width=1):
+            from mpl_render import write_layout
+            with stats.stage('export'):
+                write_layout(self.preview.layout, fileName, fmt, resolve_palette(), self.preview.symbol_text,
+                             self.preview.line_width)
+        elif self.canvas is None:
+            self.status_label.setText("Nothing to export yet, generate the code first")
+            return
+        else:
+            with stats.stage('export'):
+                if '.pdf' in fileName:
+                    self.canvas.fig.savefig(fileName, format='pdf')
+                elif '.svg' in fileName:
+                    self.canvas.fig.savefig(fileName, format='svg')
+                else:
+                    fileName += '.svg'  # Default to SVG if no format specified
+                    self.canvas.fig.savefig(fileName, format='svg')
+        self.show_exported(fileName, stats)
+
+    def show_exported(self, fileName, stats):
+        logger.info("Exported %s: %s", fileName, stats.summary())
+        self.status_label.setText(f"Exported {os.path.basename(fileName)}: {stats.summary()}")
+
+    def show_export_progress(self, written, total):
+        if not self.export_worker.cancelled:
+            self.status_label.setText(f"Exporting {os.path.basename(self.export_worker.file_name)}: "
+                                      f"{written} of {total} tiles")
+
+    def export_finished(self):
+        if self.export_worker.cancelled:
+            self.status_label.setText("Export cancelled")
+        self.export_worker = None
+        self.export_btn.setText("Export Vector Graphic")
+
+
+def generate_alphabet_square(ax, square_symbol_obj, offset_x=0, offset_y=0, symbol_text=False, line_width=1,
+                             stats=None):
     """
     Generate an image of a square with polygons defined explicitly without vertex markers.
     :param symbol: Character or symbol to label the square with.
     :param colors: List of colors for the edges of the polygons.
+    :param stats: RenderStats to add the time ('patches') and polygons of this square to.
     """
 
-    # Define polygons with explicit vertices
-    case_1 = [
-        # Coordinates for each vertex
-        np.array([[0, 0], [0, 3], [1, 3], [1, 1]]),
-        np.array([[1, 1], [1, 3], [3, 3]]),
-        np.array([[0, 0], [1, 0], [1, 1]]),
-        np.array([[1, 0], [1, 1], [2, 2], [2, 0]]),
-        np.array([[2, 0], [2, 2], [3, 3], [3, 0]])
-    ]
-    case_2 = [
-        np.array([[0, 0], [0, 3], [1, 3], [1, 1]]),
-        np.array([[1, 1], [1, 3], [2, 3], [2, 2]]),
-        np.array([[2, 2], [2, 3], [3, 3]]),
-        np.array([[0, 0], [2, 2], [2, 0]]),
-        np.array([[2, 0], [2, 2], [3, 3], [3, 0]]),
-    ]
-    case_3 = [
-        np.array([[0, 3], [1, 3], [1, 2]]),
-        np.array([[1, 2], [1, 3], [2, 3], [2, 1]]),
-        np.array([[2, 1], [2, 3], [3, 3], [3, 0]]),
-        np.array([[0, 0], [0, 3], [1, 2], [1, 0]]),
-        np.array([[1, 0], [1, 2], [3, 0]]),
-    ]
-    case_4 = [
-        np.array([[0, 3], [2, 3], [2, 1]]),
-        np.array([[2, 1], [2, 3], [3, 3], [3, 0]]),
-        np.array([[0, 0], [0, 3], [1, 2], [1, 0]]),
-        np.array([[1, 0], [1, 2], [2, 1], [2, 0]]),
-        np.array([[2, 0], [2, 1], [3, 0]]),
-    ]
-    cases = [case_1, case_2, case_3, case_4]
-
-    # Get the current axis for plotting
-    # ax = plt.gca()
-
-    # Apply colors
-    num_colors = len(square_symbol_obj.get_color_lst())
-    for i, polygon in enumerate(cases[square_symbol_obj.get_case() - 1]):
-        color = square_symbol_obj.get_color_lst()[i % num_colors]
-        polygon = polygon + np.array([offset_x,  -offset_y])
-
-        # Create a patch object for each polygon, specifying edges and linewidth
-        ax.add_patch(Patches.Polygon(polygon, fill=True,
-                     edgecolor='black', facecolor=color, linewidth=line_width))
+    import matplotlib.patches as Patches
+
+    # Apply colors, resolved to RGBA once per palette change
+    color_lst = square_symbol_obj.get_rgba()
+    num_colors = len(color_lst)
+    offset = np.array([offset_x, -offset_y])
+    polygons = case_polygons(square_symbol_obj.get_case())
+    with timed(stats, 'patches'):
+        for i, polygon in enumerate(polygons):
+            color = color_lst[i % num_colors]
+            polygon = polygon + offset
+
+            # Create a patch object for each polygon, specifying edges and linewidth
+            ax.add_patch(Patches.Polygon(polygon, fill=True,
+                         edgecolor='black', facecolor=color, linewidth=line_width))
+    if stats is not None:
+        stats.glyphs += 1
+        stats.polygons += len(polygons)
+        stats.vertices += sum(len(polygon) for polygon in polygons)
 
     # Calculate the center of the square for placing the text
     # Assuming all your squares are of size 3x3 based on the given cases
@@ -296,279 +678,77 @@ def generate_alphabet_square(ax, square_symbol_obj, offset_x=0, offset_y=0, symb
                 fontsize=12, color='b', weight='bold')
 
 
-def plot_sentence(ax, sentence, row_num=6, col_num=6, symbol_text=False, line_width=1):
+def plot_sentence(ax, sentence, row_num=6, col_num=6, symbol_text=False, line_width=1, batched=False, stats=None,
+                  registry=SYMBOLS):
     """
     Plot a sentence with each character offset by 3 times its index in either columns or rows.
     :param sentence: The sentence to render.
-    :param symbols_dict: Dictionary of SquareSymbol objects for each character.
     :param row_num: Expected number of rows in the grid.
     :param col_num: Expected number of columns in the grid.
+    :param batched: Draw every polygon through a single PolyCollection instead of one patch each.
+    :param stats: RenderStats to record the 'encode', 'layout' and 'artists' stages and the counts in.
+    :param registry: SymbolRegistry of the alphabet to draw with.
     """
+    import matplotlib.patches as Patches
+    import matplotlib.pyplot as plt
+    from mpl_render import draw_layout, draw_outline, draw_symbol_text
 
     # PREPROCESSING
-    processed_lst = []
-    for idx, symbol in enumerate(sentence.upper()):
-        if symbol.isspace():  # Skip spaces
-            continue
-         # Default to just the character itself if not decomposed
-        components = decomposition_dict.get(
-            symbol, (symbol,))
-        for component in components:
-            processed_lst.append(component)
-    print("Length of processed sentence is " + str(len(processed_lst)))
-    for idx, char in enumerate(processed_lst):
-        # Calculate offset based on index
-        # Horizontal offset (left to right)
-        offset_x = (idx % col_num) * 3
-        # Vertical offset (top to bottom)
-        offset_y = (idx // col_num) * 3
-        # Generate square with offset
-        generate_alphabet_square(
-            ax, symbols_dict[char], offset_x, offset_y, symbol_text, line_width=line_width)
-
-    # Set the x-axis limits to accommodate all columns
-    ax.set_xlim(0, col_num * 3)
-    # Set the y-axis limits to accommodate all rows
-    ax.set_ylim(-row_num*3, row_num * 3)
-    # Maintain aspect ratio
-    ax.set_aspect('equal')
-    # Hide axis
-    ax.axis('off')
+    with timed(stats, 'encode'):
+        glyph_ids = encode_sentence(sentence, registry=registry)
+    logger.debug("Length of processed sentence is %d", len(glyph_ids))
+    with timed(stats, 'layout'):
+        layout = layout_glyphs(glyph_ids, row_num, col_num, glyph_table(registry))
+    if stats is not None:
+        stats.count_layout(layout)
+
+    with timed(stats, 'artists'):
+        if batched:
+            # One PolyCollection for the whole sentence
+            draw_layout(ax, layout, resolve_palette(), symbol_text, line_width)
+        else:
+            # Create a filled patch object for each polygon, the shared edges are stroked once on top
+            face_colors = layout.face_colors(color_choice_dict.rgba())
+            for polygon, color in zip(layout.polygons(), face_colors):
+                ax.add_patch(Patches.Polygon(polygon, fill=True, edgecolor='none', facecolor=color, linewidth=0))
+            if line_width:
+                draw_outline(ax, layout, line_width)
+            # Add text at the center of every square
+            if symbol_text:
+                draw_symbol_text(ax, layout)
+
+    format_grid_axes(ax, layout.bounds())
 
     plt.show()
 
 
-class SquareSymbol:
-    def __init__(self, symbol_txt, color_keys_lst, case):
-        self.symbol_txt = symbol_txt
-        self.color_keys_lst = color_keys_lst
-        self.case = case  # This is the new attribute for case number
-
-    # def get_color_lst(self):
-    #     return self.color_lst
-
-    def get_color_lst(self):
-        # Dynamically retrieve current colors from the global dictionary
-        return [color_dict[color_choice_dict[key]] for key in self.color_keys_lst]
-
-    def get_case(self):
-        return self.case
-
-
-# Color dictionary for easier color management
-color_dict = {
-    'red': '#FF0000',
-    'green': '#00FF00',
-    'blue': '#0000FF',
-    'yellow': '#FFFF00',
-    'magenta': '#FF00FF',
-    'cyan': '#00FFFF',
-    'white': '#FFFFFF',
-    'grey': '#404040',
-    'black': '#000000',
-    'custom': '#AABBCC'
-}
-
-color_choice_dict = {
-    'color_1': 'red',
-    'color_2': 'white',
-    'color_3': 'grey',
-}
-
-# Example usage with a list of colors
-# only use red, grey and white colors
-symbols_dict = {
-    'A': SquareSymbol('A', ['color_1', 'color_2', 'color_2', 'color_1', 'color_3'], 1),
-    'B': SquareSymbol('B', ['color_1', 'color_2', 'color_3', 'color_1', 'color_3'], 1),
-    'C': SquareSymbol('C', ['color_1', 'color_3', 'color_2', 'color_1', 'color_2'], 1),
-    'D': SquareSymbol('D', ['color_1', 'color_3', 'color_3', 'color_1', 'color_2'], 1),
-    'E': SquareSymbol('E', ['color_2', 'color_3', 'color_3', 'color_2', 'color_1'], 1),
-    'F': SquareSymbol('F', ['color_2', 'color_3', 'color_1', 'color_2', 'color_1'], 1),
-    'G': SquareSymbol('G', ['color_2', 'color_1', 'color_3', 'color_2', 'color_3'], 1),
-    'H': SquareSymbol('H', ['color_2', 'color_1', 'color_1', 'color_2', 'color_3'], 1),
-    'I': SquareSymbol('I', ['color_3', 'color_1', 'color_1', 'color_3', 'color_2'], 1),
-    'J': SquareSymbol('J', ['color_3', 'color_1', 'color_2', 'color_3', 'color_2'], 1),
-    'K': SquareSymbol('K', ['color_3', 'color_2', 'color_1', 'color_3', 'color_1'], 1),
-    'L': SquareSymbol('L', ['color_3', 'color_2', 'color_2', 'color_3', 'color_1'], 1),
-    'M': SquareSymbol('M', ['color_1', 'color_2', 'color_2', 'color_3', 'color_1'], 1),
-    'N': SquareSymbol('N', ['color_1', 'color_3', 'color_3', 'color_2', 'color_1'], 1),
-    'O': SquareSymbol('O', ['color_1', 'color_3', 'color_2', 'color_2', 'color_1'], 2),
-    'P': SquareSymbol('P', ['color_1', 'color_2', 'color_3', 'color_3', 'color_1'], 2),
-    'Q': SquareSymbol('Q', ['color_2', 'color_3', 'color_3', 'color_1', 'color_2'], 1),
-    'R': SquareSymbol('R', ['color_2', 'color_1', 'color_1', 'color_3', 'color_2'], 1),
-    'S': SquareSymbol('S', ['color_2', 'color_1', 'color_3', 'color_3', 'color_2'], 2),
-    'T': SquareSymbol('T', ['color_2', 'color_3', 'color_1', 'color_1', 'color_2'], 2),
-    'U': SquareSymbol('U', ['color_3', 'color_1', 'color_1', 'color_2', 'color_3'], 1),
-    'V': SquareSymbol('V', ['color_3', 'color_2', 'color_2', 'color_1', 'color_3'], 1),
-    'W': SquareSymbol('W', ['color_3', 'color_2', 'color_1', 'color_1', 'color_3'], 2),
-    'X': SquareSymbol('X', ['color_3', 'color_1', 'color_2', 'color_2', 'color_3'], 2),
-    'Y': SquareSymbol('Y', ['color_3', 'color_1', 'color_2', 'color_2', 'color_1'], 2),
-    'Z': SquareSymbol('Z', ['color_3', 'color_1', 'color_3', 'color_2', 'color_1'], 2),
-    '0': SquareSymbol('0', ['color_2', 'color_1', 'color_2', 'color_3', 'color_1'], 2),
-    '1': SquareSymbol('1', ['color_2', 'color_1', 'color_3', 'color_3', 'color_1'], 2),
-    '2': SquareSymbol('2', ['color_1', 'color_2', 'color_3', 'color_3', 'color_1'], 2),
-    '3': SquareSymbol('3', ['color_1', 'color_2', 'color_1', 'color_3', 'color_2'], 2),
-    '4': SquareSymbol('4', ['color_3', 'color_2', 'color_3', 'color_1', 'color_2'], 2),
-    '5': SquareSymbol('5', ['color_3', 'color_2', 'color_1', 'color_1', 'color_2'], 2),
-    '6': SquareSymbol('6', ['color_2', 'color_3', 'color_1', 'color_1', 'color_3'], 2),
-    '7': SquareSymbol('7', ['color_2', 'color_3', 'color_2', 'color_1', 'color_3'], 2),
-    '8': SquareSymbol('8', ['color_1', 'color_3', 'color_1', 'color_2', 'color_3'], 2),
-    '9': SquareSymbol('9', ['color_1', 'color_3', 'color_2', 'color_2', 'color_3'], 2),
-
-    '.': SquareSymbol('-', ['color_2', 'color_1', 'color_3', 'color_1', 'color_2'], 3),
-    ',': SquareSymbol(',', ['color_2', 'color_1', 'color_2', 'color_1', 'color_3'], 3),
-    '?': SquareSymbol('?', ['color_3', 'color_1', 'color_2', 'color_1', 'color_3'], 3),
-    '!': SquareSymbol('!', ['color_3', 'color_2', 'color_1', 'color_2', 'color_3'], 3),
-    '\'': SquareSymbol('\'', ['color_3', 'color_2', 'color_3', 'color_2', 'color_1'], 3),
-    '\"': SquareSymbol('\"', ['color_1', 'color_2', 'color_3', 'color_2', 'color_1'], 3),
-    '-': SquareSymbol('-', ['color_1', 'color_3', 'color_2', 'color_3', 'color_1'], 3),
-    '/': SquareSymbol('/', ['color_1', 'color_3', 'color_1', 'color_3', 'color_2'], 3),
-    ':': SquareSymbol(':', ['color_2', 'color_3', 'color_1', 'color_3', 'color_2'], 3),
-    ';': SquareSymbol(';', ['color_2', 'color_1', 'color_1', 'color_3', 'color_2'], 4),
-    '(': SquareSymbol('(', ['color_3', 'color_1', 'color_1', 'color_2', 'color_3'], 4),
-    ')': SquareSymbol(')', ['color_3', 'color_2', 'color_2', 'color_1', 'color_3'], 4),
-    '&': SquareSymbol('&', ['color_1', 'color_2', 'color_2', 'color_3', 'color_1'], 4),
-    '@': SquareSymbol('@', ['color_1', 'color_3', 'color_3', 'color_2', 'color_1'], 4),
-    '\\': SquareSymbol('\\', ['color_2', 'color_3', 'color_3', 'color_1', 'color_2'], 4),
-    '[': SquareSymbol('[', ['color_2', 'color_1', 'color_3', 'color_1', 'color_2'], 4),
-    ']': SquareSymbol(']', ['color_2', 'color_1', 'color_3', 'color_1', 'color_3'], 4),
-    '{': SquareSymbol('{', ['color_3', 'color_1', 'color_2', 'color_1', 'color_2'], 4),
-    '}': SquareSymbol('}', ['color_3', 'color_1', 'color_2', 'color_1', 'color_3'], 4),
-    '<': SquareSymbol('<', ['color_3', 'color_2', 'color_1', 'color_2', 'color_3'], 4),
-    '>': SquareSymbol('>', ['color_3', 'color_2', 'color_1', 'color_2', 'color_1'], 4),
-    '#': SquareSymbol('#', ['color_1', 'color_2', 'color_3', 'color_2', 'color_3'], 4),
-    '%': SquareSymbol('%', ['color_1', 'color_2', 'color_3', 'color_2', 'color_1'], 4),
-    '_': SquareSymbol('_', ['color_1', 'color_3', 'color_2', 'color_3', 'color_1'], 4),
-    '*': SquareSymbol('*', ['color_1', 'color_3', 'color_2', 'color_3', 'color_2'], 4),
-    '+': SquareSymbol('+', ['color_2', 'color_3', 'color_1', 'color_3', 'color_1'], 4),
-    '=': SquareSymbol('=', ['color_2', 'color_3', 'color_1', 'color_3', 'color_2'], 4),
-
-    # moon
-    '˅': SquareSymbol('˅', ['color_3', 'color_1', 'color_3', 'color_1', 'color_2'], 3),
-    # circumflex
-    '^': SquareSymbol('^', ['color_1', 'color_2', 'color_1', 'color_2', 'color_3'], 3),
-    # horn
-    '◌̛': SquareSymbol('◌̛', ['color_2', 'color_3', 'color_2', 'color_3', 'color_1'], 3),
-    # d_bar
-    'đ': SquareSymbol('đ', ['color_2', 'color_3', 'color_1', 'color_1', 'color_2'], 3),
-    'acute': SquareSymbol('acute', ['color_3', 'color_1', 'color_2', 'color_2', 'color_3'], 3),
-    # grave
-    '`': SquareSymbol('`', ['color_1', 'color_2', 'color_3', 'color_3', 'color_1'], 3),
-    # hook
-    'ʔ': SquareSymbol('ʔ', ['color_1', 'color_3', 'color_2', 'color_2', 'color_1'], 3),
-    # dau nga (tilde)
-    '~': SquareSymbol('~', ['color_2', 'color_1', 'color_3', 'color_3', 'color_2'], 3),
-    '•': SquareSymbol('•', ['color_3', 'color_2', 'color_1', 'color_1', 'color_3'], 3),
-}
-
-
-decomposition_dict = {
-    # Vowels with acute accent
-    'Á': ('A', 'acute'), 'á': ('a', 'acute'),
-    'É': ('E', 'acute'), 'é': ('e', 'acute'),
-    'Í': ('I', 'acute'), 'í': ('i', 'acute'),
-    'Ó': ('O', 'acute'), 'ó': ('o', 'acute'),
-    'Ú': ('U', 'acute'), 'ú': ('u', 'acute'),
-    'Ý': ('Y', 'acute'), 'ý': ('y', 'acute'),
-
-    # Vowels with ` accent
-    'À': ('A', '`'), 'à': ('a', '`'),
-    'È': ('E', '`'), 'è': ('e', '`'),
-    'Ì': ('I', '`'), 'ì': ('i', '`'),
-    'Ò': ('O', '`'), 'ò': ('o', '`'),
-    'Ù': ('U', '`'), 'ù': ('u', '`'),
-    'Ỳ': ('Y', '`'), 'ỳ': ('y', '`'),
-
-    # Vowels with ʔ above
-    'Ả': ('A', 'ʔ'), 'ả': ('a', 'ʔ'),
-    'Ẻ': ('E', 'ʔ'), 'ẻ': ('e', 'ʔ'),
-    'Ỉ': ('I', 'ʔ'), 'ỉ': ('i', 'ʔ'),
-    'Ỏ': ('O', 'ʔ'), 'ỏ': ('o', 'ʔ'),
-    'Ủ': ('U', 'ʔ'), 'ủ': ('u', 'ʔ'),
-    'Ỷ': ('Y', 'ʔ'), 'ỷ': ('y', 'ʔ'),
-
-    # Vowels with ~
-    'Ã': ('A', '~'), 'ã': ('a', '~'),
-    'Ẽ': ('E', '~'), 'ẽ': ('e', '~'),
-    'Ĩ': ('I', '~'), 'ĩ': ('i', '~'),
-    'Õ': ('O', '~'), 'õ': ('o', '~'),
-    'Ũ': ('U', '~'), 'ũ': ('u', '~'),
-    'Ỹ': ('Y', '~'), 'ỹ': ('y', '~'),
-
-    # Vowels with • below
-    'Ạ': ('A', '•'), 'ạ': ('a', '•'),
-    'Ẹ': ('E', '•'), 'ẹ': ('e', '•'),
-    'Ị': ('I', '•'), 'ị': ('i', '•'),
-    'Ọ': ('O', '•'), 'ọ': ('o', '•'),
-    'Ụ': ('U', '•'), 'ụ': ('u', '•'),
-    'Ỵ': ('Y', '•'), 'ỵ': ('y', '•'),
-
-    # ^
-    'Â': ('A', '^'), 'â': ('a', '^'),
-    'Ê': ('E', '^'), 'ê': ('e', '^'),
-    'Ô': ('O', '^'), 'ô': ('o', '^'),
-
-    # ◌̛
-    'Ơ': ('O', '◌̛'), 'ơ': ('o', '◌̛'),
-    'Ư': ('U', '◌̛'), 'ư': ('u', '◌̛'),
-
-    # Breve
-    'Ă': ('A', '˅'), 'ă': ('a', '˅'),
-
-    # Special case for D with stroke
-    'Đ': ('D', 'đ'), 'đ': ('d', 'đ'),
-
-    # Combinations with ^ and acute, `, ʔ, ~, •
-    'Ấ': ('A', '^', 'acute'), 'ấ': ('a', '^', 'acute'),
-    'Ầ': ('A', '^', '`'), 'ầ': ('a', '^', '`'),
-    'Ẩ': ('A', '^', 'ʔ'), 'ẩ': ('a', '^', 'ʔ'),
-    'Ẫ': ('A', '^', '~'), 'ẫ': ('a', '^', '~'),
-    'Ậ': ('A', '^', '•'), 'ậ': ('a', '^', '•'),
-
-    # Combinations with ◌̛ and acute, `, ʔ, ~, •
-    'Ớ': ('O', '◌̛', 'acute'), 'ớ': ('o', '◌̛', 'acute'),
-    'Ờ': ('O', '◌̛', '`'), 'ờ': ('o', '◌̛', '`'),
-    'Ở': ('O', '◌̛', 'ʔ'), 'ở': ('o', '◌̛', 'ʔ'),
-    'Ỡ': ('O', '◌̛', '~'), 'ỡ': ('o', '◌̛', '~'),
-    'Ợ': ('O', '◌̛', '•'), 'ợ': ('o', '◌̛', '•'),
-    'Ứ': ('U', '◌̛', 'acute'), 'ứ': ('u', '◌̛', 'acute'),
-    'Ừ': ('U', '◌̛', '`'), 'ừ': ('u', '◌̛', '`'),
-    'Ử': ('U', '◌̛', 'ʔ'), 'ử': ('u', '◌̛', 'ʔ'),
-    'Ữ': ('U', '◌̛', '~'), 'ữ': ('u', '◌̛', '~'),
-    'Ự': ('U', '◌̛', '•'), 'ự': ('u', '◌̛', '•'),
-
-    # Combinations with ˅ and acute, `, ʔ, ~, •
-    'Ắ': ('A', '˅', 'acute'), 'ắ': ('a', '˅', 'acute'),
-    'Ằ': ('A', '˅', '`'), 'ằ': ('a', '˅', '`'),
-    'Ẳ': ('A', '˅', 'ʔ'), 'ẳ': ('a', '˅', 'ʔ'),
-    'Ẵ': ('A', '˅', '~'), 'ẵ': ('a', '˅', '~'),
-    'Ặ': ('A', '˅', '•'), 'ặ': ('a', '˅', '•'),
-
-    # Additional entries can be added for any specific use-cases or missing characters:
-    'Ế': ('E', '^', 'acute'), 'ế': ('e', '^', 'acute'),
-    'Ề': ('E', '^', '`'), 'ề': ('e', '^', '`'),
-    'Ể': ('E', '^', 'ʔ'), 'ể': ('e', '^', 'ʔ'),
-    'Ễ': ('E', '^', '~'), 'ễ': ('e', '^', '~'),
-    'Ệ': ('E', '^', '•'), 'ệ': ('e', '^', '•'),
-
-    'Ố': ('O', '^', 'acute'), 'ố': ('o', '^', 'acute'),
-    'Ồ': ('O', '^', '`'), 'ồ': ('o', '^', '`'),
-    'Ổ': ('O', '^', 'ʔ'), 'ổ': ('o', '^', 'ʔ'),
-    'Ỗ': ('O', '^', '~'), 'ỗ': ('o', '^', '~'),
-    'Ộ': ('O', '^', '•'), 'ộ': ('o', '^', '•'),
-
-    # Additional diacritics or modified letters could be defined similarly,
-    # ensuring all required combinations are covered.
-    '$': ('S', 'đ'),
-
-}
+def format_grid_axes(ax, bounds):
+    """
+    Set the limits and look of axes showing a grid.
+    :param bounds: (x_min, x_max, y_min, y_max), e.g. from SentenceLayout.bounds(), the same
+        extent the file backends use.
+    """
+    x_min, x_max, y_min, y_max = bounds
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+    # Maintain aspect ratio
+    ax.set_aspect('equal')
+    # Hide axis
+    ax.axis('off')
 
 
 def main():
+    # SQUARE_CODE_PROFILE=cprofile|tracemalloc profiles the whole session, the result is logged on exit
+    # and written to SQUARE_CODE_PROFILE_OUTPUT if set
+    profile_mode = os.environ.get('SQUARE_CODE_PROFILE') or None
+    logging.basicConfig(level=os.environ.get('SQUARE_CODE_LOG_LEVEL', 'INFO' if profile_mode else 'WARNING'),
+                        format="%(name)s: %(message)s")
     app = QApplication(sys.argv)
-    gui = SquareCodeGUI()
-    gui.show()
-    sys.exit(app.exec_())
+    with profiled(profile_mode, os.environ.get('SQUARE_CODE_PROFILE_OUTPUT')):
+        gui = SquareCodeGUI()
+        gui.show()
+        status = app.exec_()
+    sys.exit(status)
 
 
 use_gui = True
@@ -578,6 +758,8 @@ if __name__ == '__main__':
     if use_gui:
         main()
     else:
+        import matplotlib.pyplot as plt
+
         sentence = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
         sentence2 = ".,?!\'\"-/:;()&@\\[]{}<>#%_*+-ĂÂƠĐÁÀẢÃẠ"
         sentence3 = "ARCHITECTHOÀNGCÔNGHUÂN"
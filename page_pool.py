@@ -0,0 +1,65 @@
+"""
+Process pool for rendering many pages in parallel.
+
+Pages are encoded and cut in the parent and shipped to the workers as compact
+glyph-ID arrays; every worker lays out and renders its pages with its own copy
+of the backend, so no matplotlib or Cairo objects ever cross process boundaries.
+"""
+import importlib
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from layout import GLYPH_TABLE, layout_glyphs
+
+# Per-worker state set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(backend_name, fmt, palette, row_num, col_num, table, options):
+    _worker.update(backend=importlib.import_module(backend_name), fmt=fmt, palette=palette,
+                   row_num=row_num, col_num=col_num, table=table, options=options)
+
+
+def _render_page(glyph_ids, path):
+    layout = layout_glyphs(glyph_ids, _worker['row_num'], _worker['col_num'], _worker['table'])
+    write_layout = _worker['backend'].write_layout
+    if path is not None:
+        with open(path, 'wb') as f:
+            write_layout(layout, f, _worker['fmt'], _worker['palette'], **_worker['options'])
+        return path
+    buf = io.BytesIO()
+    write_layout(layout, buf, _worker['fmt'], _worker['palette'], **_worker['options'])
+    return buf.getvalue()
+
+
+def render_pages(pages, backend_name, fmt, palette, row_num=6, col_num=6, path_pattern=None,
+                 workers=None, table=GLYPH_TABLE, **options):
+    """
+    Render pages in a process pool, yielding results in page order.
+    At most a few pages per worker are in flight, so pages may come from a generator
+    like streaming.iter_pages without the whole document being held in memory.
+    :param pages: Iterable of glyph-ID arrays into table, one per page.
+    :param backend_name: Module name of the rendering backend, e.g. 'svg_writer'.
+    :param fmt: Output format the backend can write.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param row_num: Rows per page.
+    :param col_num: Columns per page.
+    :param path_pattern: Output path with a {page} field; when None the rendered bytes are returned.
+    :param workers: Number of worker processes, defaults to the CPU count.
+    :param table: GlyphTable the IDs refer to, sent to every worker once.
+    :param options: Passed on to the backend's write_layout (symbol_text, line_width, ...).
+    :return: Iterator of file paths, or of bytes when path_pattern is None.
+    """
+    workers = workers or os.cpu_count() or 1
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(backend_name, fmt, palette, row_num, col_num, table, options)) as pool:
+        for page, glyph_ids in enumerate(pages, start=1):
+            path = path_pattern.format(page=page) if path_pattern is not None else None
+            in_flight.append(pool.submit(_render_page, glyph_ids, path))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
@@ -0,0 +1,169 @@
+"""
+Optional timing and profiling of the rendering pipeline.
+
+Code that can be measured takes a stats=None argument and wraps its stages in
+timed(stats, name); without a RenderStats this costs one function call. For a
+deeper look, profiled() runs a block under cProfile or tracemalloc and dumps
+what it found.
+"""
+import logging
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from glyphs import CASE_RANGES, POLYGON_OFFSETS
+
+logger = logging.getLogger(__name__)
+
+# Modes profiled() understands
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+# Number of functions or allocation sites logged by profiled()
+PROFILE_TOP = 25
+
+# Polygons and vertices per 0-based case
+CASE_POLYGON_COUNTS = CASE_RANGES[:, 1] - CASE_RANGES[:, 0]
+CASE_VERTEX_COUNTS = POLYGON_OFFSETS[CASE_RANGES[:, 1]] - POLYGON_OFFSETS[CASE_RANGES[:, 0]]
+
+
+def peak_memory():
+    """
+    Peak memory of the process in bytes: the tracemalloc peak while tracing,
+    otherwise the peak resident set size, None where neither is known.
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RenderStats:
+    """
+    Wall time per stage and the size of what was rendered.
+    Stages entered more than once add up, e.g. 'patches' over every generate_alphabet_square call.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.glyphs = 0
+        self.polygons = 0
+        self.vertices = 0
+        self.peak_memory = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            peak = peak_memory()
+            if peak is not None:
+                self.peak_memory = max(peak, self.peak_memory or 0)
+
+    def count_layout(self, layout):
+        """
+        Count the glyphs, polygons and vertices of a SentenceLayout.
+        """
+        self.glyphs += len(layout)
+        self.polygons += len(layout.color_slots)
+        self.vertices += len(layout.vertices)
+
+    def count_glyphs(self, glyph_ids, table):
+        """
+        Count glyph IDs into a GlyphTable without laying them out.
+        """
+        cases = table.cases[glyph_ids]
+        self.glyphs += len(cases)
+        self.polygons += int(CASE_POLYGON_COUNTS[cases].sum())
+        self.vertices += int(CASE_VERTEX_COUNTS[cases].sum())
+
+    @property
+    def total(self):
+        return sum(self.stages.values())
+
+    def as_dict(self):
+        return {'stages': dict(self.stages), 'total': self.total, 'glyphs': self.glyphs,
+                'polygons': self.polygons, 'vertices': self.vertices, 'peak_memory': self.peak_memory}
+
+    def summary(self):
+        """
+        One line for a status bar or a log, e.g. '625 glyphs, 3125 polygons ... | encode 1.2 ms, ...'.
+        """
+        parts = []
+        if self.glyphs:
+            parts.append(f"{self.glyphs} glyphs, {self.polygons} polygons, {self.vertices} vertices")
+        if self.peak_memory is not None:
+            parts.append(f"peak {self.peak_memory / (1 << 20):.0f} MB")
+        text = ", ".join(parts)
+        if self.stages:
+            text += " | " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.stages.items())
+        return text
+
+    def __repr__(self):
+        return f"RenderStats({self.summary()})"
+
+
+def timed(stats, name):
+    """
+    Time a stage into stats, or do nothing when stats is None.
+    """
+    return nullcontext() if stats is None else stats.stage(name)
+
+
+@contextmanager
+def profiled(mode, output=None):
+    """
+    Run a block under a profiler and dump the result when it ends.
+    :param mode: 'cprofile', 'tracemalloc', or None to not profile.
+    :param output: File for the raw result (pstats data or a tracemalloc snapshot);
+        the top entries are logged either way.
+    """
+    if mode is None:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"unknown profile mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+
+    if mode == 'cprofile':
+        # Only needed when profiling, kept off the import path of the GUI
+        import cProfile
+        import io
+        import pstats
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            if output is not None:
+                profile.dump_stats(output)
+            text = io.StringIO()
+            pstats.Stats(profile, stream=text).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            logger.info("cProfile results:\n%s", text.getvalue())
+        return
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if not was_tracing:
+            tracemalloc.stop()
+        if output is not None:
+            snapshot.dump(output)
+        lines = [str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP]]
+        logger.info("tracemalloc peak %.1f MB, top allocations:\n%s", peak / (1 << 20), "\n".join(lines))
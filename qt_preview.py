@@ -0,0 +1,142 @@
+"""
+Preview widget that paints laid-out sentences straight through QPainter.
+
+Every distinct glyph (case plus the colours of its polygons) is painted once
+from cached QPolygonF outlines into a pixmap tile of the current cell size; a
+paint is then one drawPixmap per visible cell, with no Agg buffer or image copy
+in between.
+"""
+import numpy as np
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QBrush, QColor, QFont, QPainter, QPen, QPixmap, QPolygonF
+from PyQt5.QtWidgets import QWidget
+
+from glyphs import CASE_RANGES, CELL_SIZE, NUM_CASES, case_polygons
+
+# Outline polygons of every case, in cell units
+CASE_QPOLYGONS = tuple(
+    tuple(QPolygonF([QPointF(x, y) for x, y in polygon.tolist()]) for polygon in case_polygons(case))
+    for case in range(1, NUM_CASES + 1)
+)
+
+
+class GlyphView(QWidget):
+    """
+    Show a SentenceLayout scaled to fit the widget, with the same colours, outlines
+    and labels as the matplotlib preview.
+    """
+
+    def __init__(self, parent=None):
+        super(GlyphView, self).__init__(parent)
+        self.layout = None
+        self.palette = ()
+        self.line_width = 1
+        self.symbol_text = False
+        # (case, colour slots) -> QPixmap of tile_px pixels, cleared when the palette,
+        # line width or cell size changes
+        self.tiles = {}
+        self.tile_px = None
+        self.cells = []
+        self.setMinimumSize(200, 200)
+
+    def set_layout(self, layout, palette, line_width=1, symbol_text=False):
+        """
+        Show a new layout.
+        :param layout: SentenceLayout from layout.layout_glyphs.
+        :param palette: Colours indexed like symbols.COLOR_SLOTS.
+        :param line_width: Outline width in pixels.
+        :param symbol_text: Label every square with its symbol.
+        """
+        self.layout = layout
+        self.symbol_text = symbol_text
+        if line_width != self.line_width:
+            self.line_width = line_width
+            self.tiles.clear()
+        self.set_palette(palette)
+
+        # Plain Python tuples per cell, the paint loop should not touch NumPy scalars
+        table = layout.table
+        rows, cols = divmod(np.arange(len(layout)), layout.col_num)
+        cases = table.cases[layout.glyph_ids].tolist()
+        num_polygons = (CASE_RANGES[:, 1] - CASE_RANGES[:, 0]).tolist()
+        slots = [tuple(row[:num_polygons[case]]) for row, case in
+                 zip(table.polygon_slots[layout.glyph_ids].tolist(), cases)]
+        self.cells = list(zip(rows.tolist(), cols.tolist(), cases, slots, layout.glyph_ids.tolist()))
+        self.update()
+
+    def set_palette(self, palette):
+        """
+        Recolour the shown layout.
+        """
+        palette = tuple(palette)
+        if palette != self.palette:
+            self.palette = palette
+            self.tiles.clear()
+        self.update()
+
+    def tile(self, case, slots, cell_px):
+        """
+        Pixmap of one glyph, painted on first use at the current cell size.
+        """
+        if cell_px != self.tile_px:
+            self.tiles.clear()
+            self.tile_px = cell_px
+        tile = self.tiles.get((case, slots))
+        if tile is None:
+            ratio = self.devicePixelRatioF()
+            tile = self.tiles[case, slots] = QPixmap(round(cell_px * ratio), round(cell_px * ratio))
+            tile.setDevicePixelRatio(ratio)
+            tile.fill(Qt.white)
+            painter = QPainter(tile)
+            painter.setRenderHint(QPainter.Antialiasing)
+            # Cell units to pixels, y axis pointing up like in the layout
+            painter.scale(cell_px / CELL_SIZE, -cell_px / CELL_SIZE)
+            painter.translate(0, -CELL_SIZE)
+            pen = QPen(Qt.black)
+            pen.setWidthF(self.line_width)
+            # Cosmetic, so the width stays in pixels whatever the scale
+            pen.setCosmetic(True)
+            pen.setJoinStyle(Qt.MiterJoin)
+            painter.setPen(pen)
+            for polygon, slot in zip(CASE_QPOLYGONS[case], slots):
+                painter.setBrush(QBrush(QColor(self.palette[slot])))
+                painter.drawPolygon(polygon)
+            painter.end()
+        return tile
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        # Ended on every path, an active painter left behind breaks the next paint of the widget
+        try:
+            painter.fillRect(self.rect(), Qt.white)
+            if self.layout is None:
+                return
+            # Whole pixels per cell, so tiles line up without seams
+            row_num, col_num = self.layout.row_num, self.layout.col_num
+            cell_px = max(1, min(self.width() // col_num, self.height() // row_num))
+            left = (self.width() - col_num * cell_px) // 2
+            top = (self.height() - row_num * cell_px) // 2
+
+            # Only cells that intersect the exposed area
+            exposed = event.rect()
+            col_0, col_1 = (exposed.left() - left) // cell_px, (exposed.right() - left) // cell_px
+            row_0, row_1 = (exposed.top() - top) // cell_px, (exposed.bottom() - top) // cell_px
+            cells = [cell for cell in self.cells if row_0 <= cell[0] <= row_1 and col_0 <= cell[1] <= col_1]
+            for row, col, case, slots, _ in cells:
+                painter.drawPixmap(left + col * cell_px, top + row * cell_px, self.tile(case, slots, cell_px))
+
+            if self.symbol_text:
+                self.draw_symbol_text(painter, cells, left, top, cell_px)
+        finally:
+            painter.end()
+
+    def draw_symbol_text(self, painter, cells, left, top, cell_px):
+        painter.setPen(QColor('blue'))
+        font = QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        painter.setFont(font)
+        symbols = self.layout.table.symbols
+        for row, col, _, _, glyph_id in cells:
+            rect = QRectF(left + col * cell_px, top + row * cell_px, cell_px, cell_px)
+            painter.drawText(rect, Qt.AlignCenter, symbols[glyph_id].symbol_txt)
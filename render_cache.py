@@ -0,0 +1,215 @@
+"""
+Cache of finished output files keyed by a hash of everything that affects them.
+
+Batch jobs keep encoding the same sentences (names, logos, repeated labels). A
+RenderCache keeps the rendered bytes in a size-bounded LRU in memory and,
+optionally, in a directory shared between runs, so a repeated job is one hash
+and one lookup per output.
+"""
+import hashlib
+import io
+import os
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from layout import GLYPH_TABLE, layout_glyphs
+
+# Digest of every GlyphTable in use, computed once per table
+_TABLE_DIGESTS = weakref.WeakKeyDictionary()
+
+
+def table_digest(table):
+    """
+    Hash of what a GlyphTable draws, so caches never mix up alphabets.
+    """
+    digest = _TABLE_DIGESTS.get(table)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(table.keys).encode('utf-8'))
+        h.update(repr([symbol.symbol_txt for symbol in table.symbols]).encode('utf-8'))
+        h.update(np.ascontiguousarray(table.cases, dtype=np.int64).tobytes())
+        h.update(np.ascontiguousarray(table.polygon_slots).tobytes())
+        digest = _TABLE_DIGESTS[table] = h.hexdigest()
+    return digest
+
+
+class RenderCache:
+    """
+    LRU of rendered output bytes, bounded by total size, with an optional disk tier.
+    hits, disk_hits and misses count lookups since creation.
+    The disk tier is indexed in memory, scanned once when the cache is created; files that
+    other processes add to a shared directory later join the index when they are read.
+    """
+
+    def __init__(self, max_bytes=64 << 20, directory=None, max_disk_bytes=1 << 30):
+        """
+        :param max_bytes: Total size of the in-memory entries.
+        :param directory: Directory for the on-disk tier, None for memory only.
+        :param max_disk_bytes: Total size of the on-disk entries; the least recently used go first.
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        # Disk entries, least recently used first, and their total size
+        self.disk_entries = OrderedDict()
+        self.disk_size = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._scan_disk()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(glyph_ids, row_num, col_num, fmt, palette, backend_name, table=GLYPH_TABLE, **options):
+        """
+        Hash of everything that goes into an output file.
+        :param glyph_ids: Glyph IDs into table.
+        :param options: The backend options, e.g. symbol_text and line_width.
+        :return: Hex digest.
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(np.ascontiguousarray(glyph_ids, dtype=np.int64).tobytes())
+        params = (row_num, col_num, fmt, tuple(c.upper() for c in palette), backend_name, table_digest(table),
+                  sorted(options.items()))
+        h.update(repr(params).encode('utf-8'))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """
+        Cached bytes for a key, or None; counts a hit or a miss.
+        """
+        data = self.entries.get(key)
+        if data is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return data
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                # The modification time orders the disk tier for eviction in later runs
+                os.utime(path)
+                self._index_disk(key, len(data))
+                self.disk_hits += 1
+                self._remember(key, data)
+                return data
+        self.misses += 1
+        return None
+
+    def put(self, key, data):
+        """
+        Store rendered bytes in memory and, if enabled, on disk.
+        """
+        self._remember(key, data)
+        if self.directory is not None:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so concurrent jobs never read half a file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self._index_disk(key, len(data))
+            self._trim_disk()
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def _scan_disk(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                # Only entries this class wrote, not temporary or unrelated files
+                if not name.endswith('.tmp') and path == self._path(name):
+                    stat = os.stat(path)
+                    files.append((stat.st_mtime, stat.st_size, name))
+        for _, size, key in sorted(files):
+            self._index_disk(key, size)
+        self._trim_disk()
+
+    def _index_disk(self, key, size):
+        old_size = self.disk_entries.pop(key, None)
+        if old_size is not None:
+            self.disk_size -= old_size
+        self.disk_entries[key] = size
+        self.disk_size += size
+
+    def _trim_disk(self):
+        while self.disk_size > self.max_disk_bytes and self.disk_entries:
+            key, size = self.disk_entries.popitem(last=False)
+            self.disk_size -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                # Already evicted by another process sharing the directory
+                pass
+
+    def clear(self):
+        """
+        Drop the in-memory entries; the disk tier is left alone.
+        """
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'entries': len(self.entries), 'bytes': self.size,
+                'disk_entries': len(self.disk_entries), 'disk_bytes': self.disk_size}
+
+    def summary(self):
+        """
+        One line for a log, e.g. 'cache 3 hits, 1 disk hits, 2 misses, 5 entries, 12.3 kB'.
+        """
+        text = f"cache {self.hits} hits, {self.disk_hits} disk hits, {self.misses} misses, " \
+               f"{len(self.entries)} entries, {self.size / 1000:.1f} kB"
+        if self.directory is not None:
+            text += f", {len(self.disk_entries)} on disk, {self.disk_size / 1000:.1f} kB"
+        return text
+
+    def render(self, backend, glyph_ids, row_num, col_num, fmt, palette, table=GLYPH_TABLE, **options):
+        """
+        Rendered output of a sentence, laid out and rendered only on a miss.
+        :param backend: Rendering backend module with write_layout().
+        :param glyph_ids: Glyph IDs into table, e.g. from encoder.encode_sentence.
+        :param row_num: Rows of the grid.
+        :param col_num: Columns of the grid.
+        :param fmt: A format in backend.FORMATS.
+        :param palette: Colours indexed like symbols.COLOR_SLOTS.
+        :param table: GlyphTable the IDs refer to.
+        :param options: Passed on to backend.write_layout (symbol_text, line_width, ...).
+        :return: The file contents as bytes.
+        """
+        key = self.key(glyph_ids, row_num, col_num, fmt, palette, backend.__name__, table, **options)
+        data = self.get(key)
+        if data is None:
+            layout = layout_glyphs(glyph_ids, row_num, col_num, table)
+            buf = io.BytesIO()
+            backend.write_layout(layout, buf, fmt, palette, **options)
+            data = buf.getvalue()
+            self.put(key, data)
+        return data
@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
 import matplotlib.patches as Patches
-import numpy as np
+
+from glyphs import case_polygons
 
 
 class SquareSymbol:
@@ -23,44 +24,12 @@ def generate_alphabet_square(ax, square_symbol_obj):
     :param colors: List of colors for the edges of the polygons.
     """
 
-    # Define polygons with explicit vertices
-    case_1 = [
-        # Coordinates for each vertex
-        np.array([[0, 0], [0, 3], [1, 3], [1, 1]]),
-        np.array([[1, 1], [1, 3], [3, 3]]),
-        np.array([[0, 0], [1, 0], [1, 1]]),
-        np.array([[1, 0], [1, 1], [2, 2], [2, 0]]),
-        np.array([[2, 0], [2, 2], [3, 3], [3, 0]])
-    ]
-    case_2 = [
-        np.array([[0, 0], [0, 3], [1, 3], [1, 1]]),
-        np.array([[1, 1], [1, 3], [2, 3], [3, 3]]),
-        np.array([[2, 2], [2, 3], [3, 3]]),
-        np.array([[0, 0], [2, 0], [2, 2]]),
-        np.array([[2, 0], [2, 2], [3, 0], [3, 3]]),
-    ]
-    case_3 = [
-        np.array([[0, 3], [1, 3], [1, 2]]),
-        np.array([[1, 2], [1, 3], [2, 3], [2, 1]]),
-        np.array([[2, 3], [2, 1], [3, 3], [3, 0]]),
-        np.array([[0, 0], [0, 3], [1, 2], [1, 0]]),
-        np.array([[1, 0], [1, 2], [3, 0]]),
-    ]
-    case_4 = [
-        np.array([[0, 3], [2, 1], [2, 3]]),
-        np.array([[2, 3], [2, 1], [3, 0], [3, 3]]),
-        np.array([[0, 0], [0, 3], [1, 2], [1, 0]]),
-        np.array([[1, 0], [1, 2], [2, 1], [2, 0]]),
-        np.array([[2, 0], [2, 1], [3, 0]]),
-    ]
-    cases = [case_1, case_2, case_3, case_4]
-
     # Get the current axis for plotting
     ax = plt.gca()
 
     # Apply colors cyclically based on available colors in the input
     num_colors = len(square_symbol_obj.get_color_lst())
-    for i, polygon in enumerate(cases[square_symbol_obj.get_case() - 1]):
+    for i, polygon in enumerate(case_polygons(square_symbol_obj.get_case())):
         color = square_symbol_obj.get_color_lst()[i % num_colors]
         # Create a patch object for each polygon, specifying edges and linewidth
         ax.add_patch(Patches.Polygon(polygon, fill=True,
@@ -0,0 +1,309 @@
+"""
+Headless batch encoder.
+
+    python -m square_code encode [options] [FILE ...]
+    python -m square_code decode [options] FILE ...
+
+encode reads sentences from the given files (or stdin when none, or for '-') and
+writes one SVG/PDF/PNG, or with --pyramid one deep-zoom tile pyramid, per
+input; decode prints the text of SVG or PNG output. Only the geometry/layout
+core and the selected rendering backend are imported, never PyQt5 or pyplot.
+"""
+import argparse
+import importlib
+import logging
+import math
+import os
+import sys
+
+from encoder import UNKNOWN_POLICIES, SentenceEncoder, UnknownSymbolError
+from layout import glyph_table
+from symbols import COLOR_SLOTS, SYMBOLS, SymbolRegistry, color_choice_dict, color_dict
+
+# The paging, caching, profiling and pyramid modules are imported by the commands that use them, only
+# their choices are copied here for the parser (test_square_code checks they stay the same)
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+PYRAMID_LAYOUTS = ('dzi', 'xyz')
+
+# Rendering backends by name: (module, formats), in order of preference.
+# Each module provides FORMATS and write_layout().
+BACKENDS = {
+    'svg': ('svg_writer', ('svg',)),
+    'tiles': ('tile_atlas', ('png',)),
+    'cairo': ('cairo_test', ('png', 'pdf', 'svg')),
+    'matplotlib': ('mpl_render', ('svg', 'pdf', 'png')),
+}
+
+
+def load_backend(name, fmt):
+    """
+    Import a rendering backend only when it is used.
+    :param name: Key of BACKENDS, or None for the first installed one that can write fmt.
+    :param fmt: Output format.
+    :return: The backend module.
+    """
+    if name is not None:
+        module, formats = BACKENDS[name]
+        if fmt not in formats:
+            raise SystemExit(f"error: backend '{name}' cannot write {fmt}")
+        try:
+            return importlib.import_module(module)
+        except ImportError as e:
+            raise SystemExit(f"error: backend '{name}' is not available: {e}")
+
+    for module, formats in BACKENDS.values():
+        if fmt not in formats:
+            continue
+        try:
+            return importlib.import_module(module)
+        except ImportError:
+            # Optional dependency (e.g. pycairo) not installed, try the next one
+            continue
+    raise SystemExit(f"error: no installed backend can write {fmt}")
+
+
+def load_alphabet(path):
+    """
+    Glyph table and decompositions of an alphabet file, or of the built-in alphabet.
+    :param path: JSON or TOML file as written by SymbolRegistry.save, or None.
+    :return: (GlyphTable, decompositions)
+    """
+    if path is None:
+        return glyph_table(SYMBOLS), SYMBOLS.decompositions
+    try:
+        registry = SymbolRegistry.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        raise SystemExit(f"error: {path}: {e}")
+    return glyph_table(registry), registry.decompositions
+
+
+def open_inputs(paths):
+    """
+    Yield (name, text file) for every input.
+    :param paths: Input file paths, '-' means stdin. Empty reads stdin.
+    """
+    for path in paths or ['-']:
+        if path == '-':
+            yield 'stdin', sys.stdin
+        else:
+            with open(path, encoding='utf-8') as f:
+                yield os.path.splitext(os.path.basename(path))[0], f
+
+
+def read_inputs(paths, per_line=False):
+    """
+    Yield (name, sentence) for every input.
+    :param paths: Input file paths, '-' means stdin. Empty reads stdin.
+    :param per_line: Treat every non-blank line as its own sentence.
+    """
+    for name, f in open_inputs(paths):
+        text = f.read()
+        if not per_line:
+            yield name, text
+            continue
+        lines = [line for line in text.splitlines() if line.strip()]
+        for line_num, line in enumerate(lines, start=1):
+            yield f"{name}-{line_num}", line
+
+
+def encode_paged(args, backend, palette, stats=None):
+    # Stream every input page by page so memory does not grow with the input size
+    from page_pool import render_pages
+    from profiling import timed
+    from streaming import iter_pages, iter_text_chunks, write_document, write_page_files
+
+    row_num = args.rows or args.cols
+    table, decompositions = load_alphabet(args.alphabet)
+    encoder = SentenceEncoder(table, decompositions, unknown=args.unknown)
+    options = dict(symbol_text=args.symbol_text, line_width=args.line_width)
+    for name, f in open_inputs(args.inputs):
+        try:
+            with timed(stats, 'render'):
+                if args.format in getattr(backend, 'PAGED_FORMATS', ()):
+                    out_path = os.path.join(args.output_dir, f"{name}.{args.format}")
+                    write_document(f, out_path, args.format, backend, palette, row_num, args.cols, encoder,
+                                   **options)
+                    paths = [out_path]
+                else:
+                    pattern = os.path.join(args.output_dir, name.replace('{', '{{').replace('}', '}}'))
+                    pattern += f"-{{page:04d}}.{args.format}"
+                    if args.workers == 1:
+                        paths = write_page_files(f, pattern, args.format, backend, palette,
+                                                 row_num, args.cols, encoder, **options)
+                    else:
+                        pages = iter_pages(iter_text_chunks(f), row_num, args.cols, encoder)
+                        paths = list(render_pages(pages, backend.__name__, args.format, palette, row_num,
+                                                  args.cols, pattern, args.workers or None, table, **options))
+        except UnknownSymbolError as e:
+            raise SystemExit(f"error: {name}: {e}")
+        if not args.quiet:
+            print("\n".join(paths))
+
+
+def encode(args):
+    palette = [color_dict[name] for name in args.palette]
+    os.makedirs(args.output_dir, exist_ok=True)
+    stats = None
+    if args.stats:
+        from profiling import RenderStats
+        stats = RenderStats()
+    if args.pyramid:
+        if args.paged:
+            raise SystemExit("error: --pyramid and --paged cannot be combined")
+        encode_pyramids(args, palette, stats)
+    elif args.paged:
+        encode_paged(args, load_backend(args.backend, args.format), palette, stats)
+    else:
+        encode_sentences(args, load_backend(args.backend, args.format), palette, stats)
+    if stats is not None:
+        print(stats.summary(), file=sys.stderr)
+
+
+def encode_sentences(args, backend, palette, stats=None):
+    # One file per input, or per line with --per-line
+    from profiling import timed
+    from render_cache import RenderCache
+
+    table, decompositions = load_alphabet(args.alphabet)
+    encoder = SentenceEncoder(table, decompositions, unknown=args.unknown)
+    # Repeated sentences (within this run, or across runs with --cache-dir) are rendered once
+    cache = RenderCache(directory=args.cache_dir)
+    for name, sentence in read_inputs(args.inputs, args.per_line):
+        try:
+            with timed(stats, 'encode'):
+                glyph_ids = encoder.encode(sentence)
+        except UnknownSymbolError as e:
+            raise SystemExit(f"error: {name}: {e}")
+        if stats is not None:
+            stats.count_glyphs(glyph_ids, table)
+        row_num = args.rows or max(1, math.ceil(len(glyph_ids) / args.cols))
+        with timed(stats, 'render'):
+            data = cache.render(backend, glyph_ids, row_num, args.cols, args.format, palette, table,
+                                symbol_text=args.symbol_text, line_width=args.line_width)
+
+        out_path = os.path.join(args.output_dir, f"{name}.{args.format}")
+        with timed(stats, 'write'), open(out_path, 'wb') as f:
+            f.write(data)
+        if not args.quiet:
+            print(out_path)
+    if stats is not None:
+        print(cache.summary(), file=sys.stderr)
+
+
+def encode_pyramids(args, palette, stats=None):
+    # One tile pyramid per input, always PNG tiles from the tile atlas
+    from profiling import timed
+    from tile_pyramid import TilePyramid, write_pyramid
+
+    table, decompositions = load_alphabet(args.alphabet)
+    encoder = SentenceEncoder(table, decompositions, unknown=args.unknown)
+    for name, sentence in read_inputs(args.inputs, args.per_line):
+        try:
+            with timed(stats, 'encode'):
+                glyph_ids = encoder.encode(sentence)
+        except UnknownSymbolError as e:
+            raise SystemExit(f"error: {name}: {e}")
+        if stats is not None:
+            stats.count_glyphs(glyph_ids, table)
+        pyramid = TilePyramid(glyph_ids, args.cols, palette, args.rows, table, tile_size=args.tile_size,
+                              line_width=args.line_width, symbol_text=args.symbol_text)
+        out_path = os.path.join(args.output_dir, f"{name}.dzi" if args.pyramid == 'dzi' else name)
+        with timed(stats, 'render'):
+            write_pyramid(pyramid, out_path, args.pyramid, args.workers)
+        if not args.quiet:
+            print(out_path)
+
+
+def decode(args):
+    # Imported here so encoding never pays for the decoder tables
+    from decoder import GlyphDecoder
+
+    table, decompositions = load_alphabet(args.alphabet)
+    decoder = GlyphDecoder(table, [color_dict[name] for name in args.palette], decompositions)
+    for path in args.inputs:
+        if not path.lower().endswith('.svg') and args.cols is None:
+            raise SystemExit(f"error: {path}: --cols is needed to decode raster images")
+        try:
+            if path.lower().endswith('.svg'):
+                glyph_ids = decoder.read_svg(path)
+            else:
+                glyph_ids = decoder.read_image(path, args.cols, args.rows)
+        # ElementTree's ParseError and Pillow's "not a PNG file" are SyntaxErrors
+        except (OSError, SyntaxError, ValueError) as e:
+            raise SystemExit(f"error: {path}: {e}")
+        print(decoder.text(glyph_ids))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='square_code', description="Square code encoder")
+    parser.add_argument('--profile', default=None, choices=PROFILE_MODES,
+                        help="run under cProfile or tracemalloc and log the top entries to stderr")
+    parser.add_argument('--profile-output', default=None, metavar='FILE',
+                        help="also write the pstats data or tracemalloc snapshot to FILE")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enc = subparsers.add_parser('encode', help="encode sentences to graphics files")
+    enc.add_argument('inputs', nargs='*', metavar='FILE',
+                     help="text files to encode, '-' or nothing for stdin")
+    enc.add_argument('-f', '--format', default='svg', help="output format (default: svg)")
+    enc.add_argument('-o', '--output-dir', default='.', help="directory for the output files")
+    enc.add_argument('-b', '--backend', default=None, choices=list(BACKENDS),
+                     help="rendering backend (default: the first one that supports the format)")
+    enc.add_argument('-c', '--cols', type=int, default=6, help="number of columns (default: 6)")
+    enc.add_argument('-r', '--rows', type=int, default=None,
+                     help="number of rows (default: just enough for the text, or cols with --paged)")
+    enc.add_argument('--line-width', type=float, default=1.0)
+    enc.add_argument('--symbol-text', action='store_true', help="label every square with its symbol")
+    enc.add_argument('--palette', nargs=len(COLOR_SLOTS), default=[color_choice_dict[slot] for slot in COLOR_SLOTS],
+                     choices=sorted(color_dict), metavar='COLOR',
+                     help="colour names for " + ", ".join(COLOR_SLOTS))
+    enc.add_argument('--alphabet', default=None, metavar='FILE',
+                     help="JSON or TOML alphabet to use instead of the built-in one")
+    enc.add_argument('--unknown', default='raise', choices=UNKNOWN_POLICIES,
+                     help="what to do with characters that have no symbol (default: raise)")
+    enc.add_argument('--paged', action='store_true',
+                     help="stream long inputs into pages of rows x cols glyphs: one multi-page document "
+                          "for pdf, numbered files otherwise")
+    enc.add_argument('--pyramid', default=None, choices=PYRAMID_LAYOUTS,
+                     help="write a deep-zoom tile pyramid of PNG tiles instead of one file: <name>.dzi with "
+                          "<name>_files, or <name>/{z}/{x}/{y}.png")
+    enc.add_argument('--tile-size', type=int, default=256, help="tile size in pixels with --pyramid (default: 256)")
+    enc.add_argument('-j', '--workers', type=int, default=1,
+                     help="with --paged and one file per page, or with --pyramid, render in this many processes "
+                          "(0: one per CPU, default: 1)")
+    enc.add_argument('--cache-dir', default=None, metavar='DIR',
+                     help="keep rendered files in DIR and reuse them for identical inputs in later runs")
+    enc.add_argument('--per-line', action='store_true', help="write one file per non-blank input line")
+    enc.add_argument('-q', '--quiet', action='store_true', help="do not print the written paths")
+    enc.add_argument('--stats', action='store_true',
+                     help="print the time per stage, glyph counts, peak memory and render cache hits to stderr")
+    enc.set_defaults(func=encode)
+
+    dec = subparsers.add_parser('decode', help="read the text back from SVG or PNG output")
+    dec.add_argument('inputs', nargs='+', metavar='FILE', help="SVG or PNG files to decode")
+    dec.add_argument('-c', '--cols', type=int, default=None, help="number of columns, needed for PNG")
+    dec.add_argument('-r', '--rows', type=int, default=None,
+                     help="number of rows of a PNG (default: from the image size)")
+    dec.add_argument('--palette', nargs=len(COLOR_SLOTS), default=[color_choice_dict[slot] for slot in COLOR_SLOTS],
+                     choices=sorted(color_dict), metavar='COLOR',
+                     help="colour names the files were written with, for " + ", ".join(COLOR_SLOTS))
+    dec.add_argument('--alphabet', default=None, metavar='FILE',
+                     help="JSON or TOML alphabet the files were written with")
+    dec.set_defaults(func=decode)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.profile else logging.WARNING, format="%(name)s: %(message)s")
+    if args.profile is None:
+        args.func(args)
+        return
+    from profiling import profiled
+
+    with profiled(args.profile, args.profile_output):
+        args.func(args)
+
+
+if __name__ == '__main__':
+    main()
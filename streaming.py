@@ -0,0 +1,122 @@
+"""
+Streaming encoder for texts of any length.
+
+Text is read in chunks, encoded to glyph IDs, cut into pages of row_num x col_num
+glyphs and every page is laid out, rendered and flushed before more text is read,
+so peak memory depends on the chunk and page size only, never on the input size.
+"""
+import unicodedata
+
+import numpy as np
+
+from encoder import SentenceEncoder, UnknownSymbolError
+from layout import layout_glyphs
+
+# Characters read from the input per chunk
+CHUNK_CHARS = 1 << 16
+
+
+def iter_text_chunks(file, chunk_chars=CHUNK_CHARS):
+    """
+    Read a text file in chunks that never split a character from its combining marks,
+    so normalizing each chunk on its own gives the same result as normalizing the whole text.
+    :param file: Text file-like object.
+    :param chunk_chars: Characters per read.
+    """
+    pending = ''
+    while True:
+        chunk = file.read(chunk_chars)
+        if not chunk:
+            break
+        text = pending + chunk
+        # Hold back the last base character and any marks after it, the next chunk may add more
+        cut = len(text) - 1
+        while cut > 0 and unicodedata.combining(text[cut]):
+            cut -= 1
+        pending = text[cut:]
+        if cut:
+            yield text[:cut]
+    if pending:
+        yield pending
+
+
+def iter_pages(chunks, row_num=6, col_num=6, encoder=None):
+    """
+    Cut an encoded stream of text chunks into full pages of glyph IDs.
+    :param chunks: Iterable of text chunks, e.g. iter_text_chunks(file).
+    :param row_num: Rows per page.
+    :param col_num: Columns per page.
+    :param encoder: SentenceEncoder, defaults to the built-in alphabet raising on unknown characters.
+    :return: Iterator of 1-D glyph-ID arrays of row_num * col_num glyphs; the last one may be shorter.
+    :raises UnknownSymbolError: With its position counted from the start of the (normalized) stream.
+    """
+    encoder = encoder or SentenceEncoder()
+    page_size = row_num * col_num
+    pending = np.empty(0, dtype=encoder.dtype)
+    # Characters of the normalized stream before the current chunk
+    offset = 0
+    for chunk in chunks:
+        if encoder.normalization:
+            # Normalized here to count the characters; encoding it again is just a quick check
+            chunk = unicodedata.normalize(encoder.normalization, chunk)
+        try:
+            glyph_ids = encoder.encode(chunk)
+        except UnknownSymbolError as e:
+            raise UnknownSymbolError(e.char, offset + e.position) from None
+        offset += len(chunk)
+        if len(pending):
+            glyph_ids = np.concatenate((pending, glyph_ids))
+        num_full = len(glyph_ids) // page_size * page_size
+        for start in range(0, num_full, page_size):
+            yield glyph_ids[start:start + page_size]
+        # Copy so the chunk's array can be freed
+        pending = glyph_ids[num_full:].copy()
+    if len(pending):
+        yield pending
+
+
+def iter_page_layouts(chunks, row_num=6, col_num=6, encoder=None):
+    """
+    Lay out every page of a text stream, see iter_pages.
+    :return: Iterator of SentenceLayout, one per page.
+    """
+    encoder = encoder or SentenceEncoder()
+    for glyph_ids in iter_pages(chunks, row_num, col_num, encoder):
+        yield layout_glyphs(glyph_ids, row_num, col_num, encoder.table)
+
+
+def write_document(file, out, fmt, backend, palette, row_num=6, col_num=6, encoder=None, **kwargs):
+    """
+    Encode a whole text file into one multi-page document, one page at a time.
+    :param file: Text file-like object to read.
+    :param out: Path or binary file-like object for the document.
+    :param fmt: A format in backend.PAGED_FORMATS.
+    :param backend: Rendering backend module with write_pages().
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param kwargs: Passed on to backend.write_pages (symbol_text, line_width, ...).
+    :return: Number of pages written.
+    """
+    layouts = iter_page_layouts(iter_text_chunks(file), row_num, col_num, encoder)
+    return backend.write_pages(layouts, out, fmt, palette, **kwargs)
+
+
+def write_page_files(file, path_pattern, fmt, backend, palette, row_num=6, col_num=6, encoder=None,
+                     **kwargs):
+    """
+    Encode a whole text file into one output file per page.
+    :param file: Text file-like object to read.
+    :param path_pattern: Output path with a {page} field, e.g. 'book-{page:04d}.svg'.
+    :param fmt: A format in backend.FORMATS.
+    :param backend: Rendering backend module with write_layout().
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param kwargs: Passed on to backend.write_layout (symbol_text, line_width, ...).
+    :return: List of the written paths.
+    """
+    paths = []
+    layouts = iter_page_layouts(iter_text_chunks(file), row_num, col_num, encoder)
+    for page, layout in enumerate(layouts, start=1):
+        path = path_pattern.format(page=page)
+        with open(path, 'wb') as f:
+            backend.write_layout(layout, f, fmt, palette, **kwargs)
+        paths.append(path)
+    return paths
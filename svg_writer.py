@@ -0,0 +1,159 @@
+"""
+Native SVG backend.
+
+Every case polygon is written once into <defs>, every symbol used by the layout
+becomes a group of <use> references carrying the colour slot as a CSS class, and
+every glyph is a single <use> of its symbol group. Colours live only in the
+stylesheet, so the output grows by one short line per glyph.
+
+Polygons are only filled. Outlines are stroked once: the inner lines of every case
+are one path referenced by its symbols, and the cell borders of the whole grid are
+one path of joined lines at the end, so shared edges are never drawn twice.
+"""
+import io
+import re
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from glyphs import CELL_SIZE, CASE_RANGES, NUM_CASES, POLYGON_OFFSETS, VERTICES, unique_segments
+from symbols import COLOR_SLOTS
+
+# Output formats write_layout can produce
+FORMATS = ('svg',)
+
+# Glyph <use> lines are formatted and written in chunks of this many glyphs
+CHUNK_SIZE = 4096
+
+# Corners of a cell, the border every case is outlined with
+CELL_SQUARE = np.array([(0, 0), (CELL_SIZE, 0), (CELL_SIZE, CELL_SIZE), (0, CELL_SIZE)], dtype=np.float64)
+
+
+def _inner_segments(case):
+    # Outline segments of a case that are not on its cell border
+    first, last = CASE_RANGES[case]
+    offsets = POLYGON_OFFSETS[first:last + 1]
+    segments = unique_segments(VERTICES[offsets[0]:offsets[-1]], offsets - offsets[0])
+    on_border = np.any((segments[:, 0] == segments[:, 1]) & np.isin(segments[:, 0], (0, CELL_SIZE)), axis=1)
+    return segments[~on_border]
+
+
+# Inner outline segments per 0-based case
+CASE_INNER_SEGMENTS = tuple(_inner_segments(case) for case in range(NUM_CASES))
+
+
+def _points(polygon):
+    # SVG y grows downwards, flip inside the cell
+    return " ".join(f"{x:g},{CELL_SIZE - y:g}" for x, y in polygon)
+
+
+def _path_data(segments, height=CELL_SIZE):
+    # One move and line per segment, y flipped like _points
+    return "".join(f"M{x_0:g} {height - y_0:g}L{x_1:g} {height - y_1:g}" for (x_0, y_0), (x_1, y_1) in segments.tolist())
+
+
+def _style(palette, line_width, unit_pt):
+    # Sizes are given in points and converted to user units (plot units)
+    rules = [f".{slot}{{fill:{color}}}" for slot, color in zip(COLOR_SLOTS, palette)]
+    # Square caps close the corners where outline segments meet
+    rules.append(f".outline{{fill:none;stroke:#000000;stroke-width:{line_width / unit_pt:g};"
+                 "stroke-linecap:square}")
+    rules.append(f".label{{fill:#0000FF;font-weight:bold;font-size:{12 / unit_pt:g}px;"
+                 "text-anchor:middle;dominant-baseline:central}")
+    return "\n".join(rules)
+
+
+def recolor_svg(svg, palette):
+    """
+    Recolour a document written by this module by rewriting its stylesheet only.
+    :param svg: SVG document text.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :return: The recoloured document text.
+    """
+    for slot, color in zip(COLOR_SLOTS, palette):
+        svg = re.sub(rf"^\.{slot}{{fill:[^}}]*}}$", f".{slot}{{fill:{color}}}", svg, count=1, flags=re.MULTILINE)
+    return svg
+
+
+def iter_svg(layout, palette, symbol_text=False, line_width=1, cell_pt=36):
+    """
+    Generate the SVG document for a laid-out sentence piece by piece.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param symbol_text: Label every square with its symbol.
+    :param line_width: Width of the polygon outlines in points, like matplotlib's linewidth.
+    :param cell_pt: Size of one glyph square in points.
+    :return: Iterator of str chunks.
+    """
+    width = layout.col_num * CELL_SIZE
+    height = layout.row_num * CELL_SIZE
+    unit_pt = cell_pt / CELL_SIZE
+    yield ('<?xml version="1.0" encoding="utf-8" standalone="no"?>\n'
+           f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+           f'version="1.1" width="{width * unit_pt:g}pt" height="{height * unit_pt:g}pt" '
+           f'viewBox="0 0 {width} {height}">\n'
+           f'<style type="text/css">\n{_style(palette, line_width, unit_pt)}\n</style>\n<defs>\n')
+
+    # Every case polygon once
+    for polygon_id in range(CASE_RANGES[-1, 1]):
+        polygon = VERTICES[POLYGON_OFFSETS[polygon_id]:POLYGON_OFFSETS[polygon_id + 1]]
+        yield f'<polygon id="p{polygon_id}" points="{_points(polygon)}"/>\n'
+    # and the inner outline of every case
+    for case, segments in enumerate(CASE_INNER_SEGMENTS):
+        yield f'<path id="o{case}" class="outline" d="{_path_data(segments)}"/>\n'
+
+    # One group per symbol that is actually used
+    table = layout.table
+    used_ids = sorted(set(layout.glyph_ids.tolist()))
+    for glyph_id in used_ids:
+        case = table.cases[glyph_id]
+        first, last = CASE_RANGES[case]
+        uses = "".join(f'<use xlink:href="#p{polygon_id}" class="{COLOR_SLOTS[slot]}"/>'
+                       for polygon_id, slot in zip(range(first, last), table.polygon_slots[glyph_id]))
+        yield f'<g id="g{glyph_id}">{uses}<use xlink:href="#o{case}"/></g>\n'
+    yield '</defs>\n'
+
+    # One <use> per glyph, row 0 at the top
+    xs = layout.cell_offsets[:, 0].astype(int).tolist()
+    ys = (-layout.cell_offsets[:, 1]).astype(int).tolist()
+    glyph_ids = layout.glyph_ids.tolist()
+    for start in range(0, len(glyph_ids), CHUNK_SIZE):
+        stop = start + CHUNK_SIZE
+        yield "".join(f'<use xlink:href="#g{glyph_id}" x="{x}" y="{y}"/>\n'
+                      for glyph_id, x, y in zip(glyph_ids[start:stop], xs[start:stop], ys[start:stop]))
+
+    # Cell borders of the whole grid, every shared border once and joined into long lines
+    squares = layout.cell_offsets[:, None, :] + CELL_SQUARE
+    borders = unique_segments(squares.reshape(-1, 2), np.arange(0, len(squares) * 4 + 1, 4))
+    yield f'<path class="outline" d="{_path_data(borders)}"/>\n'
+
+    if symbol_text:
+        center = CELL_SIZE / 2
+        texts = layout.symbol_texts()
+        for start in range(0, len(texts), CHUNK_SIZE):
+            stop = start + CHUNK_SIZE
+            yield "".join(f'<text class="label" x="{x + center:g}" y="{y + center:g}">{escape(text)}</text>\n'
+                          for text, x, y in zip(texts[start:stop], xs[start:stop], ys[start:stop]))
+    yield '</svg>\n'
+
+
+def write_layout(layout, file, fmt, palette, symbol_text=False, line_width=1, cell_pt=36):
+    """
+    Stream a laid-out sentence as SVG into a file.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param file: Path, or text or binary file-like object.
+    :param fmt: Must be 'svg'.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param symbol_text: Label every square with its symbol.
+    :param line_width: Width of the polygon outlines in points.
+    :param cell_pt: Size of one glyph square in points.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"svg_writer cannot write {fmt}")
+    if isinstance(file, str):
+        with open(file, 'w', encoding='utf-8') as f:
+            return write_layout(layout, f, fmt, palette, symbol_text, line_width, cell_pt)
+
+    binary = not isinstance(file, io.TextIOBase)
+    for chunk in iter_svg(layout, palette, symbol_text, line_width, cell_pt):
+        file.write(chunk.encode('utf-8') if binary else chunk)
@@ -0,0 +1,516 @@
+import warnings
+
+from glyphs import CASE_RANGES, NUM_CASES
+
+
+class SquareSymbol:
+    # Alphabets hold many of these, no per-instance __dict__
+    __slots__ = ('symbol_txt', 'color_keys_lst', 'case', '_colors', '_rgba', '_palette_version')
+
+    def __init__(self, symbol_txt, color_keys_lst, case):
+        self.symbol_txt = symbol_txt
+        self.color_keys_lst = color_keys_lst
+        self.case = case  # This is the new attribute for case number
+        self._palette_version = None
+
+    def _resolve(self):
+        # Resolved once per palette version, later calls are a version check
+        if self._palette_version != color_choice_dict.version:
+            colors = color_choice_dict.resolve_slots()
+            self._colors = [colors[key] for key in self.color_keys_lst]
+            rgba = color_choice_dict.rgba_slots()
+            self._rgba = tuple(rgba[key] for key in self.color_keys_lst)
+            self._palette_version = color_choice_dict.version
+
+    def get_color_lst(self):
+        """
+        Current hex colour of every colour key. The list is cached, do not modify it.
+        """
+        self._resolve()
+        return self._colors
+
+    def get_rgba(self):
+        """
+        Current colour of every colour key as (r, g, b, a) floats, ready for renderers.
+        """
+        self._resolve()
+        return self._rgba
+
+    def get_case(self):
+        return self.case
+
+
+def hex_to_rgba(color):
+    """
+    Convert '#RRGGBB' to an (r, g, b, 1.0) tuple of floats in 0..1.
+    """
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) / 255 for i in (0, 2, 4)) + (1.0,)
+
+
+class Palette:
+    """
+    The colour name chosen for every colour slot.
+    Used like the dict it replaces, but every change bumps version so that colours
+    resolved from it (see SquareSymbol.get_color_lst) are only recomputed after a change.
+    """
+
+    def __init__(self, choices, colors=None):
+        """
+        :param choices: Colour slot to colour name.
+        :param colors: Colour name to '#RRGGBB', defaults to color_dict.
+        """
+        self.colors = color_dict if colors is None else colors
+        self._choices = {}
+        self.version = 0
+        self._cache = {}
+        for slot, name in choices.items():
+            self[slot] = name
+
+    def __getitem__(self, slot):
+        return self._choices[slot]
+
+    def __setitem__(self, slot, name):
+        if name not in self.colors:
+            raise KeyError(f"unknown colour {name!r}")
+        if self._choices.get(slot) != name:
+            self._choices[slot] = name
+            self.version += 1
+            self._cache.clear()
+
+    def __iter__(self):
+        return iter(self._choices)
+
+    def __len__(self):
+        return len(self._choices)
+
+    def __repr__(self):
+        return repr(self._choices)
+
+    def items(self):
+        return self._choices.items()
+
+    def keys(self):
+        return self._choices.keys()
+
+    def update(self, choices):
+        for slot, name in choices.items():
+            self[slot] = name
+
+    def _cached(self, name, compute):
+        value = self._cache.get(name)
+        if value is None:
+            value = self._cache[name] = compute()
+        return value
+
+    def resolve_slots(self):
+        """
+        Slot to '#RRGGBB', cached until the next change.
+        """
+        return self._cached('hex', lambda: {slot: self.colors[name] for slot, name in self._choices.items()})
+
+    def rgba_slots(self):
+        """
+        Slot to (r, g, b, a) floats, cached until the next change.
+        """
+        return self._cached('rgba', lambda: {slot: hex_to_rgba(color) for slot, color in self.resolve_slots().items()})
+
+    def resolve(self, slots=None):
+        """
+        Hex colours in slot order, defaults to COLOR_SLOTS order.
+        """
+        slots = COLOR_SLOTS if slots is None else slots
+        colors = self.resolve_slots()
+        return [colors[slot] for slot in slots]
+
+    def rgba(self, slots=None):
+        """
+        (r, g, b, a) colours in slot order, defaults to COLOR_SLOTS order.
+        """
+        slots = COLOR_SLOTS if slots is None else slots
+        colors = self.rgba_slots()
+        return [colors[slot] for slot in slots]
+
+
+# Color dictionary for easier color management
+color_dict = {
+    'red': '#FF0000',
+    'green': '#00FF00',
+    'blue': '#0000FF',
+    'yellow': '#FFFF00',
+    'magenta': '#FF00FF',
+    'cyan': '#00FFFF',
+    'white': '#FFFFFF',
+    'grey': '#404040',
+    'black': '#000000',
+    'custom': '#AABBCC'
+}
+
+# Current colour choices; assigning to a slot bumps color_choice_dict.version
+color_choice_dict = Palette({
+    'color_1': 'red',
+    'color_2': 'white',
+    'color_3': 'grey',
+})
+
+# Example usage with a list of colors
+# only use red, grey and white colors
+symbols_dict = {
+    'A': SquareSymbol('A', ['color_1', 'color_2', 'color_2', 'color_1', 'color_3'], 1),
+    'B': SquareSymbol('B', ['color_1', 'color_2', 'color_3', 'color_1', 'color_3'], 1),
+    'C': SquareSymbol('C', ['color_1', 'color_3', 'color_2', 'color_1', 'color_2'], 1),
+    'D': SquareSymbol('D', ['color_1', 'color_3', 'color_3', 'color_1', 'color_2'], 1),
+    'E': SquareSymbol('E', ['color_2', 'color_3', 'color_3', 'color_2', 'color_1'], 1),
+    'F': SquareSymbol('F', ['color_2', 'color_3', 'color_1', 'color_2', 'color_1'], 1),
+    'G': SquareSymbol('G', ['color_2', 'color_1', 'color_3', 'color_2', 'color_3'], 1),
+    'H': SquareSymbol('H', ['color_2', 'color_1', 'color_1', 'color_2', 'color_3'], 1),
+    'I': SquareSymbol('I', ['color_3', 'color_1', 'color_1', 'color_3', 'color_2'], 1),
+    'J': SquareSymbol('J', ['color_3', 'color_1', 'color_2', 'color_3', 'color_2'], 1),
+    'K': SquareSymbol('K', ['color_3', 'color_2', 'color_1', 'color_3', 'color_1'], 1),
+    'L': SquareSymbol('L', ['color_3', 'color_2', 'color_2', 'color_3', 'color_1'], 1),
+    'M': SquareSymbol('M', ['color_1', 'color_2', 'color_2', 'color_3', 'color_1'], 1),
+    'N': SquareSymbol('N', ['color_1', 'color_3', 'color_3', 'color_2', 'color_1'], 1),
+    'O': SquareSymbol('O', ['color_1', 'color_3', 'color_2', 'color_2', 'color_1'], 2),
+    'P': SquareSymbol('P', ['color_1', 'color_2', 'color_3', 'color_3', 'color_1'], 2),
+    'Q': SquareSymbol('Q', ['color_2', 'color_3', 'color_3', 'color_1', 'color_2'], 1),
+    'R': SquareSymbol('R', ['color_2', 'color_1', 'color_1', 'color_3', 'color_2'], 1),
+    'S': SquareSymbol('S', ['color_2', 'color_1', 'color_3', 'color_3', 'color_2'], 2),
+    'T': SquareSymbol('T', ['color_2', 'color_3', 'color_1', 'color_1', 'color_2'], 2),
+    'U': SquareSymbol('U', ['color_3', 'color_1', 'color_1', 'color_2', 'color_3'], 1),
+    'V': SquareSymbol('V', ['color_3', 'color_2', 'color_2', 'color_1', 'color_3'], 1),
+    'W': SquareSymbol('W', ['color_3', 'color_2', 'color_1', 'color_1', 'color_3'], 2),
+    'X': SquareSymbol('X', ['color_3', 'color_1', 'color_2', 'color_2', 'color_3'], 2),
+    'Y': SquareSymbol('Y', ['color_3', 'color_1', 'color_2', 'color_2', 'color_1'], 2),
+    'Z': SquareSymbol('Z', ['color_3', 'color_1', 'color_3', 'color_2', 'color_1'], 2),
+    '0': SquareSymbol('0', ['color_2', 'color_1', 'color_2', 'color_3', 'color_1'], 2),
+    '1': SquareSymbol('1', ['color_2', 'color_1', 'color_3', 'color_3', 'color_1'], 2),
+    '2': SquareSymbol('2', ['color_1', 'color_2', 'color_3', 'color_3', 'color_1'], 2),
+    '3': SquareSymbol('3', ['color_1', 'color_2', 'color_1', 'color_3', 'color_2'], 2),
+    '4': SquareSymbol('4', ['color_3', 'color_2', 'color_3', 'color_1', 'color_2'], 2),
+    '5': SquareSymbol('5', ['color_3', 'color_2', 'color_1', 'color_1', 'color_2'], 2),
+    '6': SquareSymbol('6', ['color_2', 'color_3', 'color_1', 'color_1', 'color_3'], 2),
+    '7': SquareSymbol('7', ['color_2', 'color_3', 'color_2', 'color_1', 'color_3'], 2),
+    '8': SquareSymbol('8', ['color_1', 'color_3', 'color_1', 'color_2', 'color_3'], 2),
+    '9': SquareSymbol('9', ['color_1', 'color_3', 'color_2', 'color_2', 'color_3'], 2),
+
+    '.': SquareSymbol('-', ['color_2', 'color_1', 'color_3', 'color_1', 'color_2'], 3),
+    ',': SquareSymbol(',', ['color_2', 'color_1', 'color_2', 'color_1', 'color_3'], 3),
+    '?': SquareSymbol('?', ['color_3', 'color_1', 'color_2', 'color_1', 'color_3'], 3),
+    '!': SquareSymbol('!', ['color_3', 'color_2', 'color_1', 'color_2', 'color_3'], 3),
+    '\'': SquareSymbol('\'', ['color_3', 'color_2', 'color_3', 'color_2', 'color_1'], 3),
+    '\"': SquareSymbol('\"', ['color_1', 'color_2', 'color_3', 'color_2', 'color_1'], 3),
+    '-': SquareSymbol('-', ['color_1', 'color_3', 'color_2', 'color_3', 'color_1'], 3),
+    '/': SquareSymbol('/', ['color_1', 'color_3', 'color_1', 'color_3', 'color_2'], 3),
+    ':': SquareSymbol(':', ['color_2', 'color_3', 'color_1', 'color_3', 'color_2'], 3),
+    ';': SquareSymbol(';', ['color_2', 'color_1', 'color_1', 'color_3', 'color_2'], 4),
+    '(': SquareSymbol('(', ['color_3', 'color_1', 'color_1', 'color_2', 'color_3'], 4),
+    ')': SquareSymbol(')', ['color_3', 'color_2', 'color_2', 'color_1', 'color_3'], 4),
+    '&': SquareSymbol('&', ['color_1', 'color_2', 'color_2', 'color_3', 'color_1'], 4),
+    '@': SquareSymbol('@', ['color_1', 'color_3', 'color_3', 'color_2', 'color_1'], 4),
+    '\\': SquareSymbol('\\', ['color_2', 'color_3', 'color_3', 'color_1', 'color_2'], 4),
+    '[': SquareSymbol('[', ['color_2', 'color_1', 'color_3', 'color_1', 'color_2'], 4),
+    ']': SquareSymbol(']', ['color_2', 'color_1', 'color_3', 'color_1', 'color_3'], 4),
+    '{': SquareSymbol('{', ['color_3', 'color_1', 'color_2', 'color_1', 'color_2'], 4),
+    '}': SquareSymbol('}', ['color_3', 'color_1', 'color_2', 'color_1', 'color_3'], 4),
+    '<': SquareSymbol('<', ['color_3', 'color_2', 'color_1', 'color_2', 'color_3'], 4),
+    '>': SquareSymbol('>', ['color_3', 'color_2', 'color_1', 'color_2', 'color_1'], 4),
+    '#': SquareSymbol('#', ['color_1', 'color_2', 'color_3', 'color_2', 'color_3'], 4),
+    '%': SquareSymbol('%', ['color_1', 'color_2', 'color_3', 'color_2', 'color_1'], 4),
+    '_': SquareSymbol('_', ['color_1', 'color_3', 'color_2', 'color_3', 'color_1'], 4),
+    '*': SquareSymbol('*', ['color_1', 'color_3', 'color_2', 'color_3', 'color_2'], 4),
+    '+': SquareSymbol('+', ['color_2', 'color_3', 'color_1', 'color_3', 'color_1'], 4),
+    '=': SquareSymbol('=', ['color_2', 'color_3', 'color_1', 'color_3', 'color_2'], 4),
+
+    # moon
+    '˅': SquareSymbol('˅', ['color_3', 'color_1', 'color_3', 'color_1', 'color_2'], 3),
+    # circumflex
+    '^': SquareSymbol('^', ['color_1', 'color_2', 'color_1', 'color_2', 'color_3'], 3),
+    # horn
+    '◌̛': SquareSymbol('◌̛', ['color_2', 'color_3', 'color_2', 'color_3', 'color_1'], 3),
+    # d_bar
+    'đ': SquareSymbol('đ', ['color_2', 'color_3', 'color_1', 'color_1', 'color_2'], 3),
+    'acute': SquareSymbol('acute', ['color_3', 'color_1', 'color_2', 'color_2', 'color_3'], 3),
+    # grave
+    '`': SquareSymbol('`', ['color_1', 'color_2', 'color_3', 'color_3', 'color_1'], 3),
+    # hook
+    'ʔ': SquareSymbol('ʔ', ['color_1', 'color_3', 'color_2', 'color_2', 'color_1'], 3),
+    # dau nga (tilde)
+    '~': SquareSymbol('~', ['color_2', 'color_1', 'color_3', 'color_3', 'color_2'], 3),
+    '•': SquareSymbol('•', ['color_3', 'color_2', 'color_1', 'color_1', 'color_3'], 3),
+}
+
+
+decomposition_dict = {
+    # Vowels with acute accent
+    'Á': ('A', 'acute'), 'á': ('a', 'acute'),
+    'É': ('E', 'acute'), 'é': ('e', 'acute'),
+    'Í': ('I', 'acute'), 'í': ('i', 'acute'),
+    'Ó': ('O', 'acute'), 'ó': ('o', 'acute'),
+    'Ú': ('U', 'acute'), 'ú': ('u', 'acute'),
+    'Ý': ('Y', 'acute'), 'ý': ('y', 'acute'),
+
+    # Vowels with ` accent
+    'À': ('A', '`'), 'à': ('a', '`'),
+    'È': ('E', '`'), 'è': ('e', '`'),
+    'Ì': ('I', '`'), 'ì': ('i', '`'),
+    'Ò': ('O', '`'), 'ò': ('o', '`'),
+    'Ù': ('U', '`'), 'ù': ('u', '`'),
+    'Ỳ': ('Y', '`'), 'ỳ': ('y', '`'),
+
+    # Vowels with ʔ above
+    'Ả': ('A', 'ʔ'), 'ả': ('a', 'ʔ'),
+    'Ẻ': ('E', 'ʔ'), 'ẻ': ('e', 'ʔ'),
+    'Ỉ': ('I', 'ʔ'), 'ỉ': ('i', 'ʔ'),
+    'Ỏ': ('O', 'ʔ'), 'ỏ': ('o', 'ʔ'),
+    'Ủ': ('U', 'ʔ'), 'ủ': ('u', 'ʔ'),
+    'Ỷ': ('Y', 'ʔ'), 'ỷ': ('y', 'ʔ'),
+
+    # Vowels with ~
+    'Ã': ('A', '~'), 'ã': ('a', '~'),
+    'Ẽ': ('E', '~'), 'ẽ': ('e', '~'),
+    'Ĩ': ('I', '~'), 'ĩ': ('i', '~'),
+    'Õ': ('O', '~'), 'õ': ('o', '~'),
+    'Ũ': ('U', '~'), 'ũ': ('u', '~'),
+    'Ỹ': ('Y', '~'), 'ỹ': ('y', '~'),
+
+    # Vowels with • below
+    'Ạ': ('A', '•'), 'ạ': ('a', '•'),
+    'Ẹ': ('E', '•'), 'ẹ': ('e', '•'),
+    'Ị': ('I', '•'), 'ị': ('i', '•'),
+    'Ọ': ('O', '•'), 'ọ': ('o', '•'),
+    'Ụ': ('U', '•'), 'ụ': ('u', '•'),
+    'Ỵ': ('Y', '•'), 'ỵ': ('y', '•'),
+
+    # ^
+    'Â': ('A', '^'), 'â': ('a', '^'),
+    'Ê': ('E', '^'), 'ê': ('e', '^'),
+    'Ô': ('O', '^'), 'ô': ('o', '^'),
+
+    # ◌̛
+    'Ơ': ('O', '◌̛'), 'ơ': ('o', '◌̛'),
+    'Ư': ('U', '◌̛'), 'ư': ('u', '◌̛'),
+
+    # Breve
+    'Ă': ('A', '˅'), 'ă': ('a', '˅'),
+
+    # Special case for D with stroke
+    'Đ': ('D', 'đ'), 'đ': ('d', 'đ'),
+
+    # Combinations with ^ and acute, `, ʔ, ~, •
+    'Ấ': ('A', '^', 'acute'), 'ấ': ('a', '^', 'acute'),
+    'Ầ': ('A', '^', '`'), 'ầ': ('a', '^', '`'),
+    'Ẩ': ('A', '^', 'ʔ'), 'ẩ': ('a', '^', 'ʔ'),
+    'Ẫ': ('A', '^', '~'), 'ẫ': ('a', '^', '~'),
+    'Ậ': ('A', '^', '•'), 'ậ': ('a', '^', '•'),
+
+    # Combinations with ◌̛ and acute, `, ʔ, ~, •
+    'Ớ': ('O', '◌̛', 'acute'), 'ớ': ('o', '◌̛', 'acute'),
+    'Ờ': ('O', '◌̛', '`'), 'ờ': ('o', '◌̛', '`'),
+    'Ở': ('O', '◌̛', 'ʔ'), 'ở': ('o', '◌̛', 'ʔ'),
+    'Ỡ': ('O', '◌̛', '~'), 'ỡ': ('o', '◌̛', '~'),
+    'Ợ': ('O', '◌̛', '•'), 'ợ': ('o', '◌̛', '•'),
+    'Ứ': ('U', '◌̛', 'acute'), 'ứ': ('u', '◌̛', 'acute'),
+    'Ừ': ('U', '◌̛', '`'), 'ừ': ('u', '◌̛', '`'),
+    'Ử': ('U', '◌̛', 'ʔ'), 'ử': ('u', '◌̛', 'ʔ'),
+    'Ữ': ('U', '◌̛', '~'), 'ữ': ('u', '◌̛', '~'),
+    'Ự': ('U', '◌̛', '•'), 'ự': ('u', '◌̛', '•'),
+
+    # Combinations with ˅ and acute, `, ʔ, ~, •
+    'Ắ': ('A', '˅', 'acute'), 'ắ': ('a', '˅', 'acute'),
+    'Ằ': ('A', '˅', '`'), 'ằ': ('a', '˅', '`'),
+    'Ẳ': ('A', '˅', 'ʔ'), 'ẳ': ('a', '˅', 'ʔ'),
+    'Ẵ': ('A', '˅', '~'), 'ẵ': ('a', '˅', '~'),
+    'Ặ': ('A', '˅', '•'), 'ặ': ('a', '˅', '•'),
+
+    # Additional entries can be added for any specific use-cases or missing characters:
+    'Ế': ('E', '^', 'acute'), 'ế': ('e', '^', 'acute'),
+    'Ề': ('E', '^', '`'), 'ề': ('e', '^', '`'),
+    'Ể': ('E', '^', 'ʔ'), 'ể': ('e', '^', 'ʔ'),
+    'Ễ': ('E', '^', '~'), 'ễ': ('e', '^', '~'),
+    'Ệ': ('E', '^', '•'), 'ệ': ('e', '^', '•'),
+
+    'Ố': ('O', '^', 'acute'), 'ố': ('o', '^', 'acute'),
+    'Ồ': ('O', '^', '`'), 'ồ': ('o', '^', '`'),
+    'Ổ': ('O', '^', 'ʔ'), 'ổ': ('o', '^', 'ʔ'),
+    'Ỗ': ('O', '^', '~'), 'ỗ': ('o', '^', '~'),
+    'Ộ': ('O', '^', '•'), 'ộ': ('o', '^', '•'),
+
+    # Additional diacritics or modified letters could be defined similarly,
+    # ensuring all required combinations are covered.
+    '$': ('S', 'đ'),
+
+}
+
+
+# Names of the colour slots a SquareSymbol can refer to, in slot-index order
+COLOR_SLOTS = ('color_1', 'color_2', 'color_3')
+
+
+def resolve_palette():
+    """
+    Resolve every colour slot to its current hex colour.
+    :return: List of hex colours indexed like COLOR_SLOTS.
+    """
+    return color_choice_dict.resolve()
+
+
+class SymbolCollisionWarning(UserWarning):
+    """
+    Two symbols of an alphabet are drawn identically.
+    """
+
+
+class SymbolRegistry:
+    """
+    An alphabet: the SquareSymbol of every key plus how characters decompose into keys.
+    Behaves like the read-only symbols dictionary it replaces and keeps a reverse index
+    from drawn signature (case, colour slot per polygon) to symbol key.
+    """
+
+    def __init__(self, symbols, decompositions=None, strict=False):
+        """
+        :param symbols: Key to SquareSymbol mapping, in glyph ID order.
+        :param decompositions: Character to component keys, like decomposition_dict.
+        :param strict: Raise ValueError instead of warning when symbols collide.
+        """
+        self.symbols = dict(symbols)
+        self.decompositions = dict(decompositions or {})
+        # Signature -> keys drawn with it, the first one wins reverse lookups
+        self.signatures = {}
+        for key, symbol in self.symbols.items():
+            self.signatures.setdefault(self.signature(symbol), []).append(key)
+        self.validate(strict)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __contains__(self, key):
+        return key in self.symbols
+
+    def __getitem__(self, key):
+        return self.symbols[key]
+
+    def keys(self):
+        return self.symbols.keys()
+
+    def items(self):
+        return self.symbols.items()
+
+    def get(self, key, default=None):
+        return self.symbols.get(key, default)
+
+    @staticmethod
+    def signature(symbol):
+        """
+        What a symbol looks like: its case and the colour slot index of every polygon,
+        with the colours repeated cyclically like the renderers do.
+        """
+        num_polygons = CASE_RANGES[symbol.case - 1, 1] - CASE_RANGES[symbol.case - 1, 0]
+        slots = [COLOR_SLOTS.index(key) for key in symbol.color_keys_lst]
+        return symbol.case, tuple(slots[i % len(slots)] for i in range(num_polygons))
+
+    def lookup(self, signature):
+        """
+        Key of the symbol drawn with a signature, or None.
+        """
+        keys = self.signatures.get(signature)
+        return keys[0] if keys else None
+
+    def collisions(self):
+        """
+        Groups of keys that are drawn identically.
+        """
+        return [keys for keys in self.signatures.values() if len(keys) > 1]
+
+    def similar(self, max_differences=1):
+        """
+        Pairs of keys of the same case whose colours differ in at most max_differences polygons.
+        Identical pairs are included.
+        """
+        pairs = []
+        signatures = [(key, self.signature(symbol)) for key, symbol in self.symbols.items()]
+        for i, (key_a, (case_a, slots_a)) in enumerate(signatures):
+            for key_b, (case_b, slots_b) in signatures[i + 1:]:
+                if case_a == case_b and sum(a != b for a, b in zip(slots_a, slots_b)) <= max_differences:
+                    pairs.append((key_a, key_b))
+        return pairs
+
+    def validate(self, strict=False):
+        """
+        Check every symbol and report collisions.
+        :param strict: Raise ValueError for collisions instead of warning.
+        :raises ValueError: For unknown colour slots or cases, missing decomposition
+            components, and with strict=True for collisions.
+        """
+        for key, symbol in self.symbols.items():
+            if not 1 <= symbol.case <= NUM_CASES:
+                raise ValueError(f"symbol {key!r} has case {symbol.case}, expected 1..{NUM_CASES}")
+            unknown = set(symbol.color_keys_lst) - set(COLOR_SLOTS)
+            if unknown or not symbol.color_keys_lst:
+                raise ValueError(f"symbol {key!r} has colour slots {symbol.color_keys_lst}, expected {COLOR_SLOTS}")
+        for char, components in self.decompositions.items():
+            if char != char.upper():
+                # Text is upper-cased before decomposing, lower-case entries are never used
+                continue
+            missing = [component for component in components if component not in self.symbols]
+            if missing:
+                raise ValueError(f"decomposition of {char!r} uses unknown symbols {missing}")
+
+        collisions = self.collisions()
+        if collisions:
+            message = "symbols drawn identically: " + ", ".join("/".join(keys) for keys in collisions)
+            if strict:
+                raise ValueError(message)
+            warnings.warn(message, SymbolCollisionWarning, stacklevel=3)
+
+    def to_dict(self):
+        """
+        Plain data for JSON, see from_dict.
+        """
+        return {
+            'symbols': {key: {'text': symbol.symbol_txt, 'case': symbol.case, 'colors': list(symbol.color_keys_lst)}
+                        for key, symbol in self.symbols.items()},
+            'decompositions': {char: list(components) for char, components in self.decompositions.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data, strict=False):
+        """
+        Build a registry from plain data:
+        {"symbols": {key: {"text": ..., "case": 1..4, "colors": [slot, ...]}}, "decompositions": {char: [key, ...]}}
+        "text" defaults to the key.
+        """
+        symbols = {key: SquareSymbol(entry.get('text', key), list(entry['colors']), int(entry['case']))
+                   for key, entry in data['symbols'].items()}
+        decompositions = {char: tuple(components) for char, components in data.get('decompositions', {}).items()}
+        return cls(symbols, decompositions, strict)
+
+    @classmethod
+    def load(cls, path, strict=False):
+        """
+        Load an alphabet from a .json or .toml file with the layout of from_dict.
+        """
+        if path.endswith('.toml'):
+            import tomllib
+            with open(path, 'rb') as f:
+                return cls.from_dict(tomllib.load(f), strict)
+        import json
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f), strict)
+
+    def save(self, path):
+        """
+        Write the alphabet as JSON, e.g. as a starting point for a new one.
+        """
+        import json
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+
+
+# The built-in alphabet; its known collision ('P' and '2') is kept for compatibility
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', SymbolCollisionWarning)
+    SYMBOLS = SymbolRegistry(symbols_dict, decomposition_dict)
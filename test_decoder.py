@@ -0,0 +1,53 @@
+import io
+import math
+
+import numpy as np
+import pytest
+
+import mpl_render
+import svg_writer
+import tile_atlas
+from decoder import GlyphDecoder, decode_image, decode_svg
+from encoder import encode_sentence
+from layout import layout_glyphs
+from symbols import resolve_palette
+
+# Upper case and without spaces, which the encoding does not keep
+TEXT = "TÂMHỒNLÀNỘITHẤTCĂNNHÀ-CONNGƯỜI"
+COL_NUM = 6
+
+
+def render(backend, fmt, text=TEXT, palette=None, row_num=None):
+    glyph_ids = encode_sentence(text)
+    layout = layout_glyphs(glyph_ids, row_num or math.ceil(len(glyph_ids) / COL_NUM), COL_NUM)
+    buf = io.BytesIO()
+    backend.write_layout(layout, buf, fmt, palette or resolve_palette())
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize('backend', [svg_writer, mpl_render])
+def test_svg_round_trip(backend):
+    assert decode_svg(render(backend, 'svg')) == TEXT
+
+
+@pytest.mark.parametrize('backend', [tile_atlas, mpl_render])
+def test_png_round_trip(backend):
+    assert decode_image(render(backend, 'png'), COL_NUM) == TEXT
+
+
+@pytest.mark.parametrize('backend', [tile_atlas, mpl_render])
+def test_png_round_trip_overflowing_rows(backend):
+    # Text longer than row_num rows adds rows instead of being cut off
+    assert decode_image(render(backend, 'png', row_num=2), COL_NUM) == TEXT
+
+
+def test_glyph_ids_round_trip():
+    decoder = GlyphDecoder()
+    assert np.array_equal(decoder.read_svg(render(svg_writer, 'svg')), encode_sentence(TEXT))
+
+
+def test_palette_must_match():
+    palette = resolve_palette()[::-1]
+    assert decode_svg(render(svg_writer, 'svg', palette=palette), palette=palette) == TEXT
+    assert decode_svg(render(svg_writer, 'svg', palette=palette)) != TEXT
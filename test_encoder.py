@@ -0,0 +1,89 @@
+import unicodedata
+
+import numpy as np
+import pytest
+
+from encoder import SentenceEncoder, UnknownSymbolError, encode_sentence
+from layout import GLYPH_TABLE, decompose_sentence, glyph_table
+from symbols import SYMBOLS, SymbolRegistry
+
+SENTENCE = "Tâm hồn là nội thất căn nhà - con người"
+
+
+def test_matches_decompose_sentence():
+    expected = GLYPH_TABLE.glyph_ids(decompose_sentence(SENTENCE))
+    assert np.array_equal(encode_sentence(SENTENCE), expected)
+
+
+def test_stacked_diacritics_decompose():
+    assert SentenceEncoder().keys(encode_sentence("Ấm a")) == ['A', '^', 'acute', 'M', 'A']
+
+
+def test_nfd_input_encodes_like_nfc():
+    nfd = unicodedata.normalize('NFD', SENTENCE)
+    assert nfd != SENTENCE
+    assert np.array_equal(encode_sentence(nfd), encode_sentence(SENTENCE))
+
+
+def test_spaces_and_empty_text():
+    assert len(encode_sentence("")) == 0
+    assert len(encode_sentence(" \t\n")) == 0
+    assert np.array_equal(encode_sentence("A B"), encode_sentence("AB"))
+
+
+def test_encode_with_another_alphabet():
+    # Only A and B, with "Ă" drawn as A
+    registry = SymbolRegistry({key: SYMBOLS[key] for key in 'AB'}, {'Ă': ('A',)})
+    table = glyph_table(registry)
+    assert glyph_table(registry) is table and glyph_table() is GLYPH_TABLE
+    assert encode_sentence("ABĂ", registry=registry).tolist() == [0, 1, 0]
+    assert encode_sentence("ABC", unknown='skip', registry=registry).tolist() == [0, 1]
+    with pytest.raises(UnknownSymbolError):
+        encode_sentence("ABC", registry=registry)
+
+
+def test_raise_reports_character_and_position():
+    with pytest.raises(UnknownSymbolError) as excinfo:
+        SentenceEncoder(unknown='raise').encode("AB😀C")
+    assert excinfo.value.char == '😀'
+    assert excinfo.value.position == 2
+    # Still a KeyError, which is what the symbols_dict lookup used to raise
+    assert isinstance(excinfo.value, KeyError)
+
+
+def test_skip_drops_unknown_characters():
+    assert np.array_equal(SentenceEncoder(unknown='skip').encode("AB😀C"), encode_sentence("ABC"))
+
+
+def test_replace_draws_the_replacement_symbol():
+    glyph_ids = SentenceEncoder(unknown='replace').encode("AB😀C")
+    assert glyph_ids.tolist() == encode_sentence("AB?C").tolist()
+    assert glyph_ids[2] == GLYPH_TABLE.index['?']
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        SentenceEncoder(unknown='ignore')
+    with pytest.raises(ValueError, match='not a symbol'):
+        SentenceEncoder(unknown='replace', replacement='no such symbol')
+
+
+def test_compiled_characters_are_reused():
+    encoder = SentenceEncoder(unknown='skip')
+    first = encoder.encode(SENTENCE)
+    # A character outside the Basic Multilingual Plane grows the lookup without losing earlier entries
+    assert len(encoder.encode("😀")) == 0
+    assert np.array_equal(encoder.encode(SENTENCE), first)
+
+
+def test_shared_encoder_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Every text brings new characters, some of them wider than any before, so threads compile concurrently
+    texts = [SENTENCE[i:] + chr(0x1EA0 + i) + chr(0xC0 + i) for i in range(40)]
+    expected = [SentenceEncoder(unknown='skip').encode(text) for text in texts]
+    for _ in range(5):
+        shared = SentenceEncoder(unknown='skip')
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(shared.encode, texts * 4))
+        assert all(np.array_equal(result, expected[i % len(texts)]) for i, result in enumerate(results))
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+
+from encoder import encode_sentence
+from glyphs import POLYGON_OFFSETS, VERTICES, unique_segments
+from layout import layout_glyphs
+
+
+def unit_steps(segments):
+    """
+    Unit lattice steps covered by segments, as a list so repeated steps show up.
+    """
+    steps = []
+    for (x_0, y_0), (x_1, y_1) in np.rint(segments).astype(int).tolist():
+        n = math.gcd(x_1 - x_0, y_1 - y_0)
+        dx, dy = (x_1 - x_0) // n, (y_1 - y_0) // n
+        for k in range(n):
+            a, b = (x_0 + k * dx, y_0 + k * dy), (x_0 + (k + 1) * dx, y_0 + (k + 1) * dy)
+            steps.append(min(a, b) + max(a, b))
+    return steps
+
+
+def polygon_edges(layout):
+    edges = []
+    for polygon in layout.polygons():
+        edges.extend(zip(polygon, np.roll(polygon, -1, axis=0)))
+    return np.array(edges)
+
+
+def outline(text, row_num, col_num):
+    layout = layout_glyphs(encode_sentence(text), row_num, col_num)
+    return layout, layout.outline_segments()
+
+
+def test_single_glyph_covers_every_edge_once():
+    layout, segments = outline("A", 1, 1)
+    steps = unit_steps(segments)
+    assert len(steps) == len(set(steps)) == 20
+    assert set(steps) == set(unit_steps(polygon_edges(layout)))
+    # Inner polygons share edges with each other, the outline has fewer segments than edges
+    assert len(segments) == 7 < len(polygon_edges(layout))
+
+
+def test_adjacent_glyphs_share_their_common_edge():
+    _, single = outline("A", 1, 1)
+    _, side_by_side = outline("AA", 1, 2)
+    # The shared vertical edge (3 steps) is drawn once
+    assert len(unit_steps(side_by_side)) == 2 * 20 - 3
+    # One segment fewer for the shared edge, and the top and bottom edges join into one segment each
+    assert len(side_by_side) == 2 * len(single) - 1 - 2
+
+    _, stacked = outline("AA", 2, 1)
+    assert len(unit_steps(stacked)) == 2 * 20 - 3
+
+
+def test_no_step_is_drawn_twice_on_a_grid():
+    layout, segments = outline("Tâm hồn là nội thất căn nhà - con người", 6, 6)
+    steps = unit_steps(segments)
+    assert len(steps) == len(set(steps))
+    assert set(steps) == set(unit_steps(polygon_edges(layout)))
+
+
+def test_glyph_table_and_empty_input():
+    assert len(unique_segments(VERTICES, POLYGON_OFFSETS)) > 0
+    assert unique_segments(np.empty((0, 2)), np.zeros(1, dtype=int)).shape == (0, 2, 2)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from encoder import encode_sentence
+from glyphs import CELL_SIZE
+from layout import diff_glyphs, layout_glyphs
+from mpl_render import draw_outline, draw_symbol_text
+
+TEXT = "TÂMHỒNLÀNỘITHẤTCĂNNHÀ-CONNGƯỜI" * 4
+COL_NUM = 10
+
+
+def labelled_axes(inches):
+    layout = layout_glyphs(encode_sentence(TEXT), 1, COL_NUM)
+    fig = Figure(figsize=(inches, inches), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    labels = draw_symbol_text(ax, layout, culled=True)
+    ax.set_xlim(0, COL_NUM * CELL_SIZE)
+    ax.set_ylim(-COL_NUM * CELL_SIZE + CELL_SIZE, CELL_SIZE)
+    return fig, ax, layout, labels
+
+
+def drawn_cells(labels):
+    return [cell for cell, label in enumerate(labels.labels) if label is not None]
+
+
+def cells(rows, cols):
+    return {row * COL_NUM + col for row in rows for col in cols}
+
+
+def test_only_visible_labels_are_drawn():
+    fig, ax, layout, labels = labelled_axes(6)
+    # Cells 1..2 of rows 1..2 in view; cells touching the view edge may be drawn too
+    ax.set_xlim(CELL_SIZE + 1, 3 * CELL_SIZE - 1)
+    ax.set_ylim(-2 * CELL_SIZE + 1, -1)
+    fig.canvas.draw()
+    drawn = set(drawn_cells(labels))
+    assert cells(range(1, 3), range(1, 3)) <= drawn <= cells(range(0, 4), range(0, 4))
+    assert all(labels.labels[cell].get_text() == layout.symbol_texts()[cell] for cell in drawn)
+
+
+def test_no_labels_when_zoomed_out():
+    # 10 cells in 100 pixels, below LABEL_CELL_PIXELS
+    fig, ax, layout, labels = labelled_axes(1)
+    fig.canvas.draw()
+    assert drawn_cells(labels) == []
+
+
+def outline_image(layout, old_layout=None):
+    fig = Figure(figsize=(4, 8), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    if old_layout is None:
+        draw_outline(ax, layout)
+    else:
+        first, stop = diff_glyphs(old_layout.glyph_ids, layout.glyph_ids)
+        draw_outline(ax, old_layout, culled=True).replace_rows(layout, first // COL_NUM, (stop - 1) // COL_NUM + 1)
+    ax.set_xlim(0, COL_NUM * CELL_SIZE)
+    ax.set_ylim(-19 * CELL_SIZE, CELL_SIZE)
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba()).astype(int)
+
+
+@pytest.mark.parametrize('text', [TEXT.replace("NỘI", "XYZ", 1), TEXT[:40] + "QQ" + TEXT[40:], TEXT[:50]])
+def test_replaced_rows_stroke_like_a_full_outline(text):
+    old_layout = layout_glyphs(encode_sentence(TEXT), 1, COL_NUM)
+    layout = layout_glyphs(encode_sentence(text), 1, COL_NUM)
+    # Segments split at the replaced rows may differ in antialiasing only
+    assert np.abs(outline_image(layout, old_layout) - outline_image(layout)).max() <= 8
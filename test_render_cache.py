@@ -0,0 +1,33 @@
+import os
+
+import svg_writer
+from encoder import encode_sentence
+from render_cache import RenderCache
+from symbols import resolve_palette
+
+
+def disk_bytes(directory):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def test_render_hits_and_misses():
+    cache = RenderCache()
+    glyph_ids = encode_sentence("ABC")
+    first = cache.render(svg_writer, glyph_ids, 1, 3, 'svg', resolve_palette())
+    assert cache.render(svg_writer, glyph_ids, 1, 3, 'svg', resolve_palette()) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_tier_stays_bounded(tmp_path):
+    cache = RenderCache(max_bytes=1000, directory=tmp_path, max_disk_bytes=5000)
+    keys = [RenderCache.key([i], 1, 1, 'svg', ['red'], 'test') for i in range(200)]
+    for key in keys:
+        cache.put(key, b'x' * 100)
+    assert cache.disk_size == disk_bytes(tmp_path) == 5000
+
+    # A new cache on the same directory indexes what is there and reads it back
+    reopened = RenderCache(directory=tmp_path, max_disk_bytes=5000)
+    assert len(reopened.disk_entries) == 50
+    assert reopened.get(keys[-1]) == b'x' * 100
+    assert reopened.get(keys[0]) is None
+    assert (reopened.disk_hits, reopened.misses) == (1, 1)
@@ -0,0 +1,37 @@
+import re
+import subprocess
+import sys
+
+import pytest
+
+import profiling
+import square_code
+import tile_pyramid
+
+
+def test_parser_choices_match_their_modules():
+    assert square_code.PROFILE_MODES == profiling.PROFILE_MODES
+    assert square_code.PYRAMID_LAYOUTS == tile_pyramid.PYRAMID_LAYOUTS
+
+
+def test_import_stays_light():
+    # A fresh interpreter, the test session has imported everything already
+    code = "import sys, square_code; print(' '.join(sorted(sys.modules)))"
+    modules = set(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                 cwd=square_code.__file__.rpartition('/')[0] or '.').stdout.split())
+    lazy = {'page_pool', 'profiling', 'render_cache', 'streaming', 'tile_pyramid', 'tile_atlas', 'multiprocessing',
+            'matplotlib', 'PyQt5'}
+    assert not modules & lazy
+
+
+@pytest.mark.parametrize('name, content, message', [
+    ('missing.png', None, "No such file"),
+    ('broken.svg', "<svg", "unclosed token"),
+    ('text.png', "not an image", "not a PNG file"),
+])
+def test_decode_errors_exit_with_a_message(tmp_path, name, content, message):
+    path = tmp_path / name
+    if content is not None:
+        path.write_text(content)
+    with pytest.raises(SystemExit, match=re.escape(f"error: {path}: ") + ".*" + message):
+        square_code.main(['decode', '--cols', '6', str(path)])
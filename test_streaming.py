@@ -0,0 +1,24 @@
+import io
+import unicodedata
+
+import numpy as np
+import pytest
+
+from encoder import UnknownSymbolError, encode_sentence
+from streaming import iter_pages, iter_text_chunks
+
+SENTENCE = "Tâm hồn là nội thất căn nhà - con người "
+
+
+def test_pages_match_encoding_the_whole_text():
+    text = unicodedata.normalize('NFD', SENTENCE * 50)
+    pages = list(iter_pages(iter_text_chunks(io.StringIO(text), chunk_chars=7), row_num=5, col_num=6))
+    assert all(len(page) == 30 for page in pages[:-1])
+    assert np.array_equal(np.concatenate(pages), encode_sentence(text))
+
+
+def test_unknown_symbol_position_counts_from_stream_start():
+    text = "ABC" * 1000 + "😀"
+    with pytest.raises(UnknownSymbolError) as excinfo:
+        list(iter_pages(iter_text_chunks(io.StringIO(text), chunk_chars=100)))
+    assert excinfo.value.position == len(text) - 1
@@ -0,0 +1,63 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from encoder import encode_sentence
+from symbols import resolve_palette
+from tile_pyramid import TilePyramid, write_pyramid
+
+TEXT = "TÂMHỒNLÀNỘITHẤTCĂNNHÀ-CONNGƯỜI"
+COL_NUM = 5
+
+
+def pyramid(row_num=None):
+    return TilePyramid(encode_sentence(TEXT), COL_NUM, resolve_palette(), row_num, cell_px=36, tile_size=64)
+
+
+def tile_files(path):
+    tile_dir = os.path.splitext(path)[0] + '_files'
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(tile_dir) for name in names)
+
+
+def test_rows_grow_to_fit_the_text():
+    row_num = math.ceil(len(encode_sentence(TEXT)) / COL_NUM)
+    assert pyramid(row_num=2).grid.shape == (row_num, COL_NUM)
+    assert pyramid(row_num=2).height == pyramid().height == row_num * 36
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_progress(tmp_path, workers):
+    path = str(tmp_path / 'out.dzi')
+    reports = []
+    total = write_pyramid(pyramid(), path, workers=workers, progress=lambda *report: reports.append(report))
+    assert total == len(tile_files(path))
+    assert reports[-1] == (total, total)
+    assert all(done < next_done for (done, _), (next_done, _) in zip(reports, reports[1:]))
+    assert os.path.exists(path)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_cancel(tmp_path, workers):
+    path = str(tmp_path / 'out.dzi')
+    reports = []
+    assert write_pyramid(pyramid(), path, workers=workers, progress=lambda *report: reports.append(report),
+                         cancelled=lambda: len(reports) == 2) is None
+    assert len(reports) == 2
+    assert len(tile_files(path)) < reports[0][1]
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize('start_method', [None, 'spawn'])
+def test_serial_and_parallel_tiles_match(tmp_path, start_method):
+    from matplotlib.image import imread
+
+    serial, parallel = str(tmp_path / 'serial.dzi'), str(tmp_path / 'parallel.dzi')
+    write_pyramid(pyramid(), serial, workers=1)
+    write_pyramid(pyramid(), parallel, workers=2, start_method=start_method)
+    serial_files, parallel_files = tile_files(serial), tile_files(parallel)
+    assert [os.path.relpath(f, tmp_path / 'serial_files') for f in serial_files] == \
+           [os.path.relpath(f, tmp_path / 'parallel_files') for f in parallel_files]
+    for serial_file, parallel_file in zip(serial_files, parallel_files):
+        assert np.array_equal(imread(serial_file), imread(parallel_file))
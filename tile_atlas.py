@@ -0,0 +1,167 @@
+"""
+Raster backend that renders every distinct glyph once and assembles images by copying tiles.
+
+Every glyph with the same case, resolved colours, line width and pixel size is
+pixel-identical, so a TileAtlas rasterizes it once to an RGBA NumPy tile and
+output images are filled by strided slice assignment.
+"""
+import numpy as np
+
+from glyphs import CASE_RANGES, CELL_SIZE, case_polygons
+
+# Output formats write_layout can produce
+FORMATS = ('png',)
+
+# Tiles are rendered at 72 dpi so that one pixel is one point, like the vector backends
+_DPI = 72
+
+
+class TileAtlas:
+    """
+    Cache of rasterized glyph tiles.
+    Keys hold the resolved colours rather than colour slot names, so changing one entry
+    of color_choice_dict only misses for the glyphs that actually use that slot.
+    """
+
+    def __init__(self):
+        self.tiles = {}
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def clear(self):
+        self.tiles.clear()
+
+    @staticmethod
+    def tile_key(table, glyph_id, palette, line_width, cell_px, symbol_text=False):
+        """
+        Cache key of a glyph tile.
+        :param table: GlyphTable the glyph belongs to.
+        :param glyph_id: Glyph ID in the table.
+        :param palette: Colours indexed like symbols.COLOR_SLOTS.
+        :param line_width: Outline width in pixels.
+        :param cell_px: Tile width and height in pixels.
+        :param symbol_text: Include the symbol label in the tile.
+        """
+        case = int(table.cases[glyph_id])
+        num_polygons = CASE_RANGES[case, 1] - CASE_RANGES[case, 0]
+        colors = tuple(palette[slot] for slot in table.polygon_slots[glyph_id, :num_polygons])
+        text = table.symbols[glyph_id].symbol_txt if symbol_text else None
+        return case, colors, float(line_width), int(cell_px), text
+
+    def get(self, key):
+        """
+        Get the tile for a key, rendering it on first use.
+        :return: (cell_px, cell_px, 4) uint8 RGBA array, read-only.
+        """
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = render_tile(*key)
+        return tile
+
+    def assemble(self, layout, palette, line_width=1, cell_px=36, symbol_text=False):
+        """
+        Build the full raster image of a laid-out sentence.
+        :param layout: SentenceLayout from layout.layout_sentence.
+        :param palette: Colours indexed like symbols.COLOR_SLOTS.
+        :param line_width: Outline width in pixels.
+        :param cell_px: Size of one glyph square in pixels.
+        :param symbol_text: Label every square with its symbol.
+        :return: (rows * cell_px, col_num * cell_px, 4) uint8 RGBA array, with more rows than
+            layout.row_num when the text does not fit.
+        """
+        grid = glyph_grid(layout.glyph_ids, layout.row_num, layout.col_num)
+        return self.assemble_grid(grid, layout.table, palette, line_width, cell_px, symbol_text)
+
+    def assemble_grid(self, grid, table, palette, line_width=1, cell_px=36, symbol_text=False):
+        """
+        Build the raster image of a block of glyph cells.
+        :param grid: 2-D array of glyph IDs into table, -1 for empty cells.
+        :param table: GlyphTable the IDs refer to.
+        :return: (rows * cell_px, cols * cell_px, 4) uint8 RGBA array, empty cells are white.
+        """
+        row_num, col_num = grid.shape
+        image = np.full((row_num * cell_px, col_num * cell_px, 4), 255, dtype=np.uint8)
+        # View the image as (row, y, col, x, rgba) so a cell is image_cells[row, :, col]
+        image_cells = image.reshape(row_num, cell_px, col_num, cell_px, 4)
+
+        rows, cols = np.nonzero(grid >= 0)
+        glyph_ids = grid[rows, cols]
+
+        # One strided copy per distinct glyph
+        order = np.argsort(glyph_ids, kind='stable')
+        unique_ids, starts = np.unique(glyph_ids[order], return_index=True)
+        for glyph_id, cells in zip(unique_ids, np.split(order, starts[1:])):
+            tile = self.get(self.tile_key(table, glyph_id, palette, line_width, cell_px, symbol_text))
+            image_cells[rows[cells], :, cols[cells]] = tile
+        return image
+
+
+def glyph_grid(glyph_ids, row_num, col_num):
+    """
+    Glyph IDs arranged on the row_num x col_num grid, row by row.
+    Cells past the end of the text are -1; text longer than the grid adds rows, as it
+    does in the SVG and matplotlib drawings.
+    :return: (rows, col_num) int32 array with rows at least row_num.
+    """
+    row_num = max(row_num, -(-len(glyph_ids) // col_num))
+    grid = np.full(row_num * col_num, -1, dtype=np.int32)
+    grid[:len(glyph_ids)] = glyph_ids
+    return grid.reshape(row_num, col_num)
+
+
+def render_tile(case, colors, line_width, cell_px, text=None):
+    """
+    Rasterize one glyph with matplotlib's Agg renderer.
+    :param case: 0-based case.
+    :param colors: Face colour per polygon of the case.
+    :param line_width: Outline width in pixels.
+    :param cell_px: Tile width and height in pixels.
+    :param text: Optional label drawn in the center.
+    :return: (cell_px, cell_px, 4) uint8 RGBA array, read-only.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(cell_px / _DPI, cell_px / _DPI), dpi=_DPI)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.add_collection(PolyCollection(case_polygons(case + 1), closed=True, facecolors=colors,
+                                     edgecolors='black', linewidths=line_width), autolim=False)
+    if text is not None:
+        ax.text(CELL_SIZE / 2, CELL_SIZE / 2, text,
+                horizontalalignment='center', verticalalignment='center',
+                fontsize=12, color='b', weight='bold')
+    ax.set_xlim(0, CELL_SIZE)
+    ax.set_ylim(0, CELL_SIZE)
+    ax.axis('off')
+    canvas.draw()
+
+    tile = np.array(canvas.buffer_rgba(), dtype=np.uint8)
+    tile.setflags(write=False)
+    return tile
+
+
+# Shared atlas, tiles survive between write_layout calls
+TILE_ATLAS = TileAtlas()
+
+
+def write_layout(layout, file, fmt, palette, symbol_text=False, line_width=1, cell_px=36):
+    """
+    Write a laid-out sentence as PNG assembled from cached glyph tiles.
+    :param layout: SentenceLayout from layout.layout_sentence.
+    :param file: Path or binary file-like object.
+    :param fmt: Must be 'png'.
+    :param palette: Colours indexed like symbols.COLOR_SLOTS.
+    :param symbol_text: Label every square with its symbol.
+    :param line_width: Outline width in pixels.
+    :param cell_px: Size of one glyph square in pixels.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"tile_atlas cannot write {fmt}")
+    from matplotlib.image import imsave
+
+    image = TILE_ATLAS.assemble(layout, palette, line_width, cell_px, symbol_text)
+    # Fast zlib level, the tiles compress well anyway and encoding dominates on big images
+    imsave(file, image, format='png', pil_kwargs={'compress_level': 1})
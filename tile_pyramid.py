@@ -0,0 +1,291 @@
+"""
+Deep-zoom tile pyramids of mosaics too big for one image.
+
+The plot_sentence grid (col_num columns, as many rows as the text needs) is
+rendered as a multi-resolution pyramid of square tiles, written in the Deep Zoom
+(DZI) layout that OpenSeadragon reads, or as {z}/{x}/{y}.png XYZ tiles for
+Leaflet-style viewers.
+
+Cells sit on a fixed grid of cell_px pixels, so a full-resolution tile is
+assembled from just the glyph cells that intersect it, copied from a TileAtlas.
+Every lower level is made by averaging 2x2 blocks of the four tiles below it,
+never by rendering again. TilePyramid.tile() builds any tile on demand; for the
+whole pyramid, write_pyramid() hands independent subtrees to a process pool,
+reporting its progress and stopping early on request.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from layout import GLYPH_TABLE
+from tile_atlas import TILE_ATLAS, glyph_grid
+
+# Pyramid layouts write_pyramid can produce
+PYRAMID_LAYOUTS = ('dzi', 'xyz')
+
+# Levels of a subtree rendered by one worker job, 3 means 8x8 full-resolution tiles
+SUBTREE_LEVELS = 3
+
+_DZI_XML = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="png" Overlap="0" TileSize="{tile_size}">'
+            '<Size Width="{width}" Height="{height}"/></Image>\n')
+
+
+def downsample(image):
+    """
+    Halve an image by averaging 2x2 pixel blocks; an odd last row or column is averaged with itself.
+    :param image: (h, w, 4) uint8 RGBA array.
+    :return: (ceil(h / 2), ceil(w / 2), 4) uint8 RGBA array.
+    """
+    height, width = image.shape[:2]
+    if height % 2 or width % 2:
+        image = np.pad(image, ((0, height % 2), (0, width % 2), (0, 0)), mode='edge')
+    # Four strided adds are much faster than a sum over the axes of a (h/2, 2, w/2, 2, 4) view
+    total = image[0::2, 0::2].astype(np.uint16)
+    total += image[1::2, 0::2]
+    total += image[0::2, 1::2]
+    total += image[1::2, 1::2]
+    total += 2
+    return (total >> 2).astype(np.uint8)
+
+
+class TilePyramid:
+    """
+    Tiles of a sentence grid at every zoom level.
+    Level max_level is full resolution; every level below it is half the size of the
+    one above, down to level 0, a single pixel, as in Deep Zoom.
+    """
+
+    def __init__(self, glyph_ids, col_num, palette, row_num=None, table=GLYPH_TABLE, cell_px=36, tile_size=256,
+                 line_width=1, symbol_text=False, atlas=TILE_ATLAS):
+        """
+        :param glyph_ids: Glyph IDs into table, e.g. from encoder.encode_sentence.
+        :param col_num: Number of columns of the grid.
+        :param palette: Colours indexed like symbols.COLOR_SLOTS.
+        :param row_num: Number of rows, defaults to just enough for the text.
+        :param table: GlyphTable the IDs refer to.
+        :param cell_px: Size of one glyph square in pixels at full resolution.
+        :param tile_size: Width and height of a tile in pixels.
+        :param line_width: Outline width in pixels.
+        :param symbol_text: Label every square with its symbol.
+        :param atlas: TileAtlas the glyph tiles come from.
+        """
+        if row_num is None:
+            row_num = max(1, math.ceil(len(glyph_ids) / col_num))
+        self.grid = glyph_grid(np.asarray(glyph_ids), row_num, col_num)
+        self.table = table
+        self.palette = palette
+        self.cell_px = cell_px
+        self.tile_size = tile_size
+        self.line_width = line_width
+        self.symbol_text = symbol_text
+        self.atlas = atlas
+        self.width = col_num * cell_px
+        # Text longer than row_num rows adds rows to the grid
+        self.height = self.grid.shape[0] * cell_px
+        self.max_level = math.ceil(math.log2(max(self.width, self.height)))
+
+    def level_size(self, level):
+        """
+        (width, height) of the whole image at a level in pixels.
+        """
+        scale = 1 << (self.max_level - level)
+        return -(-self.width // scale), -(-self.height // scale)
+
+    def tile_count(self, level):
+        """
+        (columns, rows) of tiles at a level.
+        """
+        width, height = self.level_size(level)
+        return -(-width // self.tile_size), -(-height // self.tile_size)
+
+    def render_tile(self, col, row):
+        """
+        Assemble a full-resolution tile from the glyph cells that intersect it.
+        :return: (h, w, 4) uint8 RGBA array, smaller than tile_size at the right and bottom edges.
+        """
+        x0, y0 = col * self.tile_size, row * self.tile_size
+        x1, y1 = min(x0 + self.tile_size, self.width), min(y0 + self.tile_size, self.height)
+        col0, row0 = x0 // self.cell_px, y0 // self.cell_px
+        cells = self.grid[row0:-(-y1 // self.cell_px), col0:-(-x1 // self.cell_px)]
+        image = self.atlas.assemble_grid(cells, self.table, self.palette, self.line_width, self.cell_px,
+                                         self.symbol_text)
+        # The cells overhang the tile by less than a cell on every side
+        left, top = col0 * self.cell_px, row0 * self.cell_px
+        return image[y0 - top:y1 - top, x0 - left:x1 - left]
+
+    def merge(self, level, col, row, child):
+        """
+        Build a tile from the (up to) four tiles of the level above.
+        :param child: Function (level, col, row) returning a tile of level + 1.
+        """
+        col_count, row_count = self.tile_count(level + 1)
+        rows = [np.concatenate([child(level + 1, c, r) for c in range(2 * col, min(2 * col + 2, col_count))],
+                               axis=1)
+                for r in range(2 * row, min(2 * row + 2, row_count))]
+        return downsample(np.concatenate(rows, axis=0))
+
+    def tile(self, level, col, row, save=None):
+        """
+        Build a tile on demand, rendering only the full-resolution tiles below it.
+        :param save: Optional function (level, col, row, image) called for this tile and every tile
+            built on the way, each exactly once.
+        :return: (h, w, 4) uint8 RGBA array.
+        """
+        if level == self.max_level:
+            image = self.render_tile(col, row)
+        else:
+            image = self.merge(level, col, row, lambda *key: self.tile(*key, save=save))
+        if save is not None:
+            save(level, col, row, image)
+        return image
+
+
+class PyramidWriter:
+    """
+    Writes the tiles of a TilePyramid to disk in the DZI or XYZ layout.
+    """
+
+    def __init__(self, pyramid, path, layout='dzi'):
+        """
+        :param pyramid: TilePyramid to write.
+        :param path: For 'dzi' the .dzi descriptor, the tiles go to <name>_files next to it;
+            for 'xyz' the directory the {z}/{x}/{y}.png tiles go to.
+        :param layout: 'dzi' or 'xyz'.
+        """
+        if layout not in PYRAMID_LAYOUTS:
+            raise ValueError(f"layout must be one of {PYRAMID_LAYOUTS}, not {layout!r}")
+        self.pyramid = pyramid
+        self.path = path
+        self.layout = layout
+        if layout == 'dzi':
+            self.tile_dir = os.path.splitext(path)[0] + '_files'
+            self.min_level = 0
+        else:
+            self.tile_dir = path
+            # XYZ zoom 0 is the most detailed level that still fits on one tile
+            self.min_level = max(level for level in range(pyramid.max_level + 1)
+                                 if pyramid.tile_count(level) == (1, 1))
+
+    def tile_path(self, level, col, row):
+        if self.layout == 'dzi':
+            return os.path.join(self.tile_dir, str(level), f"{col}_{row}.png")
+        return os.path.join(self.tile_dir, str(level - self.min_level), str(col), f"{row}.png")
+
+    def save(self, level, col, row, image):
+        if level < self.min_level:
+            return
+        from matplotlib.image import imsave
+
+        if self.layout == 'xyz':
+            # XYZ viewers expect whole tiles, pad the edges with white
+            size = self.pyramid.tile_size
+            image = np.pad(image, ((0, size - image.shape[0]), (0, size - image.shape[1]), (0, 0)),
+                           constant_values=255)
+        path = self.tile_path(level, col, row)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        imsave(path, image, format='png', pil_kwargs={'compress_level': 1})
+
+    def write_descriptor(self):
+        if self.layout == 'dzi':
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(_DZI_XML.format(tile_size=self.pyramid.tile_size, width=self.pyramid.width,
+                                        height=self.pyramid.height))
+
+
+# Per-worker writer set up once by _init_worker
+_worker = {}
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _init_worker(writer):
+    _worker['writer'] = writer
+
+
+def _write_subtree(level, col, row):
+    writer = _worker['writer']
+    saved = []
+
+    def save(level, col, row, image):
+        writer.save(level, col, row, image)
+        saved.append(level >= writer.min_level)
+
+    return col, row, writer.pyramid.tile(level, col, row, save), sum(saved)
+
+
+def write_pyramid(pyramid, path, layout='dzi', workers=1, progress=None, cancelled=None, start_method=None):
+    """
+    Write every tile of a pyramid.
+    The full-resolution tiles and the levels just below them are built in subtrees of
+    SUBTREE_LEVELS levels, one job each; the parent merges the subtree roots into the rest.
+    :param pyramid: TilePyramid to write.
+    :param path: See PyramidWriter.
+    :param layout: 'dzi' or 'xyz'.
+    :param workers: Number of worker processes, 0 or None for the CPU count, 1 renders in this process.
+    :param progress: Optional function (tiles_written, tile_total) called after every tile, or after
+        every subtree with worker processes.
+    :param cancelled: Optional function returning True to stop, checked whenever progress is reported.
+        The tiles written so far stay on disk, the DZI descriptor is not written.
+    :param start_method: multiprocessing start method of the worker processes, None for the platform
+        default. Pass 'spawn' when calling from a thread, a forked child inherits the other threads' locks.
+    :return: Number of tiles written, None when cancelled.
+    """
+    writer = PyramidWriter(pyramid, path, layout)
+    os.makedirs(writer.tile_dir, exist_ok=True)
+    total = sum(math.prod(pyramid.tile_count(level)) for level in range(writer.min_level, pyramid.max_level + 1))
+    written = 0
+
+    def report(count):
+        nonlocal written
+        written += count
+        if progress is not None:
+            progress(written, total)
+        if cancelled is not None and cancelled():
+            raise _Cancelled
+
+    def save(level, col, row, image):
+        writer.save(level, col, row, image)
+        if level >= writer.min_level:
+            report(1)
+
+    root_level = max(0, pyramid.max_level - SUBTREE_LEVELS)
+    col_count, row_count = pyramid.tile_count(root_level)
+    jobs = [(root_level, col, row) for row in range(row_count) for col in range(col_count)]
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers == 1:
+            roots = {(col, row): pyramid.tile(level, col, row, save) for level, col, row in jobs}
+        else:
+            roots = {}
+            context = multiprocessing.get_context(start_method) if start_method else None
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(writer,)) as pool:
+                futures = [pool.submit(_write_subtree, *job) for job in jobs]
+                try:
+                    for future in as_completed(futures):
+                        col, row, image, count = future.result()
+                        roots[col, row] = image
+                        report(count)
+                except _Cancelled:
+                    # Drop the queued subtrees instead of waiting for them on the way out
+                    pool.shutdown(cancel_futures=True)
+                    raise
+
+        # The remaining levels are small, built from the subtree roots in this process
+        for level in range(root_level - 1, writer.min_level - 1, -1):
+            col_count, row_count = pyramid.tile_count(level)
+            below = roots
+            roots = {(col, row): pyramid.merge(level, col, row, lambda _, c, r: below[c, r])
+                     for row in range(row_count) for col in range(col_count)}
+            for (col, row), image in roots.items():
+                save(level, col, row, image)
+    except _Cancelled:
+        return None
+    writer.write_descriptor()
+    return total